@@ -0,0 +1,746 @@
+#!/usr/bin/env python3
+"""
+Performance Optimization Benchmarks
+===================================
+
+Micro-benchmarks for the performance module. Like the local demo, these
+run WITHOUT AWS credentials and use simulated workloads only.
+
+Run all benchmarks:
+    python3 scripts/benchmark_performance.py
+
+Run a single benchmark:
+    python3 scripts/benchmark_performance.py cache_contention
+"""
+
+import io
+import sys
+import json
+import time
+import asyncio
+import random
+import argparse
+import tempfile
+import threading
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from performance.batching import DeadlineExceededError, RequestBatcher
+from performance.optimizer import PredictionCache, ShardedPredictionCache, content_digest
+from performance.snapshot import load_snapshot, write_snapshot
+
+
+def _run_threads(num_threads: int, target, *args) -> float:
+    """Run target(thread_index, *args) on num_threads threads and return elapsed seconds."""
+    barrier = threading.Barrier(num_threads + 1)
+
+    def worker(index):
+        barrier.wait()
+        target(index, *args)
+
+    threads = [
+        threading.Thread(target=worker, args=(i,))
+        for i in range(num_threads)
+    ]
+    for thread in threads:
+        thread.start()
+
+    start = time.perf_counter()
+    barrier.wait()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - start
+
+
+def bench_cache_contention(
+    ops_per_thread: int = 20000,
+    key_space: int = 5000,
+    io_ops_per_thread: int = 2000,
+    io_ms: float = 0.1
+):
+    """Compare single-lock and sharded cache throughput as threads increase."""
+    print("=" * 70)
+    print("BENCHMARK: PredictionCache lock contention")
+    print("=" * 70)
+    print()
+
+    keys = [f"chunk-context-{i}" for i in range(key_space)]
+    # Per-shard limits need headroom, as keys never spread perfectly evenly
+    capacity = key_space + key_space // 4
+
+    def cache_only(index, cache, ops):
+        offset = index * 7919
+        for i in range(ops):
+            key = keys[(offset + i) % key_space]
+            if cache.get(key) is None:
+                cache.set(key, key)
+
+    def with_io(index, cache, ops):
+        # Each request also waits on I/O (e.g. reading its chunk), which
+        # releases the GIL
+        offset = index * 7919
+        for i in range(ops):
+            key = keys[(offset + i) % key_space]
+            if cache.get(key) is None:
+                cache.set(key, key)
+            time.sleep(io_ms / 1000.0)
+
+    for title, workload, ops in (
+        ("Cache operations only (holds the GIL)", cache_only, ops_per_thread),
+        (f"Cache operation plus {io_ms}ms of I/O (releases the GIL)", with_io, io_ops_per_thread),
+    ):
+        print(title)
+        print(f"{'threads':>8} {'single (ops/s)':>16} {'sharded (ops/s)':>16} {'ratio':>7}")
+        for num_threads in (1, 2, 4, 8, 16, 32):
+            total_ops = num_threads * ops
+
+            single = PredictionCache(max_entries=capacity, ttl_ms=60000)
+            single_time = _run_threads(num_threads, workload, single, ops)
+
+            sharded = ShardedPredictionCache(max_entries=capacity, ttl_ms=60000, num_shards=16)
+            sharded_time = _run_threads(num_threads, workload, sharded, ops)
+
+            single_rate = total_ops / single_time
+            sharded_rate = total_ops / sharded_time
+            print(
+                f"{num_threads:>8} {single_rate:>16,.0f} {sharded_rate:>16,.0f} "
+                f"{sharded_rate / single_rate:>6.2f}x"
+            )
+        print()
+
+    print("The ratio column varies from run to run. On GIL builds it stays around")
+    print("1.0x, with no consistent benefit from sharding in either table, which is")
+    print("why predictionCache.shards defaults to 1.")
+    print("=" * 70)
+    print()
+
+
+def _mixed_trace(
+    length: int,
+    hot_keys: int,
+    scan_every: int,
+    scan_length: int,
+    seed: int = 42
+) -> list:
+    """Build a trace of Zipf-like hot-set lookups interrupted by one-off scans."""
+    rng = random.Random(seed)
+    weights = [1.0 / (rank + 1) for rank in range(hot_keys)]
+    hot = rng.choices(range(hot_keys), weights=weights, k=length)
+
+    trace = []
+    scan_id = 0
+    for i, key in enumerate(hot):
+        trace.append(f"doc-{key}")
+        if i and i % scan_every == 0:
+            trace.extend(f"backfill-{scan_id}-{j}" for j in range(scan_length))
+            scan_id += 1
+    return trace
+
+
+def bench_policy_hit_ratio(capacity: int = 1000):
+    """Replay a hot-set plus backfill trace against each eviction policy."""
+    print("=" * 70)
+    print("BENCHMARK: Eviction policy hit ratio (trace replay)")
+    print("=" * 70)
+    print()
+
+    traces = {
+        "hot set only": _mixed_trace(100000, 5000, scan_every=10**9, scan_length=0),
+        "hot set + backfills": _mixed_trace(100000, 5000, scan_every=5000, scan_length=3000),
+    }
+
+    print(f"Cache capacity: {capacity} entries")
+    print(f"{'trace':<22} {'requests':>9} {'lru':>8} {'w-tinylfu':>10}")
+    for trace_name, trace in traces.items():
+        ratios = {}
+        for policy in ("lru", "w-tinylfu"):
+            cache = PredictionCache(max_entries=capacity, ttl_ms=3600000, policy=policy)
+            hits = 0
+            for key in trace:
+                if cache.get(key) is None:
+                    cache.set(key, key)
+                else:
+                    hits += 1
+            ratios[policy] = hits / len(trace)
+        print(
+            f"{trace_name:<22} {len(trace):>9,} {ratios['lru']:>8.1%} "
+            f"{ratios['w-tinylfu']:>10.1%}"
+        )
+
+    print()
+    print("=" * 70)
+    print()
+
+
+def bench_cache_keys(document_bytes: int = 1024 * 1024, num_chunks: int = 500):
+    """Compare whole-prompt keys with composite digest keys for one document."""
+    print("=" * 70)
+    print("BENCHMARK: Cache key building (1 document, many chunks)")
+    print("=" * 70)
+    print()
+
+    rng = random.Random(7)
+    words = ["retrieval", "context", "chunk", "document", "model", "cache", "token"]
+    document = ""
+    while len(document) < document_bytes:
+        document += " ".join(rng.choices(words, k=64)) + "\n"
+    chunk_size = len(document) // num_chunks
+    chunks = [document[i * chunk_size:(i + 1) * chunk_size] for i in range(num_chunks)]
+    template = "<document>\n{doc}\n</document>\n<chunk>\n{chunk}\n</chunk>"
+    model_id = "anthropic.claude-haiku-4-5-20251001-v1:0"
+    cache = PredictionCache()
+
+    # Previous behavior: prompt string key, hashed in full for every chunk.
+    # The prompt itself is built either way, so only key building is timed.
+    whole_prompt_time = 0.0
+    for chunk in chunks:
+        prompt = template.format(doc=document, chunk=chunk)
+        start = time.perf_counter()
+        cache._hash_key(f"{prompt}|500|0.0|{model_id}")
+        whole_prompt_time += time.perf_counter() - start
+
+    # Composite keys: document digested once, chunk digested per chunk
+    start = time.perf_counter()
+    document_digest = content_digest(document)
+    for chunk in chunks:
+        cache._hash_key((document_digest, content_digest(chunk), "1", model_id, 500, 0.0))
+    composite_time = time.perf_counter() - start
+
+    print(f"Document: {len(document) / 1024 / 1024:.1f}MB, chunks: {num_chunks}")
+    print(f"  Whole-prompt keys: {whole_prompt_time * 1000:8.1f}ms")
+    print(f"  Composite keys:    {composite_time * 1000:8.1f}ms")
+    print(f"  Speedup:           {whole_prompt_time / composite_time:8.1f}x")
+    print()
+    print("=" * 70)
+    print()
+
+
+def bench_snapshot_load(num_entries: int = 100000, value_chars: int = 400):
+    """Time writing and loading a cache snapshot (Lambda warm start)."""
+    print("=" * 70)
+    print(f"BENCHMARK: Cache snapshot of {num_entries:,} entries")
+    print("=" * 70)
+    print()
+
+    rng = random.Random(11)
+    words = ["retrieval", "context", "chunk", "document", "model", "cache", "token"]
+    source = PredictionCache(max_entries=num_entries, ttl_ms=3600000)
+    for i in range(num_entries):
+        value = " ".join(rng.choices(words, k=value_chars // 8))[:value_chars]
+        source.set(("doc", i), value)
+
+    for compress in (False, True):
+        buffer = io.BytesIO()
+        start = time.perf_counter()
+        written = write_snapshot(source, buffer, compress=compress)
+        write_time = time.perf_counter() - start
+
+        target = PredictionCache(max_entries=num_entries, ttl_ms=3600000)
+        buffer.seek(0)
+        start = time.perf_counter()
+        loaded = load_snapshot(target, buffer)
+        load_time = time.perf_counter() - start
+
+        print(f"{'zlib' if compress else 'raw'} snapshot: {len(buffer.getvalue()) / 1024 / 1024:.1f}MB")
+        print(f"  Write: {written:,} entries in {write_time * 1000:8.1f}ms")
+        print(f"  Load:  {loaded:,} entries in {load_time * 1000:8.1f}ms "
+              f"({loaded / load_time:,.0f} entries/s)")
+        print()
+
+    print("=" * 70)
+    print()
+
+
+class TimerRequestBatcher:
+    """The previous RequestBatcher: a new threading.Timer on every add()."""
+
+    def __init__(self, max_batch_size=100, max_wait_time_ms=50, callback=None):
+        self.max_batch_size = max_batch_size
+        self.max_wait_time_ms = max_wait_time_ms
+        self.callback = callback
+        self.current_batch = []
+        self.lock = threading.Lock()
+        self.timer = None
+
+    def add(self, request):
+        with self.lock:
+            self.current_batch.append(request)
+            if self.timer:
+                self.timer.cancel()
+            if len(self.current_batch) >= self.max_batch_size:
+                batch = self.current_batch
+                self.current_batch = []
+                if self.callback:
+                    self.callback(batch)
+                return batch
+            self.timer = threading.Timer(
+                self.max_wait_time_ms / 1000.0,
+                self._flush_on_timeout
+            )
+            self.timer.start()
+            return None
+
+    def _flush_on_timeout(self):
+        with self.lock:
+            if self.current_batch:
+                batch = self.current_batch
+                self.current_batch = []
+                if self.callback:
+                    self.callback(batch)
+
+    def flush(self):
+        with self.lock:
+            if self.timer:
+                self.timer.cancel()
+            batch = self.current_batch
+            self.current_batch = []
+            return batch
+
+
+def bench_batcher(requests_per_thread: int = 5000, num_threads: int = 4):
+    """Compare the Timer-per-add batcher with the single-dispatcher batcher."""
+    print("=" * 70)
+    print("BENCHMARK: RequestBatcher throughput and flush latency")
+    print("=" * 70)
+    print()
+
+    for name, batcher_class in (("Timer per add", TimerRequestBatcher),
+                                ("Dispatcher", RequestBatcher)):
+        batched = []
+        batcher = batcher_class(max_batch_size=100, max_wait_time_ms=5,
+                                callback=lambda batch: batched.append(len(batch)))
+        started = []
+        thread_start = threading.Thread.start
+
+        def counting_start(thread):
+            started.append(thread.name)
+            thread_start(thread)
+
+        def produce(index):
+            for i in range(requests_per_thread):
+                batcher.add((index, i))
+
+        # Count the threads the batcher starts (plus the producers)
+        threading.Thread.start = counting_start
+        try:
+            elapsed = _run_threads(num_threads, produce)
+        finally:
+            threading.Thread.start = thread_start
+        batcher.flush()
+        total = requests_per_thread * num_threads
+        print(f"{name}:")
+        print(f"  Throughput:      {total / elapsed:12,.0f} requests/s")
+        print(f"  Threads started: {len(started) - num_threads:9,d}")
+
+        # A steady trickle, one request every 2ms for 200ms, with a 20ms window
+        flush_times = []
+        batcher = batcher_class(max_batch_size=100, max_wait_time_ms=20,
+                                callback=lambda batch: flush_times.append(time.perf_counter()))
+        start = time.perf_counter()
+        while time.perf_counter() - start < 0.2:
+            batcher.add("trickle")
+            time.sleep(0.002)
+        pending = len(batcher.flush())
+        first_flush = (
+            f"{(flush_times[0] - start) * 1000:.0f}ms" if flush_times else "never"
+        )
+        print(f"  Trickle:         {len(flush_times):9d} timed flushes in 200ms "
+              f"(first after {first_flush}, {pending} left pending)")
+        if hasattr(batcher, "close"):
+            batcher.close()
+        print()
+
+    print("=" * 70)
+    print()
+
+
+def bench_batcher_lanes(duration_s: float = 2.0):
+    """Compare interactive latency behind a backfill with one FIFO lane vs priority lanes."""
+    print("=" * 70)
+    print("BENCHMARK: RequestBatcher priority lanes under a bulk backfill")
+    print("=" * 70)
+    print()
+
+    def process(items):
+        # Simulated model call: fixed overhead plus per-item cost
+        time.sleep(0.002 + 0.0005 * len(items))
+        return items
+
+    for lanes in (("default",), ("interactive", "bulk")):
+        batcher = RequestBatcher(max_batch_size=100, max_wait_time_ms=20,
+                                 processor=process, lanes=lanes)
+        interactive_lane, bulk_lane = lanes[0], lanes[-1]
+        stop = time.perf_counter() + duration_s
+        bulk_futures = []
+
+        def backfill():
+            while time.perf_counter() < stop:
+                # More bulk work than the processor can keep up with
+                for _ in range(50):
+                    bulk_futures.append(batcher.submit("bulk", bulk_lane))
+                time.sleep(0.01)
+
+        interactive_futures = []
+
+        def interactive():
+            while time.perf_counter() < stop:
+                interactive_futures.append(
+                    batcher.submit("lookup", interactive_lane, deadline_ms=250)
+                )
+                time.sleep(0.005)
+
+        threads = [threading.Thread(target=backfill), threading.Thread(target=interactive)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        # Let the backlog drain; expired requests fail with DeadlineExceededError
+        expired = 0
+        for future in interactive_futures + bulk_futures:
+            try:
+                future.result()
+            except DeadlineExceededError:
+                expired += 1
+        stats = batcher.get_stats()
+        batcher.close()
+
+        print(f"Lanes {list(lanes)}:")
+        for name, lane in stats["lanes"].items():
+            latency = lane["latency"]
+            print(f"  {name:12s} p50 {latency['p50_ms']:8.1f}ms  p99 {latency['p99_ms']:8.1f}ms  "
+                  f"dropped {lane['dropped']:,} of {latency['count']:,}")
+        print()
+
+        lane_stats = stats["lanes"]
+        assert expired == sum(lane["dropped"] for lane in lane_stats.values())
+        if len(lanes) == 1:
+            # Lookups stuck behind the backfill miss their deadline
+            assert expired > 0
+        else:
+            # Lookups overtake the backfill and all make their deadline
+            assert lane_stats[interactive_lane]["dropped"] == 0
+            assert (lane_stats[interactive_lane]["latency"]["p99_ms"]
+                    < lane_stats[bulk_lane]["latency"]["p50_ms"])
+
+    print("Interactive lookups carry a 250ms deadline; with one lane they queue")
+    print("behind the backfill and are dropped once it passes.")
+    print()
+    print("=" * 70)
+    print()
+
+
+class FakeBedrockClient:
+    """Stand-in for the bedrock-runtime client that streams an echo after a fixed latency."""
+
+    def __init__(self, latency_s: float, chunk_delay_s: float = 0.0):
+        self.latency_s = latency_s
+        self.chunk_delay_s = chunk_delay_s
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.lock = threading.Lock()
+
+    def invoke_model_with_response_stream(self, modelId, contentType, accept, body):
+        with self.lock:
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            time.sleep(self.latency_s)
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+        prompt = json.loads(body)["messages"][0]["content"]
+        events = [
+            {"type": "content_block_delta", "delta": {"text": "answer "}},
+            {"type": "content_block_delta", "delta": {"text": f"to {prompt}"}},
+            {"type": "message_delta", "delta": {"stop_reason": "end_turn"}},
+        ]
+        return {"body": self._stream(events)}
+
+    def _stream(self, events):
+        for event in events:
+            time.sleep(self.chunk_delay_s)
+            yield {"chunk": {"bytes": json.dumps(event).encode()}}
+
+
+class ThrottlingBedrockClient(FakeBedrockClient):
+    """FakeBedrockClient with a requests-per-second quota that answers ThrottlingException beyond it."""
+
+    def __init__(self, latency_s: float, quota_rps: float):
+        super().__init__(latency_s)
+        self.quota_rps = quota_rps
+        self.allowance = quota_rps
+        self.last = time.monotonic()
+        self.requests = 0
+        self.throttled = 0
+
+    def invoke_model_with_response_stream(self, modelId, contentType, accept, body):
+        from botocore.exceptions import ClientError
+
+        with self.lock:
+            now = time.monotonic()
+            # Quota refills continuously with a one-second burst
+            self.allowance = min(self.quota_rps, self.allowance + (now - self.last) * self.quota_rps)
+            self.last = now
+            self.requests += 1
+            throttled = self.allowance < 1
+            if throttled:
+                self.throttled += 1
+            else:
+                self.allowance -= 1
+        if throttled:
+            raise ClientError(
+                {"Error": {"Code": "ThrottlingException", "Message": "Too many requests"},
+                 "ResponseMetadata": {"HTTPStatusCode": 429}},
+                "InvokeModelWithResponseStream"
+            )
+        return super().invoke_model_with_response_stream(modelId, contentType, accept, body)
+
+
+def bench_retry_throttling(num_requests: int = 300, quota_rps: float = 100.0):
+    """Compare failed requests and wasted calls under a Bedrock quota with and without retries."""
+    print("=" * 70)
+    print("BENCHMARK: Retries and adaptive rate limiting under throttling")
+    print("=" * 70)
+    print()
+
+    # Imported here so the other benchmarks run without boto3 installed
+    from claude_bedrock.inference_adapter import InferenceAdapter
+    from claude_bedrock.retry import AdaptiveRateLimiter, RetryBudget, RetryPolicy, TransientError
+
+    policies = {
+        "no retries": lambda: RetryPolicy(max_attempts=1),
+        "backoff": lambda: RetryPolicy(max_attempts=6, base_delay_ms=50),
+        "backoff + budget": lambda: RetryPolicy(
+            max_attempts=6, base_delay_ms=50, budget=RetryBudget()
+        ),
+        "backoff + limiter": lambda: RetryPolicy(
+            max_attempts=6, base_delay_ms=50, rate_limiter=AdaptiveRateLimiter()
+        ),
+        "all (default)": lambda: RetryPolicy(
+            max_attempts=6, base_delay_ms=50, budget=RetryBudget(),
+            rate_limiter=AdaptiveRateLimiter()
+        ),
+    }
+
+    print(f"{num_requests} requests from 16 threads against a {quota_rps:.0f} req/s quota")
+    print(f"{'policy':<20} {'failed':>6} {'calls sent':>11} {'throttled':>10} {'elapsed':>9}")
+    for name, make_policy in policies.items():
+        adapter = InferenceAdapter(retry_policy=make_policy())
+        client = ThrottlingBedrockClient(0.01, quota_rps)
+        adapter.bedrock_runtime = client
+        failed = []
+
+        def work(index):
+            for i in range(index, num_requests, 16):
+                try:
+                    adapter.invoke_model(f"Question {i}", max_tokens=100)
+                except TransientError:
+                    failed.append(i)
+
+        elapsed = _run_threads(16, work)
+        print(f"{name:<20} {len(failed):>6} {client.requests:>11} {client.throttled:>10} "
+              f"{elapsed * 1000:>7.0f}ms")
+
+    print()
+    print("Without retries every throttle becomes a failed request. Backoff alone")
+    print("recovers them at the cost of many rejected calls; a budget on its own")
+    print("gives up once failures dominate. The adaptive limiter paces calls to the")
+    print("quota, so few are rejected and the budget is rarely touched.")
+    print()
+    print("=" * 70)
+    print()
+
+
+def bench_invoke_batch(num_requests: int = 200, latency_ms: float = 20.0):
+    """Compare sequential and concurrent invoke_batch() against a fake high-latency client."""
+    print("=" * 70)
+    print("BENCHMARK: OptimizedInferenceAdapter.invoke_batch concurrency")
+    print("=" * 70)
+    print()
+
+    # Imported here so the other benchmarks run without boto3 installed
+    from claude_bedrock.optimized_adapter import OptimizedInferenceAdapter
+
+    requests = [{"prompt": f"Question {i}", "max_tokens": 100} for i in range(num_requests)]
+    expected = [f"answer to {request['prompt']}" for request in requests]
+
+    print(f"{num_requests} requests, {latency_ms:.0f}ms simulated latency per call")
+    print(f"{'mode':<22} {'concurrency':>11} {'total':>10} {'first result':>13} {'speedup':>8}")
+    baseline = None
+    with tempfile.TemporaryDirectory() as tmp:
+        for batching, concurrency in ((False, 1), (False, 8), (False, 32), (True, 8)):
+            config_path = Path(tmp) / "performance.json"
+            config_path.write_text(json.dumps({
+                "predictionCache": {"enabled": False},
+                "batching": {
+                    "enabled": batching,
+                    "maxWaitTime": 5,
+                    "maxConcurrency": concurrency
+                }
+            }))
+            adapter = OptimizedInferenceAdapter(
+                enable_cache=False,
+                enable_batching=batching,
+                config_path=str(config_path)
+            )
+            adapter.bedrock_runtime = FakeBedrockClient(latency_ms / 1000.0)
+
+            start = time.perf_counter()
+            results = adapter.invoke_batch(requests)
+            elapsed = time.perf_counter() - start
+            assert results == expected
+
+            start = time.perf_counter()
+            completed = adapter.invoke_batch_as_completed(requests)
+            next(completed)
+            first = time.perf_counter() - start
+            for _ in completed:
+                pass
+
+            if adapter.batcher:
+                adapter.batcher.close()
+            baseline = baseline or elapsed
+            mode = "batcher" if batching else "direct"
+            print(f"{mode:<22} {concurrency:>11} {elapsed * 1000:>8.0f}ms "
+                  f"{first * 1000:>11.1f}ms {baseline / elapsed:>7.1f}x")
+
+    print()
+    print("Results keep request order. Called directly, invoke_batch_as_completed()")
+    print("hands back the first response after about one call's latency; through")
+    print("the batcher, responses complete a whole batch at a time.")
+    print()
+    print("=" * 70)
+    print()
+
+
+def bench_async_fanout(num_requests: int = 200, latency_ms: float = 50.0):
+    """Drive many streams from one event loop with AsyncInferenceAdapter."""
+    print("=" * 70)
+    print("BENCHMARK: AsyncInferenceAdapter fan-out")
+    print("=" * 70)
+    print()
+
+    # Imported here so the other benchmarks run without boto3 installed
+    from claude_bedrock.async_adapter import AsyncInferenceAdapter
+
+    requests = [{"prompt": f"Question {i}", "max_tokens": 100} for i in range(num_requests)]
+    expected = [f"answer to {request['prompt']}" for request in requests]
+
+    async def heartbeat(stop):
+        # Largest gap between loop iterations: how long the loop was blocked
+        worst = 0.0
+        last = time.perf_counter()
+        while not stop.is_set():
+            await asyncio.sleep(0.001)
+            now = time.perf_counter()
+            worst = max(worst, now - last)
+            last = now
+        return worst
+
+    async def run(adapter):
+        stop = asyncio.Event()
+        monitor = asyncio.create_task(heartbeat(stop))
+        start = time.perf_counter()
+        results = await adapter.ainvoke_many(requests)
+        elapsed = time.perf_counter() - start
+        stop.set()
+        assert results == expected
+        return elapsed, await monitor
+
+    print(f"{num_requests} streams, {latency_ms:.0f}ms simulated latency, 5ms between chunks")
+    print(f"{'max_concurrency':>15} {'total':>10} {'peak in flight':>15} {'worst loop stall':>17}")
+    for max_concurrency in (1, 16, 64):
+        adapter = AsyncInferenceAdapter(max_concurrency=max_concurrency)
+        client = FakeBedrockClient(latency_ms / 1000.0, chunk_delay_s=0.005)
+        adapter.bedrock_runtime = client
+        elapsed, stall = asyncio.run(run(adapter))
+        adapter.close()
+        print(f"{max_concurrency:>15} {elapsed * 1000:>8.0f}ms {client.peak_in_flight:>15} "
+              f"{stall * 1000:>15.1f}ms")
+
+    print()
+    print("Stream reads run on worker threads, so the event loop keeps serving")
+    print("other tasks while up to max_concurrency streams are in flight.")
+    print()
+    print("=" * 70)
+    print()
+
+
+def bench_client_reuse(num_adapters: int = 20):
+    """Compare adapter construction with a new boto3 client each time vs the shared registry."""
+    print("=" * 70)
+    print("BENCHMARK: Shared AWS client registry")
+    print("=" * 70)
+    print()
+
+    # Imported here so the other benchmarks run without boto3 installed
+    import boto3
+    from claude_bedrock.inference_adapter import InferenceAdapter
+    from claude_bedrock.s3_adapter import S3Adapter
+
+    # Warm both sessions' service model caches so only per-client work is timed
+    boto3.client('bedrock-runtime', region_name='us-east-1')
+    boto3.client('s3', region_name='us-east-1')
+    InferenceAdapter(), S3Adapter()
+
+    start = time.perf_counter()
+    for _ in range(num_adapters):
+        boto3.client('bedrock-runtime', region_name='us-east-1')
+        boto3.client('s3', region_name='us-east-1')
+    fresh = time.perf_counter() - start
+
+    start = time.perf_counter()
+    adapters = [(InferenceAdapter(), S3Adapter()) for _ in range(num_adapters)]
+    shared = time.perf_counter() - start
+    clients = {id(client) for inference, s3 in adapters
+               for client in (inference.bedrock_runtime, s3.s3_client)}
+
+    print(f"{num_adapters} Bedrock + S3 adapter pairs (e.g. one per Lambda invocation):")
+    print(f"  New clients each time: {fresh * 1000:8.1f}ms  ({2 * num_adapters} clients, "
+          f"{2 * num_adapters} connection pools)")
+    print(f"  Shared registry:       {shared * 1000:8.1f}ms  ({len(clients)} clients)")
+    print()
+    print("Shared clients also keep their pooled TLS connections warm, which this")
+    print("offline benchmark cannot show: each new client starts with an empty pool.")
+    print()
+    print("=" * 70)
+    print()
+
+
+BENCHMARKS = {
+    "cache_contention": bench_cache_contention,
+    "policy_hit_ratio": bench_policy_hit_ratio,
+    "cache_keys": bench_cache_keys,
+    "snapshot_load": bench_snapshot_load,
+    "batcher": bench_batcher,
+    "batcher_lanes": bench_batcher_lanes,
+    "invoke_batch": bench_invoke_batch,
+    "async_fanout": bench_async_fanout,
+    "retry_throttling": bench_retry_throttling,
+    "client_reuse": bench_client_reuse,
+}
+
+
+def main():
+    """Run the selected benchmarks."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "benchmarks",
+        nargs="*",
+        help=f"Benchmarks to run (default: all). Available: {', '.join(BENCHMARKS)}"
+    )
+    args = parser.parse_args()
+
+    unknown = [name for name in args.benchmarks if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmark(s): {', '.join(unknown)}")
+
+    for name in args.benchmarks or BENCHMARKS:
+        BENCHMARKS[name]()
+
+
+if __name__ == "__main__":
+    main()
@@ -5,9 +5,12 @@ Claude Bedrock Integration
 Utilities for invoking Claude models via AWS Bedrock and working with S3.
 """
 
-from .inference_adapter import InferenceAdapter
+from .inference_adapter import InferenceAdapter, text_block
+from .async_adapter import AsyncInferenceAdapter
 from .s3_adapter import S3Adapter
 from .optimized_adapter import OptimizedInferenceAdapter
+from .retry import TransientError
 
-__all__ = ['InferenceAdapter', 'S3Adapter', 'OptimizedInferenceAdapter']
+__all__ = ['InferenceAdapter', 'AsyncInferenceAdapter', 'S3Adapter', 'OptimizedInferenceAdapter', 'TransientError',
+           'text_block']
 __version__ = '1.0.0'
@@ -0,0 +1,243 @@
+"""
+asyncio Bedrock Inference Adapter
+=================================
+
+Event-loop friendly counterpart of InferenceAdapter for driving many
+generations from one process.
+
+boto3 has no asyncio API, so each stream is read by a worker thread that
+hands chunks to the event loop as they arrive; the loop itself never blocks
+on the network. At most max_concurrency streams are open at once: further
+calls wait on a semaphore without holding a thread.
+
+Usage:
+    from claude_bedrock import AsyncInferenceAdapter
+
+    adapter = AsyncInferenceAdapter(max_concurrency=32)
+
+    async def main():
+        async for chunk in adapter.astream("Hello, Claude!"):
+            print(chunk, end='', flush=True)
+
+        answer = await adapter.ainvoke("What is 2+2?")
+        answers = await adapter.ainvoke_many([
+            {"prompt": "Question 1", "max_tokens": 100},
+            {"prompt": "Question 2", "max_tokens": 100}
+        ])
+"""
+
+import asyncio
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from .inference_adapter import InferenceAdapter, Prompt
+from .retry import RetryPolicy
+
+# Queue markers posted by the stream reader thread
+_DONE = object()
+_ERROR = object()
+
+
+class AsyncInferenceAdapter(InferenceAdapter):
+    """
+    InferenceAdapter with asyncio streaming and bounded fan-out.
+
+    Features:
+    - astream(): async iterator over response text chunks
+    - ainvoke(): awaitable complete response
+    - ainvoke_many(): concurrent requests with results in request order
+    - At most max_concurrency Bedrock streams in flight; a dedicated thread
+      pool reads them so the loop's default executor is left alone
+    """
+
+    def __init__(
+        self,
+        region_name: str = 'us-east-1',
+        model_id: Optional[str] = None,
+        max_concurrency: int = 16,
+        retry_policy: Optional[RetryPolicy] = None,
+        client_options: Optional[Dict[str, Any]] = None
+    ):
+        """
+        Initialize the async inference adapter.
+
+        Args:
+            region_name: AWS region name (default: 'us-east-1')
+            model_id: Claude model ID (default: Claude Haiku 4.5)
+            max_concurrency: Maximum number of streams in flight. Keep it at
+                or below the client's max_pool_connections (registry
+                default: 50), or the extra streams queue for a connection.
+            retry_policy: Retry policy for model calls (default: see
+                InferenceAdapter). Backoff sleeps happen on the reader
+                thread, never on the event loop.
+            client_options: botocore Config arguments overriding the
+                registry defaults (see claude_bedrock.clients)
+        """
+        super().__init__(region_name, model_id, retry_policy, client_options)
+        self.max_concurrency = max(1, max_concurrency)
+        self.executor = ThreadPoolExecutor(
+            max_workers=self.max_concurrency,
+            thread_name_prefix="bedrock-stream"
+        )
+        # asyncio.Semaphore belongs to one loop, so keep one per loop
+        self.semaphores: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+        self.lock = threading.Lock()
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        with self.lock:
+            semaphore = self.semaphores.get(loop)
+            if semaphore is None:
+                semaphore = self.semaphores[loop] = asyncio.Semaphore(self.max_concurrency)
+            return semaphore
+
+    def _read_stream(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        queue: asyncio.Queue,
+        stop: threading.Event,
+        prompt: Prompt,
+        max_tokens: int,
+        temperature: float
+    ) -> None:
+        """Worker thread: read a blocking stream and post its chunks to the loop."""
+        def post(kind: Any, value: Any = None) -> None:
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, (kind, value))
+            except RuntimeError:
+                # The loop was closed while the stream was being read
+                stop.set()
+
+        stream = self.invoke_model_with_response_stream(prompt, max_tokens, temperature)
+        try:
+            for chunk in stream:
+                if stop.is_set():
+                    break
+                post(None, chunk)
+        except Exception as e:
+            post(_ERROR, e)
+        finally:
+            stream.close()
+            post(_DONE)
+
+    async def astream(
+        self,
+        prompt: Prompt,
+        max_tokens: int = 1000,
+        temperature: float = 0.0
+    ) -> AsyncIterator[Optional[str]]:
+        """
+        Invoke Claude model with a streaming response, asynchronously.
+
+        Like invoke_model_with_response_stream(), a rejected request is
+        printed and yields a single None, and throttling or unavailability
+        that persists raises TransientError. Leaving the loop early stops the
+        underlying stream once its next chunk arrives; wrap the iterator in
+        contextlib.aclosing() to release its slot immediately.
+
+        Args:
+            prompt: The user prompt to send to Claude, as text or a list of
+                content blocks (see text_block())
+            max_tokens: Maximum tokens to generate (default: 1000)
+            temperature: Sampling temperature 0.0-1.0 (default: 0.0)
+
+        Yields:
+            str: Text chunks as they are generated by Claude
+
+        Example:
+            >>> async for chunk in adapter.astream("Hello!"):
+            ...     print(chunk, end='', flush=True)
+        """
+        async with self._semaphore():
+            loop = asyncio.get_running_loop()
+            queue: asyncio.Queue = asyncio.Queue()
+            stop = threading.Event()
+            loop.run_in_executor(
+                self.executor, self._read_stream,
+                loop, queue, stop, prompt, max_tokens, temperature
+            )
+            try:
+                while True:
+                    kind, value = await queue.get()
+                    if kind is _DONE:
+                        break
+                    if kind is _ERROR:
+                        raise value
+                    yield value
+            finally:
+                stop.set()
+
+    async def ainvoke(
+        self,
+        prompt: Prompt,
+        max_tokens: int = 1000,
+        temperature: float = 0.0
+    ) -> Optional[str]:
+        """
+        Invoke Claude model and return the complete response, asynchronously.
+
+        Args:
+            prompt: The user prompt to send to Claude, as text or a list of
+                content blocks (see text_block())
+            max_tokens: Maximum tokens to generate (default: 1000)
+            temperature: Sampling temperature 0.0-1.0 (default: 0.0)
+
+        Returns:
+            str: Complete response from Claude, or None if the request
+                was rejected (e.g. a validation error)
+
+        Raises:
+            TransientError: Throttling or unavailability that persisted
+
+        Example:
+            >>> response = await adapter.ainvoke("What is 2+2?")
+        """
+        chunks = []
+        async for chunk in self.astream(prompt, max_tokens, temperature):
+            if chunk is None:
+                return None
+            chunks.append(chunk)
+        return ''.join(chunks)
+
+    async def ainvoke_many(self, requests: List[Dict[str, Any]]) -> List[Optional[str]]:
+        """
+        Invoke Claude model for many prompts concurrently.
+
+        All requests are started at once and run max_concurrency at a time.
+        A request that fails returns None without affecting the others.
+
+        Args:
+            requests: List of request dictionaries with keys:
+                     - prompt: str (required)
+                     - max_tokens: int (optional, default: 1000)
+                     - temperature: float (optional, default: 0.0)
+
+        Returns:
+            List of responses, in the order of requests
+
+        Example:
+            >>> results = await adapter.ainvoke_many([
+            ...     {"prompt": "What is AI?", "max_tokens": 100},
+            ...     {"prompt": "What is ML?", "max_tokens": 100}
+            ... ])
+        """
+        async def invoke(request: Dict[str, Any]) -> Optional[str]:
+            if not request.get("prompt"):
+                return None
+            try:
+                return await self.ainvoke(
+                    request["prompt"],
+                    request.get("max_tokens", 1000),
+                    request.get("temperature", 0.0)
+                )
+            except Exception as e:
+                print(f"Error invoking request: {e}")
+                return None
+
+        return list(await asyncio.gather(*[invoke(request) for request in requests]))
+
+    def close(self) -> None:
+        """Shut down the stream reader threads once open streams finish."""
+        self.executor.shutdown(wait=False)
@@ -0,0 +1,153 @@
+"""
+Shared AWS Clients
+==================
+
+Process-wide registry of boto3 clients, so every adapter in a process (and
+every warm Lambda invocation) reuses the same connection pools instead of
+opening new TLS connections.
+
+Clients are keyed by (service, region, client options) and created with
+tuned defaults: a larger connection pool, TCP keepalive, explicit
+connect/read timeouts and botocore's adaptive retry mode. boto3 clients are
+thread-safe, so one client can serve all threads.
+
+Usage:
+    from claude_bedrock.clients import get_client
+
+    s3 = get_client('s3', 'us-east-1')
+    bedrock = get_client('bedrock-runtime', 'us-east-1', read_timeout=120)
+"""
+
+import copy
+import json
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+import boto3
+from botocore.config import Config
+
+# botocore Config arguments applied to every client unless overridden
+DEFAULT_CLIENT_OPTIONS: Dict[str, Any] = {
+    # botocore's default of 10 is below the adapters' concurrency limits
+    "max_pool_connections": 50,
+    "tcp_keepalive": True,
+    "connect_timeout": 5,
+    # Bedrock streams can pause between chunks on long generations
+    "read_timeout": 60,
+    "retries": {"mode": "adaptive", "total_max_attempts": 3},
+}
+
+
+class ClientRegistry:
+    """
+    Thread-safe cache of boto3 clients.
+
+    Features:
+    - One client per (service, region, options), created on first use
+    - Options are botocore Config arguments layered over
+      DEFAULT_CLIENT_OPTIONS
+    - Clients are built from a private session under a lock, since boto3
+      sessions (unlike clients) are not thread-safe
+    """
+
+    def __init__(self, defaults: Optional[Dict[str, Any]] = None):
+        """
+        Initialize the registry.
+
+        Args:
+            defaults: Config arguments applied to every client (defaults to
+                DEFAULT_CLIENT_OPTIONS)
+        """
+        self.defaults = dict(DEFAULT_CLIENT_OPTIONS if defaults is None else defaults)
+        self.clients: Dict[Tuple[str, str, str], Any] = {}
+        self.session: Optional[boto3.session.Session] = None
+        self.lock = threading.Lock()
+
+    def get(self, service_name: str, region_name: str = 'us-east-1', **options: Any) -> Any:
+        """
+        Get the shared client for a service, region and options.
+
+        Args:
+            service_name: AWS service name, e.g. 'bedrock-runtime' or 's3'
+            region_name: AWS region name
+            **options: botocore Config arguments overriding the defaults,
+                e.g. max_pool_connections=100 or retries={...}
+
+        Returns:
+            boto3 client
+        """
+        merged = {**self.defaults, **options}
+        # Options may contain dicts (retries), so key on their JSON form
+        key = (service_name, region_name, json.dumps(merged, sort_keys=True))
+
+        with self.lock:
+            client = self.clients.get(key)
+            if client is None:
+                if self.session is None:
+                    self.session = boto3.session.Session()
+                client = self.clients[key] = self.session.client(
+                    service_name,
+                    region_name=region_name,
+                    config=Config(**copy.deepcopy(merged))
+                )
+            return client
+
+    def size(self) -> int:
+        """Get the number of clients created."""
+        with self.lock:
+            return len(self.clients)
+
+    def clear(self) -> None:
+        """Drop all clients (e.g. after credentials change); new ones are created on demand."""
+        with self.lock:
+            self.clients.clear()
+            self.session = None
+
+
+def client_options_from_config(clients_config: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Translate the clients section of performance.json into Config arguments.
+
+    Args:
+        clients_config: Dictionary with maxPoolConnections, tcpKeepalive,
+            connectTimeout, readTimeout, retryMode and maxAttempts (all
+            optional; missing keys keep the registry defaults)
+
+    Returns:
+        Keyword arguments for get_client()
+    """
+    options: Dict[str, Any] = {}
+    for key, option in (
+        ("maxPoolConnections", "max_pool_connections"),
+        ("tcpKeepalive", "tcp_keepalive"),
+        ("connectTimeout", "connect_timeout"),
+        ("readTimeout", "read_timeout"),
+    ):
+        if key in clients_config:
+            options[option] = clients_config[key]
+    if "retryMode" in clients_config or "maxAttempts" in clients_config:
+        retries = DEFAULT_CLIENT_OPTIONS["retries"]
+        options["retries"] = {
+            "mode": clients_config.get("retryMode", retries["mode"]),
+            "total_max_attempts": clients_config.get("maxAttempts", retries["total_max_attempts"]),
+        }
+    return options
+
+
+# Process-wide registry used by the adapters
+registry = ClientRegistry()
+
+
+def get_client(service_name: str, region_name: str = 'us-east-1', **options: Any) -> Any:
+    """
+    Get a shared client from the process-wide registry.
+
+    Args:
+        service_name: AWS service name, e.g. 'bedrock-runtime' or 's3'
+        region_name: AWS region name
+        **options: botocore Config arguments overriding DEFAULT_CLIENT_OPTIONS
+
+    Returns:
+        boto3 client
+    """
+    return registry.get(service_name, region_name, **options)
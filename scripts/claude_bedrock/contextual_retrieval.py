@@ -0,0 +1,113 @@
+"""
+Contextual Retrieval Prompts
+============================
+
+Prompt templates and helpers shared by the contextual retrieval Lambda
+handlers, which ask Claude for a short context situating each chunk of a
+document within the whole document.
+
+This implements the "Contextual Retrieval" technique described in:
+https://www.anthropic.com/news/contextual-retrieval
+
+Usage:
+    from claude_bedrock import InferenceAdapter
+    from claude_bedrock.contextual_retrieval import (
+        build_document_block, build_prompt, contextualize, token_usage_since
+    )
+
+    adapter = InferenceAdapter()
+    usage_at_start = adapter.get_token_usage()
+
+    document_block = build_document_block(document_text)
+    for chunk in chunks:
+        context = adapter.invoke_model(build_prompt(document_block, chunk), max_tokens=500)
+        enriched = contextualize(context, chunk)
+
+    print(token_usage_since(adapter, usage_at_start))
+"""
+
+from typing import Any, Dict, List, Optional
+
+from .inference_adapter import InferenceAdapter, text_block
+
+# Prompt templates for generating contextual information. The document
+# block comes first and is identical for every chunk of a file, so it is
+# sent as a separate content block marked for Bedrock prompt caching: the
+# first chunk writes it to the cache and the others read it from there.
+DOCUMENT_PROMPT = """
+<document>
+{doc_content}
+</document>
+"""
+
+CHUNK_PROMPT = """
+Here is the chunk we want to situate within the whole document
+<chunk>
+{chunk_content}
+</chunk>
+
+Please give a short succinct context to situate this chunk within the overall document for the purposes of improving search retrieval of the chunk.
+Answer only with the succinct context and nothing else.
+"""
+
+# Bump whenever DOCUMENT_PROMPT or CHUNK_PROMPT changes so cached contexts
+# generated from the old templates are not reused
+PROMPT_VERSION = "2"
+
+
+def build_document_block(doc_content: str) -> Dict[str, Any]:
+    """Build the document block shared by all chunks of a file, once per file."""
+    return text_block(DOCUMENT_PROMPT.format(doc_content=doc_content), cache=True)
+
+
+def build_prompt(document_block: Dict[str, Any], chunk_content: str) -> List[Dict[str, Any]]:
+    """
+    Build the content blocks for one chunk.
+
+    Args:
+        document_block: Cacheable document block from build_document_block()
+        chunk_content: Text of the chunk to situate
+
+    Returns:
+        List of content blocks: the shared document prefix, then the chunk
+    """
+    return [document_block, text_block(CHUNK_PROMPT.format(chunk_content=chunk_content))]
+
+
+def contextualize(chunk_context: Optional[str], chunk_content: str) -> str:
+    """
+    Prepend a generated context to its chunk.
+
+    Args:
+        chunk_context: Context generated for the chunk, or None/empty if
+            the request was rejected
+        chunk_content: Text of the chunk
+
+    Returns:
+        The chunk with its context, or the chunk unchanged without one
+    """
+    if not chunk_context:
+        return chunk_content
+    return chunk_context + "\n\n" + chunk_content
+
+
+def token_usage_since(
+    adapter: InferenceAdapter,
+    usage_at_start: Dict[str, int]
+) -> Dict[str, int]:
+    """
+    Get the token usage of the calls made since a snapshot.
+
+    The adapter's token counts span warm invocations; this reports one
+    invocation's. Once the first chunk of each document has written the
+    prompt cache, cache_read_input_tokens should dominate.
+
+    Args:
+        adapter: Adapter the calls were made with
+        usage_at_start: adapter.get_token_usage() taken before the calls
+
+    Returns:
+        Dictionary of token counts by field (USAGE_FIELDS)
+    """
+    usage_at_end = adapter.get_token_usage()
+    return {field: usage_at_end[field] - usage_at_start[field] for field in usage_at_end}
@@ -5,60 +5,163 @@ AWS Bedrock Inference Adapter for Claude Models
 This module provides a simple interface for invoking Claude models via AWS Bedrock
 with streaming response support.
 
+Prompts are plain strings or lists of content blocks. Marking a block
+with cache_control lets Bedrock cache the prompt up to and including it, so
+requests that share that prefix (e.g. the same document) skip reprocessing
+it; cache reads and writes are reported in the token usage.
+
 Usage:
-    from claude_bedrock import InferenceAdapter
+    from claude_bedrock import InferenceAdapter, text_block
 
     adapter = InferenceAdapter()
     for chunk in adapter.invoke_model_with_response_stream("Hello, Claude!"):
         print(chunk, end='', flush=True)
+
+    # Cache a shared prefix across calls
+    response = adapter.invoke_model([
+        text_block(document_text, cache=True),
+        text_block("Summarize the section about pricing.")
+    ])
+    print(adapter.get_token_usage())
 """
 
+import itertools
 import json
-import boto3
-from typing import Generator, Optional
+from threading import Lock
+from typing import Any, Dict, Generator, List, Optional, Union
 from botocore.exceptions import ClientError
 
+from .clients import get_client
+from .retry import (
+    RETRYABLE, AdaptiveRateLimiter, RetryBudget, RetryPolicy, TransientError,
+    classify_error
+)
+
+# A prompt is either text or a list of content blocks (see text_block())
+Prompt = Union[str, List[Dict[str, Any]]]
+
+# Token counts reported in the stream's message_start and message_delta events
+USAGE_FIELDS = (
+    "input_tokens",
+    "output_tokens",
+    "cache_creation_input_tokens",
+    "cache_read_input_tokens",
+)
+
+
+def text_block(text: str, cache: bool = False) -> Dict[str, Any]:
+    """
+    Build a text content block.
+
+    Args:
+        text: Block text
+        cache: Add a cache_control breakpoint, so the prompt prefix ending
+            with this block is cached and reused by later requests that
+            start with the identical prefix. Prefixes shorter than the
+            model's minimum cacheable length are simply not cached.
+
+    Returns:
+        Content block for use in a prompt list
+    """
+    block: Dict[str, Any] = {"type": "text", "text": text}
+    if cache:
+        block["cache_control"] = {"type": "ephemeral"}
+    return block
+
+
+def prompt_text(prompt: Prompt) -> str:
+    """
+    Get the text of a prompt, joining the text of its content blocks.
+
+    Args:
+        prompt: Prompt string or list of content blocks
+
+    Returns:
+        Prompt text
+    """
+    if isinstance(prompt, str):
+        return prompt
+    return ''.join(block.get("text", "") for block in prompt)
+
 
 class InferenceAdapter:
     """
     Adapter for invoking Claude models via AWS Bedrock with streaming responses.
 
     Attributes:
-        bedrock_runtime: Boto3 Bedrock runtime client
+        bedrock_runtime: Boto3 Bedrock runtime client, shared with other
+            adapters using the same region and client options
         model_id: Claude model identifier for Bedrock
+        retry_policy: Retries for throttled and transient failures
+        token_usage: Token counts summed over all calls (see USAGE_FIELDS)
     """
 
-    def __init__(self, region_name: str = 'us-east-1', model_id: Optional[str] = None):
+    def __init__(
+        self,
+        region_name: str = 'us-east-1',
+        model_id: Optional[str] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        client_options: Optional[Dict[str, Any]] = None
+    ):
         """
         Initialize the InferenceAdapter.
 
         Args:
             region_name: AWS region name (default: 'us-east-1')
             model_id: Claude model ID (default: Claude Haiku 4.5)
+            retry_policy: Retry policy for model calls (default: 4 attempts
+                with a retry budget and adaptive rate limiting)
+            client_options: botocore Config arguments overriding the
+                registry defaults (see claude_bedrock.clients)
         """
-        self.bedrock_runtime = boto3.client(
-            service_name='bedrock-runtime',
-            region_name=region_name
+        # Retries are handled by retry_policy rather than botocore, so that
+        # throttles feed the shared budget and rate limiter
+        self.bedrock_runtime = get_client(
+            'bedrock-runtime',
+            region_name,
+            **{
+                'retries': {'total_max_attempts': 1, 'mode': 'standard'},
+                **(client_options or {})
+            }
         )
         self.model_id = model_id or 'anthropic.claude-haiku-4-5-20251001-v1:0'
+        self.retry_policy = retry_policy or RetryPolicy(
+            budget=RetryBudget(),
+            rate_limiter=AdaptiveRateLimiter()
+        )
+        self.token_usage = dict.fromkeys(USAGE_FIELDS, 0)
+        self.usage_lock = Lock()
 
     def invoke_model_with_response_stream(
         self,
-        prompt: str,
+        prompt: Prompt,
         max_tokens: int = 1000,
-        temperature: float = 0.0
+        temperature: float = 0.0,
+        usage: Optional[Dict[str, int]] = None
     ) -> Generator[str, None, None]:
         """
         Invoke Claude model with streaming response.
 
+        Throttling and transient errors are retried according to
+        retry_policy, including those delivered in the stream before its
+        first text. Once the policy gives up, or if one interrupts the
+        stream after text was yielded, TransientError is raised. Other
+        client errors (e.g. validation) are printed and yield None.
+
         Args:
-            prompt: The user prompt to send to Claude
+            prompt: The user prompt to send to Claude, as text or a list of
+                content blocks (see text_block())
             max_tokens: Maximum tokens to generate (default: 1000)
             temperature: Sampling temperature 0.0-1.0 (default: 0.0)
+            usage: Dictionary updated with this call's token usage
+                (USAGE_FIELDS), including prompt cache reads and writes
 
         Yields:
             str: Text chunks as they are generated by Claude
 
+        Raises:
+            TransientError: Throttling or unavailability that persisted
+
         Example:
             >>> adapter = InferenceAdapter()
             >>> for chunk in adapter.invoke_model_with_response_stream("Hello!"):
@@ -76,43 +179,101 @@ class InferenceAdapter:
             "temperature": temperature,
         })
 
-        # Invoke the model
-        try:
+        def open_stream():
+            # Read up to the first text (or the end of the message), so a
+            # throttle delivered as the stream's first event is retried
+            # like one raised by the call itself
             response = self.bedrock_runtime.invoke_model_with_response_stream(
                 modelId=self.model_id,
                 contentType='application/json',
                 accept='application/json',
                 body=request_body
             )
+            events = iter(response.get('body'))
+            head = []
+            for event in events:
+                head.append(event)
+                if json.loads(event['chunk']['bytes'].decode())['type'] != 'message_start':
+                    break
+            return head, events
+
+        # Invoke the model
+        try:
+            head, events = self.retry_policy.call(open_stream)
 
-            for event in response.get('body'):
-                chunk = json.loads(event['chunk']['bytes'].decode())
-                if chunk['type'] == 'content_block_delta':
-                    yield chunk['delta']['text']
-                elif chunk['type'] == 'message_delta':
-                    if 'stop_reason' in chunk['delta']:
-                        break
+            call_usage: Dict[str, int] = {}
+            try:
+                for event in itertools.chain(head, events):
+                    chunk = json.loads(event['chunk']['bytes'].decode())
+                    if chunk['type'] == 'content_block_delta':
+                        yield chunk['delta']['text']
+                    elif chunk['type'] == 'message_start':
+                        call_usage.update(chunk['message'].get('usage', {}))
+                    elif chunk['type'] == 'message_delta':
+                        # Carries the final (cumulative) output token count
+                        call_usage.update(chunk.get('usage', {}))
+                        if 'stop_reason' in chunk['delta']:
+                            break
+            finally:
+                self._record_usage(call_usage, usage)
 
-        except ClientError as e:
+        except Exception as e:
+            error_class = classify_error(e)
+            if error_class in RETRYABLE:
+                raise TransientError(e, error_class) from e
+            if not isinstance(e, ClientError):
+                raise
             print(f"An error occurred: {e}")
             yield None
 
+    def _record_usage(
+        self,
+        call_usage: Dict[str, int],
+        usage: Optional[Dict[str, int]]
+    ) -> None:
+        """Add one call's token usage to the totals and the caller's dictionary."""
+        counts = {field: call_usage.get(field) or 0 for field in USAGE_FIELDS}
+        if usage is not None:
+            usage.update(counts)
+        with self.usage_lock:
+            for field, count in counts.items():
+                self.token_usage[field] += count
+
+    def get_token_usage(self) -> Dict[str, int]:
+        """
+        Get token usage summed over all calls.
+
+        Returns:
+            Dictionary with input_tokens (uncached input only),
+            output_tokens, cache_creation_input_tokens (written to the
+            prompt cache) and cache_read_input_tokens (served from it)
+        """
+        with self.usage_lock:
+            return dict(self.token_usage)
+
     def invoke_model(
         self,
-        prompt: str,
+        prompt: Prompt,
         max_tokens: int = 1000,
-        temperature: float = 0.0
+        temperature: float = 0.0,
+        usage: Optional[Dict[str, int]] = None
     ) -> Optional[str]:
         """
         Invoke Claude model and return the complete response.
 
         Args:
-            prompt: The user prompt to send to Claude
+            prompt: The user prompt to send to Claude, as text or a list of
+                content blocks (see text_block())
             max_tokens: Maximum tokens to generate (default: 1000)
             temperature: Sampling temperature 0.0-1.0 (default: 0.0)
+            usage: Dictionary updated with this call's token usage
 
         Returns:
-            str: Complete response from Claude, or None if error occurs
+            str: Complete response from Claude, or None if the request
+                was rejected (e.g. a validation error)
+
+        Raises:
+            TransientError: Throttling or unavailability that persisted
 
         Example:
             >>> adapter = InferenceAdapter()
@@ -120,7 +281,7 @@ class InferenceAdapter:
             >>> print(response)
         """
         chunks = []
-        for chunk in self.invoke_model_with_response_stream(prompt, max_tokens, temperature):
+        for chunk in self.invoke_model_with_response_stream(prompt, max_tokens, temperature, usage):
             if chunk is not None:
                 chunks.append(chunk)
             else:
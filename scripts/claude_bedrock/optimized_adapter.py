@@ -18,17 +18,26 @@ Usage:
         {"prompt": "Question 1", "max_tokens": 100},
         {"prompt": "Question 2", "max_tokens": 100}
     ])
+
+    # Handle results as soon as each one is ready
+    for index, result in adapter.invoke_batch_as_completed(requests):
+        print(index, result)
 """
 
+import json
 import sys
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from threading import Lock
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Sequence, Tuple, Union
 
 # Add parent directory to path to import performance module
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from .inference_adapter import InferenceAdapter
-from performance import PerformanceOptimizer
+from .clients import client_options_from_config
+from .inference_adapter import InferenceAdapter, Prompt, prompt_text
+from .retry import AdaptiveRateLimiter, RetryBudget, RetryPolicy
+from performance import PerformanceOptimizer, QueueFullError
 
 
 class OptimizedInferenceAdapter(InferenceAdapter):
@@ -36,8 +45,16 @@ class OptimizedInferenceAdapter(InferenceAdapter):
     Extended InferenceAdapter with performance optimizations.
 
     Features:
-    - Prediction caching with TTL
-    - Request batching for throughput
+    - Prediction caching with TTL, per-entry TTL overrides and tag-based
+      invalidation
+    - Optional near-duplicate (SimHash) cache for prompts that differ only
+      by whitespace, page numbers or OCR noise
+    - Request batching: concurrent invoke_batch() calls share batches, and
+      identical requests within a batch are sent to the model once
+    - Concurrent invocation: the requests of a batch are sent to Bedrock in
+      parallel, up to batching.maxConcurrency at a time
+    - Throttling-aware retries, retry budget and adaptive rate limiting
+      configured from the retry section of performance.json
     - Configurable optimization settings
     """
 
@@ -59,28 +76,96 @@ class OptimizedInferenceAdapter(InferenceAdapter):
             enable_batching: Enable request batching
             config_path: Path to performance.json config
         """
-        super().__init__(region_name, model_id)
-
         # Initialize performance optimizer
         self.optimizer = PerformanceOptimizer(config_path)
+
+        # Client settings from performance.json; other adapters (e.g. an
+        # S3Adapter) can reuse them to share the same pooled clients
+        self.client_options = client_options_from_config(
+            self.optimizer.get_config("clients", {})
+        )
+        # Bedrock calls are retried by the retry policy, not botocore
+        bedrock_options = {
+            key: value for key, value in self.client_options.items() if key != "retries"
+        }
+        super().__init__(
+            region_name,
+            model_id,
+            self._build_retry_policy(self.optimizer.get_config("retry", {})),
+            bedrock_options
+        )
         self.cache_enabled = enable_cache and self.optimizer.cache_enabled
         self.batching_enabled = enable_batching and self.optimizer.batching_enabled
+        # Bedrock calls are I/O bound, so a batch's requests run on a shared
+        # thread pool (created on first use)
+        self.max_concurrency = max(1, self.optimizer.get_config("batching.maxConcurrency", 1))
+        self.executor: Optional[ThreadPoolExecutor] = None
+        self.executor_lock = Lock()
+
+        if self.batching_enabled:
+            # A batcher of its own, configured like the optimizer's, so
+            # requests other code adds to optimizer.batcher never reach Bedrock
+            self.batcher = self.optimizer.create_batcher(processor=self._process_batch)
+        else:
+            self.batcher = None
+
+    @staticmethod
+    def _build_retry_policy(retry_config: Dict[str, Any]) -> RetryPolicy:
+        """Build the retry policy from the retry section of performance.json."""
+        budget_config = retry_config.get("budget", {})
+        limiter_config = retry_config.get("rateLimiter", {})
+        return RetryPolicy(
+            max_attempts=retry_config.get("maxAttempts", 4),
+            base_delay_ms=retry_config.get("baseDelay", 100),
+            max_delay_ms=retry_config.get("maxDelay", 5000),
+            budget=RetryBudget(
+                max_tokens=budget_config.get("maxTokens", 100),
+                token_ratio=budget_config.get("tokenRatio", 0.1)
+            ) if budget_config.get("enabled", True) else None,
+            rate_limiter=AdaptiveRateLimiter(
+                min_rate=limiter_config.get("minRate", 0.5),
+                max_rate=limiter_config.get("maxRate"),
+                decrease_factor=limiter_config.get("decreaseFactor", 0.7),
+                recovery_rate=limiter_config.get("recoveryRate", 0.1)
+            ) if limiter_config.get("enabled", True) else None
+        )
 
     def invoke_model_cached(
         self,
-        prompt: str,
+        prompt: Prompt,
         max_tokens: int = 1000,
         temperature: float = 0.0,
-        force_refresh: bool = False
+        force_refresh: bool = False,
+        similarity_parts: Optional[Sequence[Union[str, int]]] = None,
+        cache_key: Optional[tuple] = None,
+        ttl_ms: Optional[float] = None,
+        tags: Optional[Iterable[str]] = None
     ) -> Optional[str]:
         """
         Invoke model with caching support.
 
+        On an exact cache miss, the near-duplicate cache (if enabled in
+        performance.json) is consulted before calling the model.
+
         Args:
-            prompt: The user prompt
+            prompt: The user prompt, as text or a list of content blocks
+                (see text_block())
             max_tokens: Maximum tokens to generate
             temperature: Sampling temperature
             force_refresh: Force cache refresh
+            similarity_parts: Texts (or precomputed signatures from
+                similarity_signature()) that must all be near-duplicates for a
+                near hit. Defaults to the whole prompt text; pass e.g. the chunk and
+                its document so that different chunks of one document never
+                match each other.
+            cache_key: Composite key identifying the request, e.g. a tuple of
+                pre-computed content digests, template version and generation
+                parameters. Defaults to the prompt plus parameters, which
+                hashes the full prompt on every call.
+            ttl_ms: Time-to-live for a freshly generated response (cache-wide
+                TTL if None)
+            tags: Tags for a freshly generated response, e.g.
+                ("doc:<digest>", "model:<id>"), for use with invalidate_tag()
 
         Returns:
             Model response (cached or fresh)
@@ -95,32 +180,106 @@ class OptimizedInferenceAdapter(InferenceAdapter):
         if not self.cache_enabled:
             return self.invoke_model(prompt, max_tokens, temperature)
 
-        # Create cache key from prompt and parameters
-        cache_key = f"{prompt}|{max_tokens}|{temperature}|{self.model_id}"
+        # Create a composite cache key from prompt and parameters
+        if cache_key is None:
+            cache_key = (prompt, max_tokens, temperature, self.model_id)
+
+        if tags is not None:
+            tags = tuple(tags)
+
+        compute_fn = lambda: self.invoke_model(prompt, max_tokens, temperature)
+        if self.optimizer.similarity_cache:
+            compute_fn = self._with_similarity_cache(
+                compute_fn,
+                similarity_parts or (prompt_text(prompt),),
+                f"{max_tokens}|{temperature}|{self.model_id}",
+                force_refresh,
+                ttl_ms,
+                tags
+            )
 
         return self.optimizer.get_cached_or_compute(
             key=cache_key,
-            compute_fn=lambda: self.invoke_model(prompt, max_tokens, temperature),
-            force_refresh=force_refresh
+            compute_fn=compute_fn,
+            force_refresh=force_refresh,
+            ttl_ms=ttl_ms,
+            tags=tags
         )
 
+    def similarity_signature(self, text: str) -> Optional[int]:
+        """
+        Precompute a near-duplicate signature for reuse across calls.
+
+        Args:
+            text: Text to sign (e.g. a whole document shared by many chunks)
+
+        Returns:
+            Signature, or None if the near-duplicate cache is disabled
+        """
+        if not self.optimizer.similarity_cache:
+            return None
+        return self.optimizer.similarity_cache.signature(text)
+
+    def _with_similarity_cache(
+        self,
+        compute_fn,
+        parts: Sequence[Union[str, int]],
+        namespace: str,
+        force_refresh: bool,
+        ttl_ms: Optional[float] = None,
+        tags: Optional[Sequence[str]] = None
+    ):
+        """Wrap compute_fn so exact misses try a near-duplicate hit first."""
+        similarity_cache = self.optimizer.similarity_cache
+
+        def compute():
+            signatures = [
+                part if isinstance(part, int) else similarity_cache.signature(part)
+                for part in parts
+            ]
+            if not force_refresh:
+                near = similarity_cache.get(signatures, namespace)
+                if near is not None:
+                    return near
+
+            result = compute_fn()
+            if result is not None:
+                similarity_cache.set(signatures, namespace, result, ttl_ms, tags)
+            return result
+
+        return compute
+
     def invoke_batch(
         self,
         requests: List[Dict[str, Any]],
-        use_cache: bool = True
+        use_cache: bool = True,
+        lane: Optional[str] = None,
+        deadline_ms: Optional[float] = None
     ) -> List[Optional[str]]:
         """
         Invoke model for multiple prompts in batch.
 
+        With batching enabled, requests are queued on the adapter's batcher
+        and share batches with concurrent invoke_batch() calls from other
+        threads; otherwise they are submitted to the adapter's thread pool
+        directly. Either way up to batching.maxConcurrency requests are sent
+        to the model at once, each going through the cache, and a request
+        that fails returns None without affecting the others.
+
         Args:
             requests: List of request dictionaries with keys:
-                     - prompt: str (required)
+                     - prompt: str or list of content blocks (required)
                      - max_tokens: int (optional, default: 1000)
                      - temperature: float (optional, default: 0.0)
             use_cache: Use caching for individual requests
+            lane: Batching priority lane from batching.lanes, e.g. "bulk"
+                for backfills (default: the first, highest-priority lane)
+            deadline_ms: Time budget per request in milliseconds; requests
+                that cannot start in time return None, as do requests the
+                batcher rejects or sheds while its queue is full
 
         Returns:
-            List of model responses
+            List of model responses, in the order of requests
 
         Example:
             >>> adapter = OptimizedInferenceAdapter()
@@ -130,29 +289,128 @@ class OptimizedInferenceAdapter(InferenceAdapter):
             ... ]
             >>> results = adapter.invoke_batch(requests)
         """
-        results = []
+        return [
+            self._result(future) if future is not None else None
+            for future in self._submit_items(requests, use_cache, lane, deadline_ms)
+        ]
 
-        for request in requests:
-            prompt = request.get("prompt")
-            max_tokens = request.get("max_tokens", 1000)
-            temperature = request.get("temperature", 0.0)
+    def invoke_batch_as_completed(
+        self,
+        requests: List[Dict[str, Any]],
+        use_cache: bool = True,
+        lane: Optional[str] = None,
+        deadline_ms: Optional[float] = None
+    ) -> Iterator[Tuple[int, Optional[str]]]:
+        """
+        Invoke model for multiple prompts, yielding results as they complete.
 
-            if not prompt:
-                results.append(None)
-                continue
+        Takes the same arguments as invoke_batch(). Requests are all
+        submitted up front, so a slow response does not hold back the ones
+        behind it.
 
-            if use_cache and self.cache_enabled:
-                result = self.invoke_model_cached(
-                    prompt, max_tokens, temperature
-                )
+        Yields:
+            (index, response) pairs, where index is the position of the
+            request in requests and response is None if it failed
+
+        Example:
+            >>> for index, response in adapter.invoke_batch_as_completed(requests):
+            ...     print(f"{index}: {response}")
+        """
+        futures = self._submit_items(requests, use_cache, lane, deadline_ms)
+        pending = {}
+        for index, future in enumerate(futures):
+            if future is None:
+                yield index, None
             else:
-                result = self.invoke_model(
-                    prompt, max_tokens, temperature
+                pending[future] = index
+
+        for future in as_completed(pending):
+            yield pending[future], self._result(future)
+
+    def _submit_items(
+        self,
+        requests: List[Dict[str, Any]],
+        use_cache: bool,
+        lane: Optional[str],
+        deadline_ms: Optional[float]
+    ) -> List[Optional[Future]]:
+        """Submit each request to the batcher or thread pool; None for requests not sent."""
+        futures = []
+        for request in requests:
+            item = (
+                request.get("prompt"),
+                request.get("max_tokens", 1000),
+                request.get("temperature", 0.0),
+                use_cache
+            )
+            if not item[0]:
+                futures.append(None)
+            elif self.batching_enabled:
+                try:
+                    futures.append(self.batcher.submit(item, lane, deadline_ms))
+                except QueueFullError as e:
+                    print(f"Batch queue full, request not sent: {e}")
+                    futures.append(None)
+            else:
+                futures.append(self._get_executor().submit(self._invoke_item, item))
+        return futures
+
+    @staticmethod
+    def _result(future: Future) -> Optional[str]:
+        """Return a request's response, or None if it failed."""
+        try:
+            return future.result()
+        except Exception as e:
+            print(f"Error invoking batched request: {e}")
+            return None
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """Return the shared invocation thread pool, creating it on first use."""
+        with self.executor_lock:
+            if self.executor is None:
+                self.executor = ThreadPoolExecutor(
+                    max_workers=self.max_concurrency,
+                    thread_name_prefix="bedrock-invoke"
                 )
+            return self.executor
+
+    def _invoke_item(self, item: tuple) -> Optional[str]:
+        """Invoke the model for one (prompt, max_tokens, temperature, use_cache) item."""
+        prompt, max_tokens, temperature, use_cache = item
+        if use_cache and self.cache_enabled:
+            return self.invoke_model_cached(prompt, max_tokens, temperature)
+        return self.invoke_model(prompt, max_tokens, temperature)
 
-            results.append(result)
+    def _process_batch(self, items: List[tuple]) -> List[Any]:
+        """
+        Batch processor: invoke each distinct item once, in parallel.
 
-        return results
+        Returns:
+            Results aligned with items; an item that raised gets its
+            exception so only that caller's future fails
+        """
+        # Prompts may be lists of content blocks, which are not hashable
+        keys = [json.dumps(item, sort_keys=True) for item in items]
+        distinct = dict(zip(keys, items))
+        if self.max_concurrency > 1 and len(distinct) > 1:
+            executor = self._get_executor()
+            futures = {
+                key: executor.submit(self._invoke_item, item)
+                for key, item in distinct.items()
+            }
+        else:
+            futures = {}
+
+        outcomes: Dict[str, Any] = {}
+        for key, item in distinct.items():
+            try:
+                if key in futures:
+                    outcomes[key] = futures[key].result()
+                else:
+                    outcomes[key] = self._invoke_item(item)
+            except Exception as e:
+                outcomes[key] = e
+        return [outcomes[key] for key in keys]
 
     def get_cache_stats(self) -> Dict[str, Any]:
         """
@@ -164,25 +422,95 @@ class OptimizedInferenceAdapter(InferenceAdapter):
         if not self.cache_enabled or not self.optimizer.cache:
             return {"enabled": False}
 
-        return {
+        stats = {
             "enabled": True,
             "size": self.optimizer.cache.size(),
             "max_entries": self.optimizer.cache.max_entries,
-            "ttl_ms": self.optimizer.cache.ttl_ms
+            "bytes": self.optimizer.cache.bytes_used(),
+            "logical_bytes": self.optimizer.cache.logical_bytes_used(),
+            "max_bytes": self.optimizer.cache.max_bytes,
+            "compression": self.optimizer.cache.compression,
+            "ttl_ms": self.optimizer.cache.ttl_ms,
+            **self.optimizer.get_stats()
         }
 
+        if self.optimizer.similarity_cache:
+            stats["similarity"] = self.optimizer.similarity_cache.get_stats()
+
+        if self.optimizer.l2_cache:
+            stats["disk_tier"] = {
+                "path": self.optimizer.l2_cache.path,
+                "size": self.optimizer.l2_cache.size(),
+                "bytes": self.optimizer.l2_cache.bytes_used(),
+                "max_bytes": self.optimizer.l2_cache.max_bytes,
+                "ttl_ms": self.optimizer.l2_cache.ttl_ms
+            }
+
+        if self.optimizer.remote_cache:
+            stats["remote_tier"] = self.optimizer.remote_cache.get_stats()
+
+        if self.batcher is not None:
+            stats["batching"] = self.batcher.get_stats()
+
+        stats["retry"] = self.retry_policy.get_stats()
+        stats["token_usage"] = self.get_token_usage()
+
+        return stats
+
+    def get_prometheus_metrics(self) -> str:
+        """
+        Get cache statistics in Prometheus text exposition format.
+
+        Returns:
+            Exposition text (empty if caching or stats are disabled)
+        """
+        if not self.cache_enabled or not self.optimizer.cache:
+            return ""
+        return self.optimizer.get_prometheus_metrics()
+
+    def invalidate_tag(self, tag: str) -> int:
+        """
+        Remove every cached prediction carrying a tag, in every tier.
+
+        Args:
+            tag: Tag to invalidate, e.g. "doc:<digest>" after a document is
+                re-uploaded or "model:<id>" after switching models
+
+        Returns:
+            Number of entries removed
+        """
+        if not self.cache_enabled:
+            return 0
+        return self.optimizer.invalidate_tag(tag)
+
     def clear_cache(self) -> None:
-        """Clear all cached predictions."""
+        """
+        Clear all cached predictions, including the disk and remote tiers.
+
+        The remote tier is shared, so this clears it for every process
+        using the same server and key prefix.
+        """
         if self.cache_enabled and self.optimizer.cache:
             self.optimizer.cache.clear()
+        if self.cache_enabled:
+            for tier in self.optimizer.l2_tiers:
+                tier.clear()
+        if self.cache_enabled and self.optimizer.similarity_cache:
+            self.optimizer.similarity_cache.clear()
 
     def cleanup_expired_cache(self) -> int:
         """
-        Remove expired cache entries.
+        Remove expired cache entries from every tier.
 
         Returns:
             Number of entries removed
         """
+        removed = 0
         if self.cache_enabled and self.optimizer.cache:
-            return self.optimizer.cache.cleanup_expired()
-        return 0
+            removed += self.optimizer.cache.cleanup_expired()
+        if self.cache_enabled:
+            for tier in self.optimizer.l2_tiers:
+                removed += tier.cleanup_expired()
+        if self.cache_enabled and self.optimizer.similarity_cache:
+            removed += self.optimizer.similarity_cache.cleanup_expired()
+        return removed
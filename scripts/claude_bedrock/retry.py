@@ -0,0 +1,442 @@
+"""
+Bedrock Retry Policy
+====================
+
+Retries for Bedrock calls that fail transiently, so a ThrottlingException
+under load is waited out instead of turning into an empty response.
+
+- Errors are classified as throttling, unavailable (5xx, model timeouts,
+  dropped connections), validation or other; only the first two are retried.
+- Delays use decorrelated-jitter exponential backoff, so clients throttled
+  together do not retry together.
+- A retry budget stops retries once failures dominate (e.g. during an
+  outage), instead of multiplying the load on a struggling service.
+- An adaptive token-bucket rate limiter shared by all calls starts
+  unthrottled, cuts the send rate on every throttle and ramps it back up
+  gradually while calls succeed.
+- A throttling or unavailable error the policy gives up on is raised to
+  the caller as TransientError rather than passed off as an empty answer.
+
+Usage:
+    from claude_bedrock.retry import RetryPolicy, AdaptiveRateLimiter, RetryBudget
+
+    policy = RetryPolicy(
+        max_attempts=4,
+        budget=RetryBudget(),
+        rate_limiter=AdaptiveRateLimiter(min_rate=1.0)
+    )
+    response = policy.call(lambda: client.invoke_model(...))
+"""
+
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from botocore.exceptions import ClientError, ConnectionError, HTTPClientError
+
+# Error classes
+THROTTLING = "throttling"
+UNAVAILABLE = "unavailable"
+VALIDATION = "validation"
+OTHER = "other"
+
+RETRYABLE = (THROTTLING, UNAVAILABLE)
+
+THROTTLING_CODES = frozenset({
+    "ThrottlingException",
+    "Throttling",
+    "TooManyRequestsException",
+    "ServiceQuotaExceededException",
+    "RequestLimitExceeded",
+})
+
+UNAVAILABLE_CODES = frozenset({
+    "ServiceUnavailableException",
+    "ServiceUnavailable",
+    "InternalServerException",
+    "InternalFailure",
+    "ModelNotReadyException",
+    "ModelTimeoutException",
+    "ModelStreamErrorException",
+    "RequestTimeout",
+})
+
+VALIDATION_CODES = frozenset({
+    "ValidationException",
+    "ResourceNotFoundException",
+    "AccessDeniedException",
+    "ModelErrorException",
+})
+
+
+def classify_error(error: BaseException) -> str:
+    """
+    Classify an exception raised by a Bedrock call.
+
+    Args:
+        error: Exception raised by the client
+
+    Returns:
+        THROTTLING, UNAVAILABLE, VALIDATION or OTHER
+    """
+    if isinstance(error, ClientError):
+        code = error.response.get("Error", {}).get("Code", "")
+        # Errors inside an event stream use camelCase codes
+        # (e.g. throttlingException)
+        code = code[:1].upper() + code[1:]
+        status = error.response.get("ResponseMetadata", {}).get("HTTPStatusCode")
+        if code in THROTTLING_CODES or status == 429:
+            return THROTTLING
+        if code in UNAVAILABLE_CODES or (status is not None and status >= 500):
+            return UNAVAILABLE
+        if code in VALIDATION_CODES or status == 400:
+            return VALIDATION
+        return OTHER
+    if isinstance(error, (ConnectionError, HTTPClientError)):
+        return UNAVAILABLE
+    return OTHER
+
+
+class TransientError(Exception):
+    """
+    A throttling or unavailable error that was not recovered from.
+
+    Raised once the retry policy gives up (attempts used up or retry budget
+    exhausted), or when such an error interrupts a stream that has already
+    produced text. The original error is available as __cause__.
+    """
+
+    def __init__(self, error: BaseException, error_class: str):
+        """
+        Initialize the error.
+
+        Args:
+            error: The last error raised by the client
+            error_class: THROTTLING or UNAVAILABLE
+        """
+        super().__init__(f"{error_class}: {error}")
+        self.error_class = error_class
+
+
+class DecorrelatedJitterBackoff:
+    """
+    Exponential backoff with decorrelated jitter.
+
+    Each delay is drawn uniformly between the base delay and three times the
+    previous delay, capped at max_delay_ms.
+    """
+
+    def __init__(self, base_delay_ms: float = 100, max_delay_ms: float = 5000):
+        """
+        Initialize the backoff.
+
+        Args:
+            base_delay_ms: Smallest (and first) delay in milliseconds
+            max_delay_ms: Largest delay in milliseconds
+        """
+        self.base_s = base_delay_ms / 1000.0
+        self.max_s = max_delay_ms / 1000.0
+        self.previous_s = self.base_s
+
+    def next_delay(self) -> float:
+        """Get the next delay in seconds."""
+        self.previous_s = min(self.max_s, random.uniform(self.base_s, self.previous_s * 3))
+        return self.previous_s
+
+
+class RetryBudget:
+    """
+    Token-bucket retry budget shared by all calls.
+
+    Every failed attempt withdraws a token and every success deposits
+    token_ratio of one; retries are allowed only while more than half of
+    max_tokens remain. With the defaults, a burst of up to 50 failures is
+    retried, but sustained retries stop once more than about one call in
+    ten fails, and resume as successes refill the bucket.
+    """
+
+    def __init__(self, max_tokens: float = 100, token_ratio: float = 0.1):
+        """
+        Initialize the budget.
+
+        Args:
+            max_tokens: Bucket capacity
+            token_ratio: Tokens deposited per successful call
+        """
+        self.max_tokens = max_tokens
+        self.token_ratio = token_ratio
+        self.tokens = max_tokens
+        self.lock = threading.Lock()
+
+    def on_success(self) -> None:
+        """Record a successful call."""
+        with self.lock:
+            self.tokens = min(self.max_tokens, self.tokens + self.token_ratio)
+
+    def on_failure(self) -> bool:
+        """
+        Record a retryable failure.
+
+        Returns:
+            True if the call may be retried
+        """
+        with self.lock:
+            self.tokens = max(0.0, self.tokens - 1)
+            return self.tokens > self.max_tokens / 2
+
+
+class AdaptiveRateLimiter:
+    """
+    Client-side token bucket that adapts its rate to throttling.
+
+    Calls pass through unthrottled until the first throttle. The fill rate
+    then drops to decrease_factor times the measured send rate, is cut by
+    the same factor on every further throttle of a call sent after the
+    previous cut (so one burst of throttled calls cuts it once), and grows
+    linearly while calls succeed, by recovery_rate times the rate before the
+    last cut every second. Once it climbs
+    back above max_rate (or, without one, twice the rate at which throttling
+    started) the limiter switches off again.
+    """
+
+    def __init__(
+        self,
+        min_rate: float = 0.5,
+        max_rate: Optional[float] = None,
+        decrease_factor: float = 0.7,
+        recovery_rate: float = 0.1
+    ):
+        """
+        Initialize the rate limiter.
+
+        Args:
+            min_rate: Lowest send rate in requests per second
+            max_rate: Rate above which limiting stops (None: twice the
+                send rate measured at the first throttle)
+            decrease_factor: Multiplier applied to the rate on a throttle
+            recovery_rate: Fraction of the rate before the last cut regained
+                per second of successful calls
+        """
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.decrease_factor = decrease_factor
+        self.recovery_rate = recovery_rate
+
+        self.enabled = False
+        self.fill_rate = 0.0
+        self.throttled_rate = 0.0
+        self.ceiling = max_rate
+        self.tokens = 0.0
+        self.last_refill = time.monotonic()
+        self.last_update = self.last_refill
+        self.last_decrease = self.last_refill
+        self.throttles = 0
+
+        # Send rate, measured over half-second buckets (EWMA)
+        self.measured_rate = 0.0
+        self.bucket_start = self.last_refill
+        self.bucket_sends = 0
+
+        self.lock = threading.Lock()
+
+    def _record_send(self, now: float) -> None:
+        self.bucket_sends += 1
+        elapsed = now - self.bucket_start
+        if elapsed >= 0.5:
+            rate = self.bucket_sends / elapsed
+            self.measured_rate = 0.8 * rate + 0.2 * self.measured_rate if self.measured_rate else rate
+            self.bucket_start = now
+            self.bucket_sends = 0
+
+    def _current_rate(self, now: float) -> float:
+        # Before the first half-second bucket completes, use the partial one
+        if self.measured_rate:
+            return self.measured_rate
+        return self.bucket_sends / max(now - self.bucket_start, 0.1)
+
+    def acquire(self) -> float:
+        """
+        Wait for permission to send one request.
+
+        Returns:
+            Seconds spent waiting
+        """
+        with self.lock:
+            now = time.monotonic()
+            self._record_send(now)
+            if not self.enabled:
+                return 0.0
+
+            self.tokens = min(1.0, self.tokens + (now - self.last_refill) * self.fill_rate)
+            self.last_refill = now
+            # Reserve the token now so concurrent callers queue behind it
+            self.tokens -= 1
+            wait = -self.tokens / self.fill_rate if self.tokens < 0 else 0.0
+
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def on_throttle(self, sent_at: Optional[float] = None) -> None:
+        """
+        Record a throttled call and slow down.
+
+        Args:
+            sent_at: time.monotonic() when the call was sent; calls sent
+                before the last rate cut do not cut it again
+        """
+        with self.lock:
+            now = time.monotonic()
+            self.throttles += 1
+            if self.enabled:
+                if sent_at is not None and sent_at < self.last_decrease:
+                    return
+                rate = self.fill_rate
+            else:
+                rate = max(self._current_rate(now), self.min_rate)
+                if self.max_rate is None:
+                    self.ceiling = 2 * rate
+                self.enabled = True
+                self.tokens = 0.0
+                self.last_refill = now
+            self.throttled_rate = rate
+            self.fill_rate = max(self.min_rate, rate * self.decrease_factor)
+            self.last_update = now
+            self.last_decrease = now
+
+    def on_success(self) -> None:
+        """Record a successful call and recover some of the rate."""
+        with self.lock:
+            if not self.enabled:
+                return
+            now = time.monotonic()
+            self.fill_rate += self.recovery_rate * self.throttled_rate * (now - self.last_update)
+            self.last_update = now
+            if self.fill_rate >= self.ceiling:
+                self.enabled = False
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get rate limiter statistics.
+
+        Returns:
+            Dictionary with the current state
+        """
+        with self.lock:
+            return {
+                "enabled": self.enabled,
+                "fill_rate": round(self.fill_rate, 3) if self.enabled else None,
+                "measured_rate": round(self.measured_rate, 3),
+                "throttles": self.throttles,
+            }
+
+
+class RetryPolicy:
+    """
+    Retries Bedrock calls on throttling and transient errors.
+
+    One policy is meant to be shared by every call of a client (it is
+    thread-safe), so the budget and rate limiter see the aggregate traffic.
+    """
+
+    def __init__(
+        self,
+        max_attempts: int = 4,
+        base_delay_ms: float = 100,
+        max_delay_ms: float = 5000,
+        budget: Optional[RetryBudget] = None,
+        rate_limiter: Optional[AdaptiveRateLimiter] = None
+    ):
+        """
+        Initialize the retry policy.
+
+        Args:
+            max_attempts: Attempts per call, including the first
+            base_delay_ms: First and smallest backoff delay in milliseconds
+            max_delay_ms: Largest backoff delay in milliseconds
+            budget: Retry budget (None for no budget)
+            rate_limiter: Client-side rate limiter (None for no limiting)
+        """
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay_ms = base_delay_ms
+        self.max_delay_ms = max_delay_ms
+        self.budget = budget
+        self.rate_limiter = rate_limiter
+
+        self.calls = 0
+        self.retries = 0
+        self.failures: Dict[str, int] = {}
+        self.budget_exhausted = 0
+        self.lock = threading.Lock()
+
+    def call(self, fn: Callable[[], Any]) -> Any:
+        """
+        Call fn(), retrying throttling and transient errors.
+
+        Args:
+            fn: The Bedrock call
+
+        Returns:
+            fn()'s result
+
+        Raises:
+            Exception: The last error, once it is not retryable, attempts
+                are used up or the retry budget is exhausted
+        """
+        backoff = DecorrelatedJitterBackoff(self.base_delay_ms, self.max_delay_ms)
+        with self.lock:
+            self.calls += 1
+
+        attempt = 1
+        while True:
+            # Taken before acquire(): a call admitted at an older, higher
+            # rate must not cut the rate again
+            sent_at = time.monotonic()
+            if self.rate_limiter:
+                self.rate_limiter.acquire()
+            try:
+                result = fn()
+            except Exception as e:
+                error_class = classify_error(e)
+                with self.lock:
+                    self.failures[error_class] = self.failures.get(error_class, 0) + 1
+                if error_class == THROTTLING and self.rate_limiter:
+                    self.rate_limiter.on_throttle(sent_at)
+                if error_class not in RETRYABLE or attempt >= self.max_attempts:
+                    raise
+                if self.budget and not self.budget.on_failure():
+                    with self.lock:
+                        self.budget_exhausted += 1
+                    raise
+            else:
+                if self.rate_limiter:
+                    self.rate_limiter.on_success()
+                if self.budget:
+                    self.budget.on_success()
+                return result
+
+            with self.lock:
+                self.retries += 1
+            time.sleep(backoff.next_delay())
+            attempt += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get retry statistics.
+
+        Returns:
+            Dictionary with call, retry and failure counts
+        """
+        with self.lock:
+            stats = {
+                "calls": self.calls,
+                "retries": self.retries,
+                "failures": dict(self.failures),
+                "budget_exhausted": self.budget_exhausted,
+            }
+        if self.budget:
+            stats["budget_tokens"] = round(self.budget.tokens, 2)
+        if self.rate_limiter:
+            stats["rate_limiter"] = self.rate_limiter.get_stats()
+        return stats
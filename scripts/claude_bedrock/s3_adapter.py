@@ -7,10 +7,11 @@ particularly for use with document processing and chunking workflows.
 """
 
 import json
-import boto3
 from typing import Dict, Any, Optional
 from botocore.exceptions import ClientError
 
+from .clients import get_client
+
 
 class S3Adapter:
     """
@@ -20,14 +21,21 @@ class S3Adapter:
     in document processing workflows.
     """
 
-    def __init__(self, region_name: str = 'us-east-1'):
+    def __init__(
+        self,
+        region_name: str = 'us-east-1',
+        client_options: Optional[Dict[str, Any]] = None
+    ):
         """
         Initialize the S3Adapter.
 
         Args:
             region_name: AWS region name (default: 'us-east-1')
+            client_options: botocore Config arguments overriding the
+                registry defaults (see claude_bedrock.clients)
         """
-        self.s3_client = boto3.client('s3', region_name=region_name)
+        # Shared with other adapters using the same region and options
+        self.s3_client = get_client('s3', region_name, **(client_options or {}))
 
     def read_from_s3(self, bucket_name: str, file_name: str) -> Dict[str, Any]:
         """
@@ -138,15 +146,19 @@ class S3Adapter:
         self,
         bucket_name: str,
         prefix: str = '',
-        max_keys: int = 1000
+        max_keys: Optional[int] = 1000
     ) -> list:
         """
         List objects in an S3 bucket with optional prefix filter.
 
+        S3 returns at most 1000 keys per request, so larger listings are
+        fetched page by page.
+
         Args:
             bucket_name: Name of the S3 bucket
             prefix: Prefix to filter objects (default: '')
-            max_keys: Maximum number of keys to return (default: 1000)
+            max_keys: Maximum number of keys to return (default: 1000;
+                None lists every key)
 
         Returns:
             list: List of object keys
@@ -154,15 +166,18 @@ class S3Adapter:
         Raises:
             ClientError: If S3 list operation fails
         """
+        keys = []
+        kwargs = {'Bucket': bucket_name, 'Prefix': prefix}
         try:
-            response = self.s3_client.list_objects_v2(
-                Bucket=bucket_name,
-                Prefix=prefix,
-                MaxKeys=max_keys
-            )
-            if 'Contents' in response:
-                return [obj['Key'] for obj in response['Contents']]
-            return []
+            while max_keys is None or len(keys) < max_keys:
+                if max_keys is not None:
+                    kwargs['MaxKeys'] = min(1000, max_keys - len(keys))
+                response = self.s3_client.list_objects_v2(**kwargs)
+                keys.extend(obj['Key'] for obj in response.get('Contents', []))
+                if not response.get('IsTruncated'):
+                    break
+                kwargs['ContinuationToken'] = response['NextContinuationToken']
+            return keys
         except ClientError as e:
             print(f"Error listing objects in S3: {e}")
             raise
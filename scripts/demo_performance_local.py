@@ -10,15 +10,21 @@ to show caching and batching benefits.
 Run: python3 scripts/demo_performance_local.py
 """
 
+import json
+import multiprocessing
 import sys
 import time
+import asyncio
 import hashlib
 from pathlib import Path
 
 # Add parent directory to path
 sys.path.insert(0, str(Path(__file__).parent))
 
+from performance.fake_redis import FakeRedisServer
 from performance.optimizer import PredictionCache, RequestBatcher, PerformanceOptimizer
+from performance.redis_backend import RedisBackend
+from performance.shm_cache import SharedMemoryCache
 
 
 # Simulated expensive operation (like an API call)
@@ -192,9 +198,8 @@ def demo_batching():
     batches_processed = []
 
     def process_batch(batch):
-        """Callback when batch is ready."""
+        """Callback when batch is ready (runs on the dispatcher thread)."""
         batches_processed.append(batch)
-        print(f"  → Processing batch of {len(batch)} requests")
 
     batcher = RequestBatcher(
         max_batch_size=3,
@@ -218,11 +223,26 @@ def demo_batching():
     if remaining:
         print(f"  → Processing batch of {len(remaining)} requests")
         batches_processed.append(remaining)
+    batcher.close()
 
     print(f"\nTotal batches processed: {len(batches_processed)}")
     for i, batch in enumerate(batches_processed, 1):
         print(f"  Batch {i}: {len(batch)} requests")
 
+    print()
+    print("Submitting 8 items, each with a future for its own result:")
+    sizes = []
+
+    def square_all(numbers):
+        sizes.append(len(numbers))
+        return [n * n for n in numbers]
+
+    batcher = RequestBatcher(max_batch_size=4, max_wait_time_ms=50, processor=square_all)
+    futures = [batcher.submit(n) for n in range(8)]
+    print(f"  Results: {[future.result() for future in futures]}")
+    print(f"  Processed in {len(sizes)} batches of sizes {sizes}")
+    batcher.close()
+
     print()
     print("=" * 70)
     print()
@@ -282,6 +302,304 @@ def demo_performance_comparison():
     print()
 
 
+def demo_async_cache():
+    """Demonstrate the asyncio cache API with coalesced concurrent misses."""
+    print("=" * 70)
+    print("DEMO 6: asyncio aget_cached_or_compute")
+    print("=" * 70)
+    print()
+
+    optimizer = PerformanceOptimizer()
+    calls = 0
+
+    async def fake_model_call(prompt: str) -> str:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.2)
+        return f"Response for: {prompt}"
+
+    async def run():
+        prompt = "What is retrieval augmented generation?"
+        start = time.time()
+        results = await asyncio.gather(*[
+            optimizer.aget_cached_or_compute(prompt, lambda: fake_model_call(prompt))
+            for _ in range(10)
+        ])
+        elapsed = time.time() - start
+        assert calls == 1 and len(set(results)) == 1
+        print(f"10 concurrent requests for the same prompt: {elapsed*1000:.0f}ms")
+        print(f"  Model calls: {calls} (others awaited the in-flight call)")
+        print()
+
+        # A cancelled caller does not cancel the computation for the others
+        def lookup(prompt):
+            return asyncio.create_task(
+                optimizer.aget_cached_or_compute(prompt, lambda: fake_model_call(prompt))
+            )
+
+        waiters = [lookup("other") for _ in range(3)]
+        await asyncio.sleep(0.05)
+        waiters[0].cancel()
+        remaining = await asyncio.gather(*waiters[1:])
+        assert waiters[0].cancelled() and calls == 2
+        assert remaining == ["Response for: other"] * 2
+        print("Cancelled one of three callers waiting on the same prompt:")
+        print(f"  Remaining callers got: {remaining[0]!r} (one model call)")
+
+        # Once every caller is cancelled, the next one starts afresh
+        abandoned = lookup("abandoned")
+        await asyncio.sleep(0.05)
+        abandoned.cancel()
+        # Created before the cancellation runs, so it arrives just after
+        assert await lookup("abandoned") == "Response for: abandoned" and calls == 4
+        print("  After all callers cancelled, a new caller recomputed it")
+
+    asyncio.run(run())
+    print()
+    print("=" * 70)
+    print()
+
+
+def demo_remote_tier():
+    """Demonstrate two workers sharing results through the remote tier."""
+    print("=" * 70)
+    print("DEMO 7: Shared Remote Cache Tier (local fake Redis)")
+    print("=" * 70)
+    print()
+
+    with FakeRedisServer() as server:
+        host, port = server.address
+        workers = []
+        for _ in range(2):
+            optimizer = PerformanceOptimizer()
+            optimizer.remote_cache = RedisBackend(host, port, ttl_ms=60000)
+            optimizer.l2_tiers = [optimizer.remote_cache]
+            workers.append(optimizer)
+        first, second = workers
+
+        prompt = "Summarize chunk 17 of the quarterly report"
+        start = time.time()
+        first.get_cached_or_compute(prompt, lambda: simulate_expensive_operation(prompt, 0.5))
+        print(f"Worker 1 computes:             {(time.time() - start)*1000:.0f}ms")
+
+        start = time.time()
+        second.get_cached_or_compute(prompt, lambda: simulate_expensive_operation(prompt, 0.5))
+        print(f"Worker 2 hits the remote tier: {(time.time() - start)*1000:.1f}ms")
+
+        chunks = [f"chunk {i}" for i in range(50)]
+        for chunk in chunks:
+            first.get_cached_or_compute(chunk, lambda chunk=chunk: f"Context for {chunk}")
+        start = time.time()
+        promoted = second.prefetch(chunks)
+        print(f"Worker 2 prefetches {promoted} chunks in one round trip: "
+              f"{(time.time() - start)*1000:.1f}ms")
+        print(f"  Remote tier entries: {first.remote_cache.size()}")
+
+        for optimizer in workers:
+            optimizer.remote_cache.close()
+
+    print()
+    print("=" * 70)
+    print()
+
+
+def _store_tagged_in_worker(cache):
+    """Worker process for demo 8: store a tagged entry in the shared cache."""
+    cache.set("worker chunk", "from worker", tags=("doc:worker",))
+    cache.close()
+
+
+def demo_shared_memory_cache():
+    """Demonstrate the shared memory cache behind PerformanceOptimizer, with tags."""
+    print("=" * 70)
+    print("DEMO 8: Shared Memory Cache with Tags")
+    print("=" * 70)
+    print()
+
+    ctx = multiprocessing.get_context("spawn")
+    cache = SharedMemoryCache(num_slots=1024, slot_bytes=1024, mp_context=ctx)
+    try:
+        optimizer = PerformanceOptimizer(cache=cache)
+        calls = 0
+
+        def compute(chunk):
+            nonlocal calls
+            calls += 1
+            return f"Context for {chunk}"
+
+        for chunk in ("chunk 1", "chunk 2"):
+            result = optimizer.get_cached_or_compute(
+                chunk, lambda chunk=chunk: compute(chunk), tags=("doc:report", "model:haiku")
+            )
+            assert result == f"Context for {chunk}"
+        optimizer.get_cached_or_compute("chunk 1", lambda: compute("chunk 1"))
+        print(f"3 tagged lookups, 2 computed: {calls == 2}")
+
+        removed = optimizer.invalidate_tag("doc:report")
+        assert removed == 2 and cache.size() == 0
+        print(f"invalidate_tag('doc:report') removed {removed} entries")
+
+        optimizer.get_cached_or_compute("chunk 1", lambda: compute("chunk 1"))
+        assert calls == 3
+        print(f"Recomputed after invalidation: {calls == 3}")
+
+        # Tags live in the shared arena: entries a worker process tagged
+        # are invalidated from here too
+        worker = ctx.Process(target=_store_tagged_in_worker, args=(cache,))
+        worker.start()
+        worker.join()
+        assert worker.exitcode == 0 and cache.get("worker chunk") == "from worker"
+        removed = optimizer.invalidate_tag("doc:worker")
+        assert removed == 1 and cache.get("worker chunk") is None
+        print(f"invalidate_tag('doc:worker') removed {removed} entry written by another process")
+    finally:
+        cache.close()
+        cache.unlink()
+
+    print()
+    print("=" * 70)
+    print()
+
+
+def demo_bedrock_retries():
+    """Check the Bedrock retry layer against a stubbed bedrock-runtime client."""
+    print("=" * 70)
+    print("DEMO 9: Bedrock Retries (botocore Stubber)")
+    print("=" * 70)
+    print()
+
+    # Imported here so the other demos run without boto3
+    from botocore.exceptions import ClientError, EventStreamError
+    from botocore.stub import Stubber
+    from claude_bedrock import InferenceAdapter, TransientError
+    from claude_bedrock.clients import get_client
+    from claude_bedrock.retry import (
+        THROTTLING, UNAVAILABLE, VALIDATION,
+        AdaptiveRateLimiter, RetryBudget, RetryPolicy, classify_error
+    )
+
+    # A real bedrock-runtime client, without botocore's own retries; the
+    # stubber answers its calls from a queue, so no credentials are needed
+    client = get_client(
+        'bedrock-runtime', 'us-east-1',
+        retries={'total_max_attempts': 1, 'mode': 'standard'}
+    )
+    operation = 'invoke_model_with_response_stream'
+    stream_response = {"body": {"chunk": {"bytes": b"{}"}}, "contentType": "application/json"}
+
+    def invoke():
+        return client.invoke_model_with_response_stream(
+            modelId='anthropic.claude-haiku-4-5-20251001-v1:0',
+            contentType='application/json',
+            accept='application/json',
+            body=b'{}'
+        )
+
+    def add_error(stubber, code, status):
+        stubber.add_client_error(operation, code, f"{code} from stub", status)
+
+    with Stubber(client) as stubber:
+        # Throttling and unavailable errors are retried until a success
+        policy = RetryPolicy(base_delay_ms=1, max_delay_ms=5)
+        add_error(stubber, 'ThrottlingException', 429)
+        add_error(stubber, 'ServiceUnavailableException', 503)
+        stubber.add_response(operation, stream_response)
+        response = policy.call(invoke)
+        assert response["contentType"] == "application/json"
+
+        # Validation errors are not
+        add_error(stubber, 'ValidationException', 400)
+        try:
+            policy.call(invoke)
+            raise AssertionError("ValidationException was not raised")
+        except ClientError as e:
+            assert classify_error(e) == VALIDATION
+        stats = policy.get_stats()
+        assert stats["retries"] == 2
+        assert stats["failures"] == {THROTTLING: 1, UNAVAILABLE: 1, VALIDATION: 1}
+        print(f"Throttle, 503, success, then a validation error: {stats['calls']} calls, "
+              f"{stats['retries']} retries")
+        print(f"  Failures by class: {stats['failures']}")
+
+        # With 4 budget tokens, retries stop once 2 are left
+        policy = RetryPolicy(max_attempts=10, base_delay_ms=1, max_delay_ms=5,
+                             budget=RetryBudget(max_tokens=4))
+        add_error(stubber, 'ThrottlingException', 429)
+        add_error(stubber, 'ThrottlingException', 429)
+        try:
+            policy.call(invoke)
+            raise AssertionError("ThrottlingException was not raised")
+        except ClientError as e:
+            assert classify_error(e) == THROTTLING
+        stats = policy.get_stats()
+        assert stats["retries"] == 1 and stats["budget_exhausted"] == 1
+        print(f"Retry budget of 4 tokens: stopped after {stats['retries']} retry "
+              f"of 9 allowed ({stats['budget_tokens']} tokens left)")
+
+        # The rate limiter cuts its rate on a throttle and recovers on success
+        limiter = AdaptiveRateLimiter(min_rate=1.0, recovery_rate=1.0)
+        policy = RetryPolicy(max_attempts=1, rate_limiter=limiter)
+        add_error(stubber, 'ThrottlingException', 429)
+        try:
+            policy.call(invoke)
+        except ClientError:
+            pass
+        throttled = limiter.get_stats()
+        assert throttled["enabled"]
+        time.sleep(0.3)
+        stubber.add_response(operation, stream_response)
+        policy.call(invoke)
+        recovered = limiter.get_stats()
+        assert not recovered["enabled"] or recovered["fill_rate"] > throttled["fill_rate"]
+        print(f"Rate limiter fill rate: {throttled['fill_rate']}/s after a throttle, "
+              f"{recovered['fill_rate'] or 'unlimited'}/s after a success 0.3s later")
+
+        # Through the adapter, a throttle that persists raises TransientError
+        adapter = InferenceAdapter(retry_policy=RetryPolicy(max_attempts=2, base_delay_ms=1))
+        assert adapter.bedrock_runtime is client
+        add_error(stubber, 'ThrottlingException', 429)
+        add_error(stubber, 'ThrottlingException', 429)
+        try:
+            adapter.invoke_model("Hello")
+            raise AssertionError("TransientError was not raised")
+        except TransientError as e:
+            assert e.error_class == THROTTLING
+        stubber.assert_no_pending_responses()
+        print("InferenceAdapter raised TransientError after two throttles with max_attempts=2")
+
+    # A throttle delivered inside the event stream, before any text, is
+    # retried like one raised by the call (the stubber cannot stream events)
+    class MidStreamThrottleClient:
+        def __init__(self):
+            self.calls = 0
+
+        def invoke_model_with_response_stream(self, **kwargs):
+            self.calls += 1
+            return {"body": self._events(throttle=self.calls == 1)}
+
+        def _events(self, throttle):
+            yield {"chunk": {"bytes": json.dumps({"type": "message_start", "message": {}}).encode()}}
+            if throttle:
+                raise EventStreamError(
+                    {"Error": {"Code": "throttlingException", "Message": "Too many requests"}},
+                    "InvokeModelWithResponseStream"
+                )
+            for event in ({"type": "content_block_delta", "delta": {"text": "Hi"}},
+                          {"type": "message_delta", "delta": {"stop_reason": "end_turn"}}):
+                yield {"chunk": {"bytes": json.dumps(event).encode()}}
+
+    adapter = InferenceAdapter(retry_policy=RetryPolicy(base_delay_ms=1))
+    adapter.bedrock_runtime = MidStreamThrottleClient()
+    assert adapter.invoke_model("Hello") == "Hi"
+    assert adapter.bedrock_runtime.calls == 2
+    assert adapter.retry_policy.get_stats()["failures"] == {THROTTLING: 1}
+    print("A throttlingException event before the first text was retried")
+
+    print()
+    print("=" * 70)
+    print()
+
+
 def main():
     """Run all demos."""
     print("\n" + "=" * 70)
@@ -304,6 +622,18 @@ def main():
         time.sleep(0.5)
 
         demo_performance_comparison()
+        time.sleep(0.5)
+
+        demo_async_cache()
+        time.sleep(0.5)
+
+        demo_remote_tier()
+        time.sleep(0.5)
+
+        demo_shared_memory_cache()
+        time.sleep(0.5)
+
+        demo_bedrock_retries()
 
         print("=" * 70)
         print("✓ All demos completed successfully!")
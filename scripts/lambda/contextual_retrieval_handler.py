@@ -25,26 +25,19 @@ import sys
 # Add parent directory to path to import from scripts
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
+from claude_bedrock.contextual_retrieval import (
+    build_document_block, build_prompt, contextualize, token_usage_since
+)
 from claude_bedrock.inference_adapter import InferenceAdapter
 from claude_bedrock.s3_adapter import S3Adapter
 
 logger = logging.getLogger()
 logger.setLevel(logging.DEBUG)
 
-# Prompt template for generating contextual information
-CONTEXTUAL_RETRIEVAL_PROMPT = """
-<document>
-{doc_content}
-</document>
-
-Here is the chunk we want to situate within the whole document
-<chunk>
-{chunk_content}
-</chunk>
-
-Please give a short succinct context to situate this chunk within the overall document for the purposes of improving search retrieval of the chunk.
-Answer only with the succinct context and nothing else.
-"""
+# Adapters live at module level so warm invocations reuse their pooled
+# connections instead of opening new TLS connections
+s3_adapter = S3Adapter()
+inference_adapter = InferenceAdapter()
 
 
 def lambda_handler(event, context):
@@ -77,8 +70,7 @@ def lambda_handler(event, context):
     """
     logger.debug('input={}'.format(json.dumps(event)))
 
-    s3_adapter = S3Adapter()
-    inference_adapter = InferenceAdapter()
+    usage_at_start = inference_adapter.get_token_usage()
 
     # Extract relevant information from the input event
     input_files = event.get('inputFiles')
@@ -114,6 +106,9 @@ def lambda_handler(event, context):
                 if content
             )
 
+            # Built once so every chunk prompt starts with the same cached prefix
+            document_block = build_document_block(original_document_content)
+
             # Process one chunk at a time
             chunked_content = {
                 'fileContents': []
@@ -127,22 +122,21 @@ def lambda_handler(event, context):
                 logger.debug(f"Processing chunk {idx + 1}/{len(file_content.get('fileContents'))}")
 
                 # Update chunk with additional context
-                prompt = CONTEXTUAL_RETRIEVAL_PROMPT.format(
-                    doc_content=original_document_content,
-                    chunk_content=content_body
-                )
+                prompt = build_prompt(document_block, content_body)
 
-                response_stream = inference_adapter.invoke_model_with_response_stream(
-                    prompt,
-                    max_tokens=500
-                )
-                chunk_context = ''.join(chunk for chunk in response_stream if chunk)
+                # Throttling that outlasts the retries raises TransientError,
+                # failing the invocation rather than writing chunks without
+                # their context; a rejected request leaves the chunk as is
+                chunk_context = inference_adapter.invoke_model(prompt, max_tokens=500)
 
-                logger.debug(f"Generated context for chunk {idx + 1}: {chunk_context[:100]}...")
+                if chunk_context:
+                    logger.debug(f"Generated context for chunk {idx + 1}: {chunk_context[:100]}...")
+                else:
+                    logger.warning(f"Failed to generate context for chunk {idx + 1}")
 
                 # Append chunk with context to output file content
                 chunked_content['fileContents'].append({
-                    "contentBody": chunk_context + "\n\n" + content_body,
+                    "contentBody": contextualize(chunk_context, content_body),
                     "contentType": content_type,
                     "contentMetadata": content_metadata,
                 })
@@ -162,6 +156,8 @@ def lambda_handler(event, context):
             "contentBatches": processed_batches
         })
 
+    logger.info(f"Token usage: {token_usage_since(inference_adapter, usage_at_start)}")
+
     return {
         "outputFiles": output_files
     }
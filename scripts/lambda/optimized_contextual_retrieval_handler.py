@@ -7,6 +7,9 @@ that uses caching and batching for improved performance and cost optimization.
 
 Improvements over standard handler:
 - Caches generated contexts to avoid redundant API calls
+- Reuses pooled, keepalive AWS connections across warm invocations
+- Keeps the cache across warm invocations and, when CACHE_SNAPSHOT_BUCKET
+  is set, warms new containers from a cache snapshot in S3
 - Processes chunks in batches when possible
 - Reduces latency by up to 90% on repeated content
 - Lower costs through reduced API calls
@@ -24,26 +27,40 @@ import sys
 # Add parent directory to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
+from claude_bedrock.contextual_retrieval import (
+    PROMPT_VERSION, build_document_block, build_prompt, contextualize, token_usage_since
+)
 from claude_bedrock.optimized_adapter import OptimizedInferenceAdapter
 from claude_bedrock.s3_adapter import S3Adapter
+from performance import content_digest
+from performance.snapshot import CacheSnapshotter
 
 logger = logging.getLogger()
 logger.setLevel(logging.DEBUG)
 
-# Prompt template for generating contextual information
-CONTEXTUAL_RETRIEVAL_PROMPT = """
-<document>
-{doc_content}
-</document>
-
-Here is the chunk we want to situate within the whole document
-<chunk>
-{chunk_content}
-</chunk>
-
-Please give a short succinct context to situate this chunk within the overall document for the purposes of improving search retrieval of the chunk.
-Answer only with the succinct context and nothing else.
-"""
+# Maximum tokens generated per chunk context
+CONTEXT_MAX_TOKENS = 500
+
+# Adapters live at module level so the cache and pooled connections
+# survive warm invocations
+inference_adapter = OptimizedInferenceAdapter(
+    enable_cache=True,
+    enable_batching=False  # Can enable if processing multiple files
+)
+s3_adapter = S3Adapter(client_options=inference_adapter.client_options)
+
+# Optional cache snapshots: new containers load the last published snapshot
+# and every container publishes deltas of what it generated
+snapshotter = None
+if os.environ.get('CACHE_SNAPSHOT_BUCKET') and inference_adapter.optimizer.cache:
+    snapshotter = CacheSnapshotter(
+        inference_adapter.optimizer.cache,
+        s3_adapter,
+        bucket=os.environ['CACHE_SNAPSHOT_BUCKET'],
+        prefix=os.environ.get('CACHE_SNAPSHOT_PREFIX', 'prediction-cache'),
+        interval_ms=int(os.environ.get('CACHE_SNAPSHOT_INTERVAL_MS', '60000'))
+    )
+    snapshotter.load()
 
 
 def lambda_handler(event, context):
@@ -59,18 +76,12 @@ def lambda_handler(event, context):
     """
     logger.debug('input={}'.format(json.dumps(event)))
 
-    s3_adapter = S3Adapter()
-
-    # Initialize optimized inference adapter with caching enabled
-    inference_adapter = OptimizedInferenceAdapter(
-        enable_cache=True,
-        enable_batching=False  # Can enable if processing multiple files
-    )
-
     # Log cache stats at start
     cache_stats = inference_adapter.get_cache_stats()
     logger.info(f"Cache stats at start: {cache_stats}")
 
+    usage_at_start = inference_adapter.get_token_usage()
+
     # Extract relevant information from the input event
     input_files = event.get('inputFiles')
     input_bucket = event.get('bucketName')
@@ -107,6 +118,26 @@ def lambda_handler(event, context):
                 if content
             )
 
+            # Digest the document once; per-chunk cache keys combine it with
+            # the chunk digest instead of hashing the whole prompt each time
+            document_digest = content_digest(original_document_content)
+
+            # Tag contexts so a re-uploaded document or a model switch can be
+            # purged with inference_adapter.invalidate_tag()
+            document_tags = (
+                f"doc:{document_digest}",
+                f"model:{inference_adapter.model_id}"
+            )
+
+            # Near-duplicate matching (if enabled) compares the chunk and its
+            # document separately; sign the document once for all its chunks
+            document_signature = inference_adapter.similarity_signature(
+                original_document_content
+            )
+
+            # Built once so every chunk prompt starts with the same cached prefix
+            document_block = build_document_block(original_document_content)
+
             # Process one chunk at a time
             chunked_content = {
                 'fileContents': []
@@ -120,15 +151,28 @@ def lambda_handler(event, context):
                 logger.debug(f"Processing chunk {idx + 1}/{len(file_content.get('fileContents'))}")
 
                 # Update chunk with additional context
-                prompt = CONTEXTUAL_RETRIEVAL_PROMPT.format(
-                    doc_content=original_document_content,
-                    chunk_content=content_body
-                )
+                prompt = build_prompt(document_block, content_body)
 
-                # Use cached version - will automatically cache if not present
+                # Use cached version - will automatically cache if not present.
+                # Throttling that outlasts the retries raises TransientError,
+                # failing the invocation rather than writing chunks without
+                # their context; a rejected request leaves the chunk as is
                 chunk_context = inference_adapter.invoke_model_cached(
                     prompt,
-                    max_tokens=500
+                    max_tokens=CONTEXT_MAX_TOKENS,
+                    similarity_parts=(
+                        (content_body, document_signature)
+                        if document_signature is not None else None
+                    ),
+                    cache_key=(
+                        document_digest,
+                        content_digest(content_body),
+                        PROMPT_VERSION,
+                        inference_adapter.model_id,
+                        CONTEXT_MAX_TOKENS,
+                        0.0
+                    ),
+                    tags=document_tags
                 )
 
                 if chunk_context:
@@ -136,11 +180,10 @@ def lambda_handler(event, context):
                     total_chunks_processed += 1
                 else:
                     logger.warning(f"Failed to generate context for chunk {idx + 1}")
-                    chunk_context = ""
 
                 # Append chunk with context to output file content
                 chunked_content['fileContents'].append({
-                    "contentBody": chunk_context + "\n\n" + content_body if chunk_context else content_body,
+                    "contentBody": contextualize(chunk_context, content_body),
                     "contentType": content_type,
                     "contentMetadata": content_metadata,
                 })
@@ -165,10 +208,17 @@ def lambda_handler(event, context):
     logger.info(f"Cache stats at end: {final_cache_stats}")
     logger.info(f"Total chunks processed: {total_chunks_processed}")
 
+    logger.info(f"Token usage: {token_usage_since(inference_adapter, usage_at_start)}")
+
     # Clean up expired cache entries before finishing
     expired = inference_adapter.cleanup_expired_cache()
     logger.info(f"Cleaned up {expired} expired cache entries")
 
+    # Publish newly generated contexts for other containers
+    if snapshotter is not None:
+        saved = snapshotter.maybe_save()
+        logger.info(f"Published {saved} cache entries to snapshot")
+
     return {
         "outputFiles": output_files
     }
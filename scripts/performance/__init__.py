@@ -6,7 +6,51 @@ Utilities for optimizing AI/ML inference performance including
 caching, batching, and request optimization.
 """
 
-from .optimizer import PerformanceOptimizer, PredictionCache, RequestBatcher
+from .async_cache import AsyncPredictionCache
+from .backends import CacheBackend, MemoryBackend
+from .batching import (
+    AdaptiveBatchController,
+    DeadlineExceededError,
+    QueueFullError,
+    RequestBatcher,
+)
+from .disk_cache import DiskCache
+from .optimizer import (
+    PerformanceOptimizer,
+    PredictionCache,
+    ShardedPredictionCache,
+    content_digest,
+)
+from .shm_cache import SharedMemoryCache
+from .policies import EvictionPolicy, LRUPolicy, WTinyLFUPolicy
+from .redis_backend import RedisBackend
+from .fake_redis import FakeRedisServer
+from .similarity import SimilarityCache
+from .snapshot import CacheSnapshotter
+from .stats import CacheStats, LatencyHistogram
 
-__all__ = ['PerformanceOptimizer', 'PredictionCache', 'RequestBatcher']
+__all__ = [
+    'AdaptiveBatchController',
+    'AsyncPredictionCache',
+    'CacheBackend',
+    'CacheSnapshotter',
+    'CacheStats',
+    'DeadlineExceededError',
+    'DiskCache',
+    'EvictionPolicy',
+    'FakeRedisServer',
+    'LatencyHistogram',
+    'LRUPolicy',
+    'MemoryBackend',
+    'PerformanceOptimizer',
+    'PredictionCache',
+    'QueueFullError',
+    'RedisBackend',
+    'RequestBatcher',
+    'ShardedPredictionCache',
+    'SharedMemoryCache',
+    'SimilarityCache',
+    'WTinyLFUPolicy',
+    'content_digest',
+]
 __version__ = '1.0.0'
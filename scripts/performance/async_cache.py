@@ -0,0 +1,242 @@
+"""
+asyncio Prediction Cache
+========================
+
+Event-loop friendly counterparts of PredictionCache and
+PerformanceOptimizer.get_cached_or_compute.
+
+The in-memory cache is used inline: its lock only guards O(1) dictionary
+updates, so a lookup never waits on I/O or on another caller's compute.
+Anything that can take real time - compute functions, the disk tier,
+full expiry sweeps - is awaited or moved to a worker thread.
+
+Concurrent misses on the same key share one computation. Each caller
+awaits it through asyncio.shield(), so cancelling one caller never cancels
+the computation for the others; the computation itself is cancelled only
+once every caller waiting on it has been cancelled.
+
+Usage:
+    from performance.async_cache import AsyncPredictionCache
+
+    cache = AsyncPredictionCache()
+
+    async def handle(prompt):
+        return await cache.get_or_compute(prompt, lambda: call_model(prompt))
+"""
+
+import asyncio
+import threading
+import weakref
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional
+
+
+class _AsyncInFlightCall:
+    """A computation in progress and the number of callers awaiting it."""
+
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: "asyncio.Task"):
+        self.task = task
+        self.waiters = 0
+
+
+class AsyncSingleFlight:
+    """
+    Coalesces concurrent coroutine calls that share a key.
+
+    Calls are tracked per event loop, so one instance can serve several
+    loops (e.g. one per thread) without sharing tasks between them.
+    """
+
+    def __init__(self):
+        self.loops: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+        self.lock = threading.Lock()
+
+    def _calls(self) -> Dict[Any, _AsyncInFlightCall]:
+        loop = asyncio.get_running_loop()
+        with self.lock:
+            calls = self.loops.get(loop)
+            if calls is None:
+                calls = self.loops[loop] = {}
+            return calls
+
+    async def run(
+        self,
+        key: Any,
+        coro_fn: Callable[[], Awaitable[Any]],
+        on_coalesced: Optional[Callable[[], None]] = None
+    ) -> Any:
+        """
+        Run coro_fn(), or join an identical call already in flight.
+
+        Args:
+            key: Key identifying identical calls
+            coro_fn: Coroutine function producing the result
+            on_coalesced: Called when this call joins one in flight
+
+        Returns:
+            The result of the shared computation (its exception is raised
+            to every caller)
+        """
+        calls = self._calls()
+        call = calls.get(key)
+        if call is None:
+            call = calls[key] = _AsyncInFlightCall(asyncio.ensure_future(coro_fn()))
+
+            def forget(_, key=key, call=call):
+                if calls.get(key) is call:
+                    del calls[key]
+
+            call.task.add_done_callback(forget)
+        elif on_coalesced is not None:
+            on_coalesced()
+
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        finally:
+            call.waiters -= 1
+            # Only reached with the task pending if this caller was cancelled.
+            # Forget the call first, so a caller arriving next starts a
+            # fresh computation instead of joining the cancelled one
+            if call.waiters == 0 and not call.task.done():
+                if calls.get(key) is call:
+                    del calls[key]
+                call.task.cancel()
+
+    def size(self) -> int:
+        """Get the number of computations in flight across all loops."""
+        with self.lock:
+            return sum(len(calls) for calls in self.loops.values())
+
+
+class AsyncPredictionCache:
+    """
+    asyncio interface to a PredictionCache.
+
+    Features:
+    - Non-blocking get/set over any PredictionCache implementation
+    - get_or_compute() with coalescing of concurrent misses
+    - Cancellation-safe: a cancelled caller never cancels a computation
+      other callers still await
+    """
+
+    def __init__(self, cache: Optional[Any] = None, **cache_options: Any):
+        """
+        Initialize the async cache.
+
+        Args:
+            cache: PredictionCache (or compatible) to wrap; a new
+                PredictionCache is created if None
+            **cache_options: PredictionCache arguments used when cache is None
+        """
+        if cache is None:
+            from .optimizer import PredictionCache
+            cache = PredictionCache(**cache_options)
+        self.cache = cache
+        self.flight = AsyncSingleFlight()
+
+    async def get(self, key: Any) -> Optional[Any]:
+        """
+        Get a value from the cache.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            Cached value or None if not found or expired
+        """
+        return self.cache.get(key)
+
+    async def set(
+        self,
+        key: Any,
+        value: Any,
+        ttl_ms: Optional[float] = None,
+        tags: Optional[Iterable[str]] = None
+    ) -> None:
+        """
+        Set a value in the cache.
+
+        Args:
+            key: Cache key
+            value: Value to cache
+            ttl_ms: Time-to-live for this entry (cache-wide TTL if None)
+            tags: Tags for bulk invalidation
+        """
+        self.cache.set(key, value, ttl_ms, tags)
+
+    async def get_or_compute(
+        self,
+        key: Any,
+        coro_fn: Callable[[], Awaitable[Any]],
+        force_refresh: bool = False,
+        ttl_ms: Optional[float] = None,
+        tags: Optional[Iterable[str]] = None
+    ) -> Any:
+        """
+        Get a value from the cache, awaiting coro_fn() on a miss.
+
+        Args:
+            key: Cache key
+            coro_fn: Coroutine function computing the value
+            force_refresh: Force recomputation even if cached
+            ttl_ms: Time-to-live for a computed entry (cache-wide TTL if None)
+            tags: Tags for a computed entry
+
+        Returns:
+            Cached or computed result
+        """
+        hashed_key = self.cache._hash_key(key)
+        if not force_refresh:
+            cached = self.cache._get_hashed(hashed_key)
+            if cached is not None:
+                return cached
+
+        async def compute() -> Any:
+            result = await coro_fn()
+            self.cache._set_hashed(hashed_key, result, ttl_ms, tags)
+            return result
+
+        return await self.flight.run(hashed_key, compute)
+
+    async def cleanup_expired(self, limit: Optional[int] = None) -> int:
+        """
+        Remove expired entries.
+
+        Unbounded sweeps run in a worker thread so they cannot stall the loop.
+
+        Args:
+            limit: Maximum number of entries to remove in this call
+                (None removes everything that has expired)
+
+        Returns:
+            Number of entries removed
+        """
+        if limit is None:
+            return await asyncio.to_thread(self.cache.cleanup_expired)
+        return self.cache.cleanup_expired(limit)
+
+    async def invalidate_tag(self, tag: str) -> int:
+        """
+        Remove every entry carrying a tag.
+
+        Args:
+            tag: Tag to invalidate
+
+        Returns:
+            Number of entries removed
+        """
+        return self.cache.invalidate_tag(tag)
+
+    async def clear(self) -> None:
+        """Clear all cache entries."""
+        self.cache.clear()
+
+    def size(self) -> int:
+        """Get current cache size."""
+        return self.cache.size()
+
+    def in_flight(self) -> int:
+        """Get the number of computations currently in flight."""
+        return self.flight.size()
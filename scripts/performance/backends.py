@@ -0,0 +1,194 @@
+"""
+Cache Backends
+==============
+
+Interface for the lower cache tiers that sit under the in-memory
+PredictionCache, and an in-memory implementation of it.
+
+A backend stores values under keys that PredictionCache has already hashed,
+so every tier agrees on keys. PerformanceOptimizer consults its backends in
+order after an in-memory miss and promotes hits upward; computed values are
+written to every tier.
+
+Implementations:
+- MemoryBackend: a PredictionCache (LRU or W-TinyLFU) used as a tier
+- DiskCache (performance.disk_cache): SQLite file, survives restarts
+- RedisBackend (performance.redis_backend): networked, shared by a fleet
+"""
+
+from typing import Any, Dict, Iterable, Optional, Sequence, Tuple
+
+
+class CacheBackend:
+    """
+    Base class for cache tiers keyed by hashed keys.
+
+    get_entry() returns the value together with its absolute expiry time
+    (epoch milliseconds, or None if unknown) so a promoted copy never
+    outlives the original. Backends report failures of their own storage by
+    printing and behaving as a miss, so a broken tier never fails a request.
+    """
+
+    name = "backend"
+
+    def get_entry(self, key: str) -> Optional[Tuple[Any, Optional[float]]]:
+        """
+        Get a value together with its expiry time.
+
+        Args:
+            key: Cache key (already hashed by the caller)
+
+        Returns:
+            Tuple of (value, expires_at in epoch milliseconds or None), or
+            None if not found or expired
+        """
+        raise NotImplementedError
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Get a value.
+
+        Args:
+            key: Cache key (already hashed by the caller)
+
+        Returns:
+            Cached value or None if not found or expired
+        """
+        entry = self.get_entry(key)
+        return entry[0] if entry is not None else None
+
+    def get_many(
+        self,
+        keys: Sequence[str]
+    ) -> Dict[str, Tuple[Any, Optional[float]]]:
+        """
+        Get several entries at once.
+
+        Backends with a round-trip cost override this to fetch all keys in
+        one request.
+
+        Args:
+            keys: Cache keys (already hashed by the caller)
+
+        Returns:
+            Dictionary mapping each found key to (value, expires_at)
+        """
+        entries = {}
+        for key in keys:
+            entry = self.get_entry(key)
+            if entry is not None:
+                entries[key] = entry
+        return entries
+
+    def set(
+        self,
+        key: str,
+        value: Any,
+        ttl_ms: Optional[float] = None,
+        tags: Optional[Iterable[str]] = None
+    ) -> None:
+        """
+        Store a value.
+
+        Args:
+            key: Cache key (already hashed by the caller)
+            value: Value to store
+            ttl_ms: Time-to-live for this entry (backend TTL if None)
+            tags: Tags for bulk invalidation
+        """
+        raise NotImplementedError
+
+    def delete(self, key: str) -> bool:
+        """Remove a single entry; returns True if one was removed."""
+        raise NotImplementedError
+
+    def invalidate_tag(self, tag: str) -> int:
+        """Remove every entry carrying a tag; returns the number removed."""
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        """Clear all entries."""
+        raise NotImplementedError
+
+    def size(self) -> int:
+        """Get the number of stored entries."""
+        raise NotImplementedError
+
+    def bytes_used(self) -> int:
+        """Get the stored size in bytes (0 if the backend does not track it)."""
+        return 0
+
+    def cleanup_expired(self) -> int:
+        """Remove expired entries; returns the number removed."""
+        return 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get backend statistics for the stats surfaces.
+
+        Returns:
+            Dictionary with at least the backend size
+        """
+        return {"size": self.size(), "bytes": self.bytes_used()}
+
+    def close(self) -> None:
+        """Release connections or file handles."""
+
+
+class MemoryBackend(CacheBackend):
+    """
+    In-memory cache tier backed by a PredictionCache.
+
+    Useful as a larger, longer-lived tier behind a small L1, or as a
+    stand-in for a remote tier in local runs.
+    """
+
+    name = "memory"
+
+    def __init__(self, cache: Optional[Any] = None, **cache_options: Any):
+        """
+        Initialize the backend.
+
+        Args:
+            cache: PredictionCache to store entries in; a new one is
+                created if None
+            **cache_options: PredictionCache arguments used when cache is None
+        """
+        if cache is None:
+            from .optimizer import PredictionCache
+            cache = PredictionCache(**cache_options)
+        self.cache = cache
+        self.ttl_ms = cache.ttl_ms
+
+    def get_entry(self, key: str) -> Optional[Tuple[Any, Optional[float]]]:
+        value = self.cache._get_hashed(key)
+        if value is None:
+            return None
+        return value, self.cache._expires_at(key)
+
+    def set(
+        self,
+        key: str,
+        value: Any,
+        ttl_ms: Optional[float] = None,
+        tags: Optional[Iterable[str]] = None
+    ) -> None:
+        self.cache._set_hashed(key, value, ttl_ms, tags)
+
+    def delete(self, key: str) -> bool:
+        return self.cache._delete_hashed(key)
+
+    def invalidate_tag(self, tag: str) -> int:
+        return self.cache.invalidate_tag(tag)
+
+    def clear(self) -> None:
+        self.cache.clear()
+
+    def size(self) -> int:
+        return self.cache.size()
+
+    def bytes_used(self) -> int:
+        return self.cache.bytes_used()
+
+    def cleanup_expired(self) -> int:
+        return self.cache.cleanup_expired()
@@ -0,0 +1,881 @@
+"""
+Request Batching
+================
+
+Groups individual requests into batches to improve throughput.
+
+A batch is released as soon as it is full, or once its oldest request has
+waited max_wait_time_ms. Time-based flushes are driven by one long-lived
+dispatcher thread per batcher that sleeps on a condition variable until
+the current batch's deadline, so adding a request never starts a thread.
+
+Two ways to use it:
+- add(request) with a callback that receives each batch as a list
+- submit(item) with a processor that maps a list of items to a list of
+  results; each caller gets a Future for its own result (asubmit() is the
+  asyncio equivalent)
+
+Requests can be split into priority lanes (e.g. interactive lookups and
+bulk backfill). Each lane forms its own batches, and the dispatcher always
+processes the highest-priority batch that is ready. A request may carry a
+deadline: its batch is flushed early enough to meet it, and a request whose
+deadline has passed before processing is dropped (its future fails with
+DeadlineExceededError).
+
+The number of pending requests can be bounded. When the bound is reached a
+new request either blocks until there is room (optionally with a timeout),
+is rejected with QueueFullError, or displaces the oldest pending request of
+the lowest-priority lane. Batches are processed by a small pool of
+dispatcher threads, never while the batcher lock is held.
+
+With an AdaptiveBatchController the batch size and wait window are retuned
+after every batch: the size grows additively while batches finish within a
+target latency and halves when they do not, and the wait window follows
+the time the observed arrival rate needs to fill a batch.
+
+Usage:
+    from performance.batching import RequestBatcher
+
+    batcher = RequestBatcher(max_batch_size=32, max_wait_time_ms=20,
+                             processor=lambda prompts: [run(p) for p in prompts],
+                             lanes=("interactive", "bulk"))
+    result = batcher.submit(prompt, lane="interactive", deadline_ms=500).result()
+"""
+
+import asyncio
+import logging
+import time
+import weakref
+from collections import deque
+from concurrent.futures import Future
+from threading import Condition, Lock, Thread
+from typing import Any, Callable, Deque, Dict, List, Optional, Sequence, Tuple
+
+from .stats import LatencyHistogram
+
+logger = logging.getLogger(__name__)
+
+
+class DeadlineExceededError(TimeoutError):
+    """A batched request's deadline passed before it was processed."""
+
+
+class QueueFullError(RuntimeError):
+    """A request was rejected or shed because the batcher's queue was full."""
+
+
+OVERFLOW_POLICIES = ("block", "reject", "drop_oldest")
+
+
+class _Batch:
+    """A detached batch of one lane, ready to be processed."""
+
+    __slots__ = ("lane", "requests", "futures", "deadlines", "enqueued_at")
+
+    def __init__(self, lane: "_Lane"):
+        self.lane = lane
+        self.requests: List[Any] = []
+        # Per request: future (submit() only), deadline and enqueue time,
+        # both in time.monotonic() seconds
+        self.futures: List[Optional[Future]] = []
+        self.deadlines: List[Optional[float]] = []
+        self.enqueued_at: List[float] = []
+
+
+class _Lane:
+    """Pending requests of one priority class."""
+
+    def __init__(self, name: str, priority: int):
+        self.name = name
+        self.priority = priority
+        self.current = _Batch(self)
+        self.ready: Deque[_Batch] = deque()
+        # When the current batch must be flushed (monotonic seconds)
+        self.flush_at: Optional[float] = None
+        self.latency = LatencyHistogram()
+        self.dropped = 0
+        self.shed = 0
+
+    def take(self) -> _Batch:
+        batch, self.current = self.current, _Batch(self)
+        self.flush_at = None
+        return batch
+
+    def pending(self) -> int:
+        return len(self.current.requests) + sum(len(batch.requests) for batch in self.ready)
+
+
+class RequestBatcher:
+    """
+    Batches requests together to improve throughput.
+
+    Features:
+    - Automatic flushing based on size or time
+    - Wait time measured from the first request in a batch, so a steady
+      trickle of requests still flushes on time
+    - Per-request results through futures when a processor is given
+    - Priority lanes with separate queues
+    - Per-request deadlines: early flushes, and dropping of expired requests
+    - Optional bound on pending requests with block, reject or drop-oldest
+      overflow handling
+    - A pool of dispatcher threads (one by default), started on first use
+    - Optional adaptive batch size and wait window
+    - Thread-safe batch management
+    """
+
+    # Weight of the newest sample in the batch latency estimate used to
+    # flush ahead of deadlines
+    LATENCY_SMOOTHING = 0.2
+
+    # Extra lead before a request's deadline when flushing for it, to
+    # absorb dispatcher wake-up jitter
+    DEADLINE_SLACK_S = 0.005
+
+    def __init__(
+        self,
+        max_batch_size: int = 100,
+        max_wait_time_ms: int = 50,
+        callback: Optional[Callable] = None,
+        processor: Optional[Callable[[List[Any]], Sequence[Any]]] = None,
+        controller: Optional["AdaptiveBatchController"] = None,
+        lanes: Sequence[str] = ("default",),
+        max_pending: Optional[int] = None,
+        overflow: str = "block",
+        block_timeout_ms: Optional[float] = None,
+        workers: int = 1
+    ):
+        """
+        Initialize the request batcher.
+
+        Args:
+            max_batch_size: Maximum requests per batch
+            max_wait_time_ms: Maximum time the first request of a batch waits
+                before the batch is processed
+            callback: Optional callback function to call when batch is ready
+            processor: Function mapping a batch of items to a list of results
+                in the same order, required by submit(). A result that is an
+                exception instance fails only that item's future.
+            controller: Optional AdaptiveBatchController that retunes
+                max_batch_size and max_wait_time_ms after every batch
+            lanes: Priority lane names, highest priority first. Requests
+                without a lane go to the first one.
+            max_pending: Maximum requests queued and not yet being processed
+                (None for unbounded)
+            overflow: What a new request does when max_pending is reached:
+                "block" until there is room, "reject" with QueueFullError,
+                or "drop_oldest" to shed the oldest request of the
+                lowest-priority non-empty lane (its future fails with
+                QueueFullError)
+            block_timeout_ms: Longest a "block" caller waits before getting
+                QueueFullError (None waits indefinitely)
+            workers: Number of dispatcher threads processing batches. With
+                more than one, batches may complete out of order.
+
+        Raises:
+            ValueError: If no lanes are given or the overflow policy is unknown
+        """
+        if not lanes:
+            raise ValueError("At least one lane is required")
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(
+                f"Unknown overflow policy: {overflow} "
+                f"(expected one of {', '.join(OVERFLOW_POLICIES)})"
+            )
+
+        self.max_batch_size = max_batch_size
+        self.max_wait_time_ms = max_wait_time_ms
+        self.callback = callback
+        self.processor = processor
+        self.controller = controller
+        if controller is not None:
+            self.max_batch_size = controller.batch_size
+            self.max_wait_time_ms = controller.wait_ms
+        self.lanes = [_Lane(name, priority) for priority, name in enumerate(lanes)]
+        self.lanes_by_name = {lane.name: lane for lane in self.lanes}
+        self.max_pending = max_pending
+        self.overflow = overflow
+        self.block_timeout_ms = block_timeout_ms
+        self.workers = max(1, workers)
+        mutex = Lock()
+        self.condition = Condition(mutex)
+        self.not_full = Condition(mutex)
+        self.lock = self.condition
+        self.dispatchers: List[BatchDispatcher] = []
+        self.closed = False
+        self.pending_count = 0
+        self.rejected = 0
+        self.batches = 0
+        self.batched_items = 0
+        self.latency_estimate_s = 0.0
+
+    @property
+    def current_batch(self) -> List[Any]:
+        """Requests pending in the first lane's current batch."""
+        return self.lanes[0].current.requests
+
+    def add(
+        self,
+        request: Any,
+        lane: Optional[str] = None,
+        deadline_ms: Optional[float] = None
+    ) -> Optional[List[Any]]:
+        """
+        Add a request to the current batch.
+
+        A batch filled by this call is handed to the dispatcher threads,
+        which pass it to the callback (and the processor, if any); the
+        calling thread never runs them.
+
+        Args:
+            request: Request to add to batch
+            lane: Priority lane (default: the first lane)
+            deadline_ms: Time budget in milliseconds from now; the request is
+                dropped if it cannot be processed in time
+
+        Returns:
+            The batch this request completed (already queued for
+            processing), None otherwise
+
+        Raises:
+            QueueFullError: If the queue is full and the overflow policy
+                rejects the request
+            RuntimeError: If the batcher is closed
+        """
+        with self.condition:
+            if self.closed:
+                raise RuntimeError("Cannot add to a closed batcher")
+            self._make_room()
+            batch = self._append(request, None, lane, deadline_ms)
+            if batch is None:
+                return None
+            # Copied: a drop_oldest overflow may shed from the queued batch
+            requests = list(batch.requests)
+            self._queue_ready(batch)
+        return requests
+
+    def submit(
+        self,
+        item: Any,
+        lane: Optional[str] = None,
+        deadline_ms: Optional[float] = None
+    ) -> Future:
+        """
+        Add an item to the current batch and get a future for its result.
+
+        Batches are processed on the dispatcher thread, so this never blocks
+        on the processor. Cancelling the future before its batch starts
+        removes the item from the batch.
+
+        Args:
+            item: Item to pass to the processor
+            lane: Priority lane (default: the first lane)
+            deadline_ms: Time budget in milliseconds from now. The batch is
+                flushed early enough to meet it; if it passes before the
+                batch starts, the future fails with DeadlineExceededError.
+
+        Returns:
+            Future resolved with the processor's result for this item, or
+            failed with the exception it raised
+
+        Raises:
+            ValueError: If the batcher has no processor or the lane is unknown
+            QueueFullError: If the queue is full and the overflow policy
+                rejects the request
+            RuntimeError: If the batcher is closed
+        """
+        return self._submit(item, lane, deadline_ms, block=True)
+
+    def _submit(
+        self,
+        item: Any,
+        lane: Optional[str],
+        deadline_ms: Optional[float],
+        block: bool
+    ) -> Optional[Future]:
+        """
+        Enqueue an item for submit() and asubmit().
+
+        Returns:
+            The item's future, or None if block is False and the item would
+            have to wait for room under the "block" overflow policy
+        """
+        if self.processor is None:
+            raise ValueError("submit() requires a batcher created with a processor")
+
+        future: Future = Future()
+        with self.condition:
+            if self.closed:
+                raise RuntimeError("Cannot submit to a closed batcher")
+            if not self._make_room(block):
+                return None
+            batch = self._append(item, future, lane, deadline_ms)
+            if batch is not None:
+                self._queue_ready(batch)
+        return future
+
+    def _queue_ready(self, batch: _Batch) -> None:
+        """Queue a full batch for the dispatchers (caller holds the lock)."""
+        batch.lane.ready.append(batch)
+        self._start_dispatcher()
+        self.condition.notify()
+
+    async def asubmit(
+        self,
+        item: Any,
+        lane: Optional[str] = None,
+        deadline_ms: Optional[float] = None
+    ) -> Any:
+        """
+        Submit an item and await its result without blocking the event loop.
+
+        If the queue is full under the "block" overflow policy, the wait
+        for room happens on a worker thread rather than the event loop.
+
+        Args:
+            item: Item to pass to the processor
+            lane: Priority lane (default: the first lane)
+            deadline_ms: Time budget in milliseconds from now
+
+        Returns:
+            The processor's result for this item
+        """
+        future = self._submit(item, lane, deadline_ms, block=False)
+        if future is None:
+            future = await asyncio.to_thread(self.submit, item, lane, deadline_ms)
+        return await asyncio.wrap_future(future)
+
+    def _lane(self, name: Optional[str]) -> _Lane:
+        if name is None:
+            return self.lanes[0]
+        try:
+            return self.lanes_by_name[name]
+        except KeyError:
+            raise ValueError(f"Unknown batching lane: {name}")
+
+    def _make_room(self, block: bool = True) -> bool:
+        """
+        Apply the overflow policy if the queue is full (caller holds the lock).
+
+        Args:
+            block: Whether the "block" policy may wait for room
+
+        Returns:
+            True if there is room, False if there is none and block is False
+
+        Raises:
+            QueueFullError: If the request must be rejected
+        """
+        if self.max_pending is None or self.pending_count < self.max_pending:
+            return True
+
+        if self.overflow == "drop_oldest":
+            self._shed_oldest()
+            return True
+
+        if self.overflow == "block":
+            if not block:
+                return False
+            timeout = self.block_timeout_ms / 1000.0 if self.block_timeout_ms is not None else None
+            # Waits on not_full release the lock, so dispatchers keep going
+            if self.not_full.wait_for(
+                lambda: self.pending_count < self.max_pending or self.closed,
+                timeout
+            ):
+                if self.closed:
+                    raise RuntimeError("Cannot add to a closed batcher")
+                return True
+
+        self.rejected += 1
+        raise QueueFullError(f"Batcher queue is full ({self.max_pending} pending requests)")
+
+    def _shed_oldest(self) -> None:
+        """Drop the oldest request of the lowest-priority non-empty lane."""
+        for lane in reversed(self.lanes):
+            batch = lane.ready[0] if lane.ready else lane.current
+            if not batch.requests:
+                continue
+
+            future = batch.futures.pop(0)
+            del batch.requests[0], batch.deadlines[0], batch.enqueued_at[0]
+            if lane.ready:
+                if not batch.requests:
+                    lane.ready.popleft()
+            else:
+                # The shed request may have set the flush time; a later one
+                # never needs to flush sooner, so no dispatcher is woken
+                lane.flush_at = self._flush_time(batch)
+            self.pending_count -= 1
+            lane.shed += 1
+            if future is not None and future.set_running_or_notify_cancel():
+                future.set_exception(QueueFullError(
+                    "Shed from a full batcher queue to make room for a newer request"
+                ))
+            return
+
+    def _flush_time(self, batch: _Batch) -> Optional[float]:
+        """When a lane's current batch must be flushed, or None if it is empty."""
+        if not batch.requests:
+            return None
+        flush_at = batch.enqueued_at[0] + self.max_wait_time_ms / 1000.0
+        for deadline in batch.deadlines:
+            if deadline is not None:
+                flush_at = min(
+                    flush_at, deadline - self.latency_estimate_s - self.DEADLINE_SLACK_S
+                )
+        return flush_at
+
+    def _detached(self, batch: _Batch) -> None:
+        """Account for a batch leaving the queue (caller holds the lock)."""
+        self.pending_count -= len(batch.requests)
+        self.not_full.notify_all()
+        if self.workers > 1:
+            # Let an idle dispatcher pick up whatever else is ready
+            self.condition.notify()
+
+    def _append(
+        self,
+        request: Any,
+        future: Optional[Future],
+        lane_name: Optional[str],
+        deadline_ms: Optional[float]
+    ) -> Optional[_Batch]:
+        """
+        Append a request (caller holds the lock).
+
+        Returns:
+            The detached batch if it is now full, None otherwise
+        """
+        lane = self._lane(lane_name)
+        now = time.monotonic()
+        deadline = now + deadline_ms / 1000.0 if deadline_ms is not None else None
+
+        batch = lane.current
+        batch.requests.append(request)
+        batch.futures.append(future)
+        batch.deadlines.append(deadline)
+        batch.enqueued_at.append(now)
+        self.pending_count += 1
+        if self.controller is not None:
+            self.controller.record_arrival()
+
+        # Check if batch is full
+        if len(batch.requests) >= self.max_batch_size:
+            return lane.take()
+
+        flush_at = lane.flush_at
+        if len(batch.requests) == 1:
+            # The first request starts the clock for the whole batch
+            flush_at = now + self.max_wait_time_ms / 1000.0
+        if deadline is not None:
+            # Leave time to process the batch before the deadline
+            flush_at = min(
+                flush_at, deadline - self.latency_estimate_s - self.DEADLINE_SLACK_S
+            )
+        if flush_at != lane.flush_at:
+            lane.flush_at = flush_at
+            self._start_dispatcher()
+            self.condition.notify()
+
+        return None
+
+    def _start_dispatcher(self) -> None:
+        """Start the dispatcher threads if needed (caller holds the lock)."""
+        while len(self.dispatchers) < self.workers and not self.closed:
+            dispatcher = BatchDispatcher(self)
+            self.dispatchers.append(dispatcher)
+            dispatcher.start()
+
+    def _next_batch(self) -> Tuple[Optional[_Batch], Optional[float]]:
+        """
+        Get the next batch the dispatcher should process.
+
+        Lanes are visited in priority order; within a lane a full batch
+        comes before one whose flush time has come. Called by the
+        dispatcher with the lock held.
+
+        Returns:
+            Tuple of (batch or None, seconds until the earliest flush time
+            or None if nothing is pending)
+        """
+        now = time.monotonic()
+        timeout = None
+        for lane in self.lanes:
+            if lane.ready:
+                batch = lane.ready.popleft()
+                self._detached(batch)
+                return batch, None
+            if lane.flush_at is None:
+                continue
+            remaining = lane.flush_at - now
+            if remaining <= 0:
+                batch = lane.take()
+                self._detached(batch)
+                return batch, None
+            timeout = remaining if timeout is None else min(timeout, remaining)
+        return None, timeout
+
+    def _dispatch(self, batch: _Batch) -> None:
+        """Process a detached batch and feed its latency to the controller."""
+        started = time.perf_counter()
+        try:
+            self._run_batch(batch)
+        finally:
+            elapsed = time.perf_counter() - started
+            finished = time.monotonic()
+            for enqueued_at in batch.enqueued_at:
+                batch.lane.latency.record(int((finished - enqueued_at) * 1e9))
+            with self.condition:
+                self.batches += 1
+                self.batched_items += len(batch.requests)
+                self.latency_estimate_s += self.LATENCY_SMOOTHING * (
+                    elapsed - self.latency_estimate_s
+                )
+            if self.controller is not None:
+                batch_size, wait_ms = self.controller.record_batch(len(batch.requests), elapsed)
+                with self.condition:
+                    self.max_batch_size = batch_size
+                    self.max_wait_time_ms = wait_ms
+
+    def _run_batch(self, batch: _Batch) -> None:
+        """Pass a detached batch to the callback and processor."""
+        requests, futures = batch.requests, batch.futures
+
+        # Drop requests that can no longer meet their deadline, and those
+        # whose callers cancelled before the batch started
+        now = time.monotonic()
+        live = []
+        for index, (future, deadline) in enumerate(zip(futures, batch.deadlines)):
+            if future is not None and not future.set_running_or_notify_cancel():
+                continue
+            if deadline is not None and deadline <= now:
+                batch.lane.dropped += 1
+                if future is not None:
+                    future.set_exception(DeadlineExceededError(
+                        f"Deadline passed {(now - deadline) * 1000:.1f}ms before "
+                        f"the batch started"
+                    ))
+                continue
+            live.append(index)
+
+        if len(live) < len(requests):
+            requests = [requests[index] for index in live]
+            futures = [futures[index] for index in live]
+
+        if not requests:
+            return
+
+        try:
+            if self.callback:
+                self.callback(requests)
+            if self.processor is None:
+                return
+            results = list(self.processor(requests))
+            if len(results) != len(requests):
+                raise ValueError(
+                    f"Batch processor returned {len(results)} results "
+                    f"for {len(requests)} items"
+                )
+        except Exception as e:
+            logger.exception("Error processing batch of %d requests", len(requests))
+            for future in futures:
+                if future is not None:
+                    future.set_exception(e)
+            return
+
+        for future, result in zip(futures, results):
+            if future is None:
+                continue
+            if isinstance(result, BaseException):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    def flush(self) -> List[Any]:
+        """
+        Manually flush the current batch of every lane.
+
+        Futures of submit()ted requests in the flushed batches are
+        cancelled; the requests are returned for the caller to process.
+
+        Returns:
+            Current batch (all lanes, highest priority first)
+        """
+        with self.condition:
+            batches = [lane.take() for lane in self.lanes]
+            for batch in batches:
+                self._detached(batch)
+        return self._cancel(batches)
+
+    @staticmethod
+    def _cancel(batches: List[_Batch]) -> List[Any]:
+        """Cancel the batches' futures and return their requests."""
+        requests = []
+        for batch in batches:
+            for future in batch.futures:
+                if future is not None:
+                    future.cancel()
+            requests.extend(batch.requests)
+        return requests
+
+    def size(self) -> int:
+        """Get current batch size (summed over lanes)."""
+        with self.condition:
+            return sum(len(lane.current.requests) for lane in self.lanes)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get batching statistics.
+
+        Returns:
+            Dictionary with the queue depth (pending requests), its bound,
+            rejected and shed request counts, processed batch and item
+            counts, requests dropped past their deadline, the current size
+            and wait limits, per-lane counts and latency summaries (enqueue
+            to result) and, with a controller, its observations
+        """
+        with self.condition:
+            stats = {
+                "pending": self.pending_count,
+                "max_pending": self.max_pending,
+                "rejected": self.rejected,
+                "shed": sum(lane.shed for lane in self.lanes),
+                "batches": self.batches,
+                "batched_items": self.batched_items,
+                "dropped": sum(lane.dropped for lane in self.lanes),
+                "max_batch_size": self.max_batch_size,
+                "max_wait_time_ms": self.max_wait_time_ms,
+                "workers": self.workers,
+            }
+            lanes = {
+                lane.name: {
+                    "pending": lane.pending(),
+                    "dropped": lane.dropped,
+                    "shed": lane.shed,
+                }
+                for lane in self.lanes
+            }
+        for lane in self.lanes:
+            lanes[lane.name]["latency"] = lane.latency.snapshot()
+        stats["lanes"] = lanes
+        if self.controller is not None:
+            stats.update(self.controller.get_stats())
+        return stats
+
+    def close(self) -> List[Any]:
+        """
+        Stop the dispatcher threads.
+
+        Batches already being processed are finished. Requests still
+        pending are not processed and their futures are cancelled; they
+        are returned so the caller can process them. Callers blocked on a
+        full queue get RuntimeError.
+
+        Returns:
+            Requests that were pending
+        """
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+            dispatchers, self.dispatchers = self.dispatchers, []
+            batches = []
+            for lane in self.lanes:
+                batches.extend(lane.ready)
+                lane.ready.clear()
+                batches.append(lane.take())
+            for batch in batches:
+                self._detached(batch)
+        for dispatcher in dispatchers:
+            dispatcher.join()
+        return self._cancel(batches)
+
+
+class BatchDispatcher(Thread):
+    """
+    Daemon thread that processes ready batches and flushes a RequestBatcher
+    when its deadline passes.
+
+    Only a weak reference to the batcher is held between batches, so an
+    abandoned batcher is garbage collected and its dispatcher exits.
+    """
+
+    # Longest sleep while no batch is pending, so an abandoned batcher
+    # is noticed within this many seconds
+    IDLE_WAIT_S = 1.0
+
+    def __init__(self, batcher: RequestBatcher):
+        """
+        Initialize the dispatcher.
+
+        Args:
+            batcher: Batcher to flush
+        """
+        super().__init__(name="request-batcher", daemon=True)
+        self.batcher_ref = weakref.ref(batcher)
+        self.condition = batcher.condition
+
+    def run(self) -> None:
+        """Process batches until the batcher is closed or collected."""
+        while True:
+            with self.condition:
+                batcher = self.batcher_ref()
+                if batcher is None or batcher.closed:
+                    return
+                batch, timeout = batcher._next_batch()
+                if batch is None:
+                    del batcher
+                    self.condition.wait(
+                        timeout if timeout is not None else self.IDLE_WAIT_S
+                    )
+                    continue
+
+            # Process outside the lock so producers are never blocked
+            try:
+                batcher._dispatch(batch)
+            except Exception:
+                # Keep the dispatcher alive for later batches
+                logger.exception("Error dispatching batch")
+            del batcher
+
+
+class AdaptiveBatchController:
+    """
+    AIMD controller for a RequestBatcher's batch size and wait window.
+
+    After every batch:
+    - If the batch took longer than target_latency_ms, the batch size is
+      multiplied by decrease_factor (multiplicative decrease). Batches
+      formed under an earlier, larger limit are ignored, so a backlog of
+      them causes one decrease rather than many
+    - Otherwise, if the batch was full, the batch size grows by
+      increase_step (additive increase); a partly filled batch leaves it
+      unchanged since a larger limit would not have been used
+    - The wait window is set to the time the smoothed arrival rate needs to
+      fill a batch, capped so that waiting plus the smoothed batch latency
+      stays within the target. When fewer than one more request is expected
+      within max_wait_ms, it drops to min_wait_ms
+
+    All values stay within the configured bounds. Thread-safe.
+    """
+
+    # Weight of the newest sample in the moving averages
+    SMOOTHING = 0.2
+
+    # Shortest span over which an arrival rate sample is taken
+    RATE_WINDOW_S = 0.1
+
+    def __init__(
+        self,
+        min_batch_size: int = 1,
+        max_batch_size: int = 100,
+        min_wait_ms: float = 1,
+        max_wait_ms: float = 50,
+        target_latency_ms: float = 500,
+        increase_step: Optional[int] = None,
+        decrease_factor: float = 0.5
+    ):
+        """
+        Initialize the controller.
+
+        The batch size starts at max_batch_size and the wait window at
+        max_wait_ms, i.e. the static configuration.
+
+        Args:
+            min_batch_size: Smallest batch size limit
+            max_batch_size: Largest batch size limit
+            min_wait_ms: Shortest wait window in milliseconds
+            max_wait_ms: Longest wait window in milliseconds
+            target_latency_ms: Batch processing time to stay under
+            increase_step: Additive increase per full batch (default: 5% of
+                max_batch_size, at least 1)
+            decrease_factor: Multiplier applied on a slow batch (0 to 1)
+        """
+        self.min_batch_size = max(1, min_batch_size)
+        self.max_batch_size = max(self.min_batch_size, max_batch_size)
+        self.min_wait_ms = min_wait_ms
+        self.max_wait_ms = max(min_wait_ms, max_wait_ms)
+        self.target_latency_ms = target_latency_ms
+        self.increase_step = increase_step or max(1, self.max_batch_size // 20)
+        self.decrease_factor = decrease_factor
+
+        self.batch_size = self.max_batch_size
+        self.wait_ms = self.max_wait_ms
+        self.arrival_rate = 0.0
+        self.latency_ms: Optional[float] = None
+        self.increases = 0
+        self.decreases = 0
+
+        self.window_start = time.monotonic()
+        self.window_arrivals = 0
+        self.lock = Lock()
+
+    def record_arrival(self) -> None:
+        """Count one request arriving at the batcher."""
+        with self.lock:
+            self.window_arrivals += 1
+
+    def record_batch(self, size: int, elapsed_s: float) -> Tuple[int, float]:
+        """
+        Record a processed batch and retune the limits.
+
+        Args:
+            size: Number of requests in the batch
+            elapsed_s: Time spent processing the batch in seconds
+
+        Returns:
+            Tuple of (batch size limit, wait window in milliseconds)
+        """
+        latency_ms = elapsed_s * 1000
+        now = time.monotonic()
+        with self.lock:
+            window = now - self.window_start
+            if window >= self.RATE_WINDOW_S:
+                rate = self.window_arrivals / window
+                self.arrival_rate = (
+                    rate if self.arrival_rate == 0.0
+                    else self.SMOOTHING * rate + (1 - self.SMOOTHING) * self.arrival_rate
+                )
+                self.window_start = now
+                self.window_arrivals = 0
+
+            self.latency_ms = (
+                latency_ms if self.latency_ms is None
+                else self.SMOOTHING * latency_ms + (1 - self.SMOOTHING) * self.latency_ms
+            )
+
+            if latency_ms > self.target_latency_ms:
+                if size <= self.batch_size:
+                    self.batch_size = max(
+                        self.min_batch_size, int(self.batch_size * self.decrease_factor)
+                    )
+                    self.decreases += 1
+            elif size >= self.batch_size and self.batch_size < self.max_batch_size:
+                self.batch_size = min(self.max_batch_size, self.batch_size + self.increase_step)
+                self.increases += 1
+
+            if self.arrival_rate * self.max_wait_ms / 1000 < 1:
+                # Quiet: waiting would not even collect one more request
+                fill_ms = self.min_wait_ms
+            else:
+                fill_ms = self.batch_size / self.arrival_rate * 1000
+            budget_ms = self.target_latency_ms - self.latency_ms
+            self.wait_ms = max(
+                self.min_wait_ms, min(self.max_wait_ms, fill_ms, budget_ms)
+            )
+            return self.batch_size, self.wait_ms
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get the controller's current limits and observations.
+
+        Returns:
+            Dictionary with the arrival rate (requests/s), smoothed batch
+            latency and the number of increases and decreases
+        """
+        with self.lock:
+            return {
+                "arrival_rate": round(self.arrival_rate, 3),
+                "batch_latency_ms": round(self.latency_ms or 0.0, 3),
+                "target_latency_ms": self.target_latency_ms,
+                "size_increases": self.increases,
+                "size_decreases": self.decreases,
+            }
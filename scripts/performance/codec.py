@@ -0,0 +1,148 @@
+"""
+Cache Value Codec
+=================
+
+Serialization of cached values for storage outside the Python heap
+(disk tier, snapshots, shared memory and remote backends), and optional
+transparent compression of values held in memory.
+
+Model outputs are almost always strings, so strings and bytes are stored
+as-is behind a one byte type tag. Anything else must be JSON serializable;
+arbitrary objects are deliberately not pickled so that cache files and
+snapshots can never execute code when loaded.
+"""
+
+import json
+import lzma
+import zlib
+from typing import Any, Optional
+
+_TAG_STR = b's'
+_TAG_BYTES = b'b'
+_TAG_JSON = b'j'
+
+
+def encode_value(value: Any) -> bytes:
+    """
+    Encode a cache value to bytes.
+
+    Args:
+        value: str, bytes or JSON-serializable value
+
+    Returns:
+        Tagged byte representation
+
+    Raises:
+        TypeError: If the value is not JSON serializable
+    """
+    if isinstance(value, str):
+        return _TAG_STR + value.encode('utf-8')
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return _TAG_BYTES + bytes(value)
+    return _TAG_JSON + json.dumps(value, ensure_ascii=False).encode('utf-8')
+
+
+def decode_value(data: bytes) -> Any:
+    """
+    Decode bytes produced by encode_value.
+
+    Args:
+        data: Tagged byte representation
+
+    Returns:
+        The original value
+
+    Raises:
+        ValueError: If the type tag is unknown
+    """
+    tag, payload = bytes(data[:1]), data[1:]
+    if tag == _TAG_STR:
+        return bytes(payload).decode('utf-8')
+    if tag == _TAG_BYTES:
+        return bytes(payload)
+    if tag == _TAG_JSON:
+        return json.loads(bytes(payload).decode('utf-8'))
+    raise ValueError(f"Unknown cache value tag: {tag!r}")
+
+
+COMPRESSION_CODECS = ("zlib", "lzma")
+
+
+class CompressedValue:
+    """
+    A str or bytes value held in compressed form.
+
+    Only the compressed payload is kept; the original value is rebuilt on
+    every read by decompress_value().
+    """
+
+    __slots__ = ("codec", "data", "is_text")
+
+    def __init__(self, codec: str, data: bytes, is_text: bool):
+        self.codec = codec
+        self.data = data
+        self.is_text = is_text
+
+
+def compress_value(
+    value: Any,
+    codec: Optional[str],
+    threshold: int = 1024,
+    level: Optional[int] = None
+) -> Any:
+    """
+    Compress a str or bytes value if it is large enough to benefit.
+
+    Args:
+        value: Value to store
+        codec: "zlib", "lzma", or None to disable compression
+        threshold: Values with fewer bytes than this are stored raw
+        level: Compression level (codec default if None)
+
+    Returns:
+        A CompressedValue, or the original value when it is not a str/bytes,
+        is below the threshold, or does not shrink
+
+    Raises:
+        ValueError: If the codec is unknown
+    """
+    if codec is None or not isinstance(value, (str, bytes)):
+        return value
+
+    is_text = isinstance(value, str)
+    raw = value.encode('utf-8') if is_text else value
+    if len(raw) < threshold:
+        return value
+
+    if codec == "zlib":
+        data = zlib.compress(raw, -1 if level is None else level)
+    elif codec == "lzma":
+        data = lzma.compress(raw, preset=6 if level is None else level)
+    else:
+        raise ValueError(
+            f"Unknown compression codec '{codec}'. Available: {', '.join(COMPRESSION_CODECS)}"
+        )
+
+    if len(data) >= len(raw):
+        return value
+    return CompressedValue(codec, data, is_text)
+
+
+def decompress_value(value: Any) -> Any:
+    """
+    Restore a value produced by compress_value.
+
+    Args:
+        value: A CompressedValue or any raw value
+
+    Returns:
+        The original value
+    """
+    if not isinstance(value, CompressedValue):
+        return value
+
+    if value.codec == "zlib":
+        raw = zlib.decompress(value.data)
+    else:
+        raw = lzma.decompress(value.data)
+    return raw.decode('utf-8') if value.is_text else raw
@@ -0,0 +1,354 @@
+"""
+Persistent Disk Cache Tier
+==========================
+
+SQLite-backed second cache tier that survives process restarts. It sits
+behind the in-memory PredictionCache so that a warm Lambda container
+(`/tmp`) or a batch host's local disk can absorb repeat documents without
+calling Bedrock again.
+
+Usage:
+    from performance.disk_cache import DiskCache
+
+    l2 = DiskCache("/tmp/prediction-cache.sqlite3", ttl_ms=86400000)
+    l2.set("hashed_key", "generated context")
+    value = l2.get("hashed_key")
+"""
+
+import sqlite3
+import time
+from pathlib import Path
+from threading import Lock
+from typing import Any, Dict, Iterable, Optional, Sequence, Tuple
+
+from .backends import CacheBackend
+from .codec import encode_value, decode_value
+
+
+class DiskCache(CacheBackend):
+    """
+    Persistent cache tier stored in a SQLite database in WAL mode.
+
+    Features:
+    - Entries survive process restarts
+    - Time-to-live (TTL) based on wall-clock time, with per-entry overrides
+    - Tags per entry and bulk invalidation by tag
+    - Bounded on-disk size with least-recently-accessed eviction
+    - Thread-safe operations
+    """
+
+    # Fraction of max_bytes to shrink to once the budget is exceeded, so
+    # eviction runs in occasional batches rather than on every write
+    EVICTION_LOW_WATERMARK = 0.9
+
+    name = "disk"
+
+    def __init__(
+        self,
+        path: str,
+        ttl_ms: int = 300000,
+        max_bytes: int = 256 * 1024 * 1024
+    ):
+        """
+        Initialize the disk cache.
+
+        Args:
+            path: Path to the SQLite database file (created if missing)
+            ttl_ms: Time-to-live in milliseconds
+            max_bytes: Maximum total size of stored values in bytes
+        """
+        self.path = str(path)
+        self.ttl_ms = ttl_ms
+        self.max_bytes = max_bytes
+        self.lock = Lock()
+
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(
+            self.path,
+            check_same_thread=False,
+            isolation_level=None
+        )
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " key TEXT PRIMARY KEY,"
+            " value BLOB NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " expires_at REAL NOT NULL,"
+            " accessed_at REAL NOT NULL)"
+        )
+        self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS entries_accessed_at ON entries (accessed_at)"
+        )
+        self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS entries_expires_at ON entries (expires_at)"
+        )
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS tags ("
+            " tag TEXT NOT NULL,"
+            " key TEXT NOT NULL,"
+            " PRIMARY KEY (tag, key))"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS tags_key ON tags (key)")
+        self.total_bytes = self._measure_bytes()
+
+    def _measure_bytes(self) -> int:
+        """Sum the stored value sizes."""
+        return int(self.conn.execute("SELECT total(size) FROM entries").fetchone()[0])
+
+    def get_entry(self, key: str) -> Optional[Tuple[Any, float]]:
+        """
+        Get a value together with its expiry time.
+
+        Args:
+            key: Cache key (already hashed by the caller)
+
+        Returns:
+            Tuple of (value, expires_at in epoch milliseconds), or None if
+            not found or expired
+        """
+        now = time.time() * 1000
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT value, size, expires_at FROM entries WHERE key = ?",
+                (key,)
+            ).fetchone()
+
+            if row is None:
+                return None
+
+            data, size, expires_at = row
+            if expires_at <= now:
+                self.conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                self.conn.execute("DELETE FROM tags WHERE key = ?", (key,))
+                self.total_bytes -= size
+                return None
+
+            self.conn.execute(
+                "UPDATE entries SET accessed_at = ? WHERE key = ?",
+                (now, key)
+            )
+
+        return decode_value(data), expires_at
+
+    def get_many(
+        self,
+        keys: Sequence[str]
+    ) -> Dict[str, Tuple[Any, float]]:
+        """
+        Get several entries with one query.
+
+        Args:
+            keys: Cache keys (already hashed by the caller)
+
+        Returns:
+            Dictionary mapping each found, unexpired key to
+            (value, expires_at in epoch milliseconds)
+        """
+        if not keys:
+            return {}
+
+        now = time.time() * 1000
+        entries = {}
+        with self.lock:
+            # Stay well under SQLite's bound-parameter limit
+            for start in range(0, len(keys), 500):
+                chunk = list(keys[start:start + 500])
+                placeholders = ",".join("?" * len(chunk))
+                rows = self.conn.execute(
+                    f"SELECT key, value, expires_at FROM entries"
+                    f" WHERE key IN ({placeholders}) AND expires_at > ?",
+                    (*chunk, now)
+                ).fetchall()
+                if rows:
+                    self.conn.executemany(
+                        "UPDATE entries SET accessed_at = ? WHERE key = ?",
+                        [(now, key) for key, _, _ in rows]
+                    )
+                for key, data, expires_at in rows:
+                    entries[key] = (data, expires_at)
+
+        return {
+            key: (decode_value(data), expires_at)
+            for key, (data, expires_at) in entries.items()
+        }
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Get a value from the disk cache.
+
+        Args:
+            key: Cache key (already hashed by the caller)
+
+        Returns:
+            Cached value or None if not found or expired
+        """
+        entry = self.get_entry(key)
+        return entry[0] if entry is not None else None
+
+    def set(
+        self,
+        key: str,
+        value: Any,
+        ttl_ms: Optional[float] = None,
+        tags: Optional[Iterable[str]] = None
+    ) -> None:
+        """
+        Set a value in the disk cache.
+
+        Args:
+            key: Cache key (already hashed by the caller)
+            value: str, bytes or JSON-serializable value
+            ttl_ms: Time-to-live for this entry (cache-wide TTL if None)
+            tags: Tags for bulk invalidation; replaces any previous tags
+        """
+        data = encode_value(value)
+        now = time.time() * 1000
+        if ttl_ms is None:
+            ttl_ms = self.ttl_ms
+
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT size FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            self.conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, size, expires_at, accessed_at)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (key, data, len(data), now + ttl_ms, now)
+            )
+            self.total_bytes += len(data) - (row[0] if row else 0)
+            if row is not None:
+                self.conn.execute("DELETE FROM tags WHERE key = ?", (key,))
+            if tags:
+                self.conn.executemany(
+                    "INSERT OR IGNORE INTO tags (tag, key) VALUES (?, ?)",
+                    [(tag, key) for tag in set(tags)]
+                )
+
+            if self.total_bytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self) -> None:
+        """Drop expired, then least recently accessed, entries until under budget."""
+        now = time.time() * 1000
+        self.conn.execute("DELETE FROM entries WHERE expires_at <= ?", (now,))
+        # Other processes may share the file, so re-measure before evicting
+        self.total_bytes = self._measure_bytes()
+
+        target = self.max_bytes * self.EVICTION_LOW_WATERMARK
+        while self.total_bytes > target:
+            rows = self.conn.execute(
+                "SELECT key, size FROM entries ORDER BY accessed_at LIMIT 256"
+            ).fetchall()
+            if not rows:
+                break
+
+            victims = []
+            for key, size in rows:
+                victims.append((key,))
+                self.total_bytes -= size
+                if self.total_bytes <= target:
+                    break
+            self.conn.executemany("DELETE FROM entries WHERE key = ?", victims)
+
+        self._delete_orphan_tags()
+
+    def _delete_orphan_tags(self) -> None:
+        """Drop tag rows whose entries were removed in bulk."""
+        self.conn.execute(
+            "DELETE FROM tags WHERE key NOT IN (SELECT key FROM entries)"
+        )
+
+    def delete(self, key: str) -> bool:
+        """
+        Remove a single entry.
+
+        Args:
+            key: Cache key (already hashed by the caller)
+
+        Returns:
+            True if an entry was removed
+        """
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT size FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return False
+            self.conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            self.conn.execute("DELETE FROM tags WHERE key = ?", (key,))
+            self.total_bytes -= row[0]
+            return True
+
+    def invalidate_tag(self, tag: str) -> int:
+        """
+        Remove every entry carrying a tag.
+
+        Args:
+            tag: Tag to invalidate
+
+        Returns:
+            Number of entries removed
+        """
+        with self.lock:
+            keys = [
+                row[0] for row in self.conn.execute(
+                    "SELECT key FROM tags WHERE tag = ?", (tag,)
+                )
+            ]
+            if not keys:
+                return 0
+
+            self.conn.execute("BEGIN")
+            removed = 0
+            for key in keys:
+                row = self.conn.execute(
+                    "SELECT size FROM entries WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    self.conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                    self.total_bytes -= row[0]
+                    removed += 1
+                self.conn.execute("DELETE FROM tags WHERE key = ?", (key,))
+            self.conn.execute("COMMIT")
+            return removed
+
+    def clear(self) -> None:
+        """Clear all cache entries."""
+        with self.lock:
+            self.conn.execute("DELETE FROM entries")
+            self.conn.execute("DELETE FROM tags")
+            self.total_bytes = 0
+
+    def size(self) -> int:
+        """Get current number of stored entries."""
+        with self.lock:
+            return self.conn.execute("SELECT count(*) FROM entries").fetchone()[0]
+
+    def bytes_used(self) -> int:
+        """Get total size of stored values in bytes."""
+        with self.lock:
+            return self.total_bytes
+
+    def cleanup_expired(self) -> int:
+        """
+        Remove all expired entries.
+
+        Returns:
+            Number of entries removed
+        """
+        now = time.time() * 1000
+        with self.lock:
+            cursor = self.conn.execute(
+                "DELETE FROM entries WHERE expires_at <= ?", (now,)
+            )
+            if cursor.rowcount:
+                self._delete_orphan_tags()
+            self.total_bytes = self._measure_bytes()
+            return cursor.rowcount
+
+    def close(self) -> None:
+        """Close the underlying database connection."""
+        with self.lock:
+            self.conn.close()
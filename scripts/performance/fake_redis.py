@@ -0,0 +1,304 @@
+"""
+Local Redis Stand-in
+====================
+
+Minimal in-process server speaking the Redis wire protocol, so the remote
+cache tier can be exercised in demos, benchmarks and local runs without a
+Redis install. It implements only the commands RedisBackend uses, keeps
+everything in memory and is not meant for production traffic.
+
+Usage:
+    from performance.fake_redis import FakeRedisServer
+    from performance.redis_backend import RedisBackend
+
+    with FakeRedisServer() as server:
+        remote = RedisBackend(*server.address)
+        remote.set("hashed_key", "generated context")
+"""
+
+import fnmatch
+import socket
+import socketserver
+import threading
+import time
+from typing import Any, Dict, List, Optional, Set, Tuple, Union
+
+
+class _CommandError(Exception):
+    """Error reply to send back to the client."""
+
+
+class _RESPHandler(socketserver.StreamRequestHandler):
+    """Reads RESP commands from one client and writes replies."""
+
+    def setup(self) -> None:
+        super().setup()
+        # Pipelined replies are written one by one; don't let Nagle hold them
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def _read_command(self) -> Optional[List[bytes]]:
+        line = self.rfile.readline()
+        if not line:
+            return None
+        if not line.startswith(b'*'):
+            # Inline command, e.g. typed into a telnet session
+            return line.split()
+
+        args = []
+        for _ in range(int(line[1:])):
+            length = int(self.rfile.readline()[1:])
+            args.append(self.rfile.read(length + 2)[:-2])
+        return args
+
+    def handle(self) -> None:
+        server: "_Server" = self.server  # type: ignore[assignment]
+        while True:
+            try:
+                args = self._read_command()
+            except (OSError, ValueError):
+                return
+            if not args:
+                return
+
+            name = args[0].upper().decode('utf-8', 'replace')
+            try:
+                reply = server.store.execute(name, args[1:])
+            except _CommandError as e:
+                reply = e
+            try:
+                self.wfile.write(_encode_reply(reply))
+                self.wfile.flush()
+            except OSError:
+                return
+            if name == 'QUIT':
+                return
+
+
+class _Server(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+def _encode_reply(reply: Any) -> bytes:
+    if isinstance(reply, _CommandError):
+        return b'-ERR %s\r\n' % str(reply).encode('utf-8')
+    if reply is None:
+        return b'$-1\r\n'
+    if isinstance(reply, bool):
+        return b':%d\r\n' % int(reply)
+    if isinstance(reply, int):
+        return b':%d\r\n' % reply
+    if isinstance(reply, str):
+        return b'+%s\r\n' % reply.encode('utf-8')
+    if isinstance(reply, (bytes, bytearray)):
+        return b'$%d\r\n%s\r\n' % (len(reply), bytes(reply))
+    if isinstance(reply, (list, tuple)):
+        return b'*%d\r\n' % len(reply) + b''.join(_encode_reply(item) for item in reply)
+    raise TypeError(f"Cannot encode reply of type {type(reply).__name__}")
+
+
+class _Store:
+    """Keyspace with millisecond expiry, holding strings and sets."""
+
+    def __init__(self, password: Optional[str]):
+        self.password = password
+        self.data: Dict[bytes, Union[bytes, Set[bytes]]] = {}
+        self.expires: Dict[bytes, float] = {}
+        self.lock = threading.Lock()
+
+    def _alive(self, key: bytes) -> bool:
+        expires_at = self.expires.get(key)
+        if expires_at is not None and expires_at <= time.time() * 1000:
+            del self.data[key]
+            del self.expires[key]
+        return key in self.data
+
+    def _string(self, key: bytes) -> Optional[bytes]:
+        if not self._alive(key):
+            return None
+        value = self.data[key]
+        if not isinstance(value, bytes):
+            raise _CommandError("WRONGTYPE Operation against a key holding the wrong kind of value")
+        return value
+
+    def _delete(self, key: bytes) -> bool:
+        self.expires.pop(key, None)
+        return self.data.pop(key, None) is not None
+
+    def execute(self, name: str, args: List[bytes]) -> Any:
+        handler = getattr(self, f"cmd_{name.lower()}", None)
+        if handler is None:
+            raise _CommandError(f"unknown command '{name}'")
+        with self.lock:
+            try:
+                return handler(*args)
+            except TypeError:
+                raise _CommandError(f"wrong number of arguments for '{name.lower()}' command")
+
+    def cmd_ping(self, message: Optional[bytes] = None) -> Any:
+        return message if message is not None else "PONG"
+
+    def cmd_auth(self, *args: bytes) -> str:
+        if self.password is not None and args[-1].decode('utf-8') != self.password:
+            raise _CommandError("invalid password")
+        return "OK"
+
+    def cmd_select(self, db: bytes) -> str:
+        return "OK"
+
+    def cmd_quit(self) -> str:
+        return "OK"
+
+    def cmd_get(self, key: bytes) -> Optional[bytes]:
+        return self._string(key)
+
+    def cmd_mget(self, *keys: bytes) -> List[Optional[bytes]]:
+        if not keys:
+            raise TypeError
+        return [self._string(key) for key in keys]
+
+    def cmd_set(self, key: bytes, value: bytes, *options: bytes) -> str:
+        expires_at = None
+        options_upper = [option.upper() for option in options]
+        for unit, scale in ((b'PX', 1), (b'EX', 1000)):
+            if unit in options_upper:
+                ttl = int(options[options_upper.index(unit) + 1])
+                if ttl <= 0:
+                    raise _CommandError("invalid expire time in 'set' command")
+                expires_at = time.time() * 1000 + ttl * scale
+
+        self.data[key] = value
+        if expires_at is None:
+            self.expires.pop(key, None)
+        else:
+            self.expires[key] = expires_at
+        return "OK"
+
+    def cmd_del(self, *keys: bytes) -> int:
+        if not keys:
+            raise TypeError
+        return sum(self._delete(key) for key in keys if self._alive(key))
+
+    def cmd_exists(self, *keys: bytes) -> int:
+        if not keys:
+            raise TypeError
+        return sum(self._alive(key) for key in keys)
+
+    def cmd_pttl(self, key: bytes) -> int:
+        if not self._alive(key):
+            return -2
+        expires_at = self.expires.get(key)
+        if expires_at is None:
+            return -1
+        return int(expires_at - time.time() * 1000)
+
+    def cmd_pexpire(self, key: bytes, ttl: bytes) -> int:
+        if not self._alive(key):
+            return 0
+        self.expires[key] = time.time() * 1000 + int(ttl)
+        return 1
+
+    def cmd_sadd(self, key: bytes, *members: bytes) -> int:
+        if not members:
+            raise TypeError
+        if not self._alive(key):
+            self.data[key] = set()
+        value = self.data[key]
+        if not isinstance(value, set):
+            raise _CommandError("WRONGTYPE Operation against a key holding the wrong kind of value")
+        added = len(set(members) - value)
+        value.update(members)
+        return added
+
+    def cmd_smembers(self, key: bytes) -> List[bytes]:
+        if not self._alive(key):
+            return []
+        value = self.data[key]
+        if not isinstance(value, set):
+            raise _CommandError("WRONGTYPE Operation against a key holding the wrong kind of value")
+        return sorted(value)
+
+    def cmd_scan(self, cursor: bytes, *options: bytes) -> List[Any]:
+        # The whole keyspace is returned in one page
+        pattern = b'*'
+        options_upper = [option.upper() for option in options]
+        if b'MATCH' in options_upper:
+            pattern = options[options_upper.index(b'MATCH') + 1]
+        keys = [
+            key for key in list(self.data)
+            if self._alive(key) and fnmatch.fnmatchcase(
+                key.decode('utf-8', 'replace'), pattern.decode('utf-8', 'replace')
+            )
+        ]
+        return [b'0', keys]
+
+    def cmd_dbsize(self) -> int:
+        return sum(self._alive(key) for key in list(self.data))
+
+    def cmd_flushdb(self, *options: bytes) -> str:
+        self.data.clear()
+        self.expires.clear()
+        return "OK"
+
+
+class FakeRedisServer:
+    """
+    In-process Redis wire-protocol server for local runs.
+
+    Supports PING, AUTH, SELECT, QUIT, GET, SET (PX/EX), MGET, DEL, EXISTS,
+    PTTL, PEXPIRE, SADD, SMEMBERS, SCAN, DBSIZE and FLUSHDB. All databases
+    share one keyspace. Each client connection is served by its own thread.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, password: Optional[str] = None):
+        """
+        Initialize the server (not yet listening).
+
+        Args:
+            host: Interface to bind
+            port: Port to bind (0 picks a free port)
+            password: Password clients must AUTH with (None accepts any)
+        """
+        self.host = host
+        self.port = port
+        self.password = password
+        self.server: Optional[_Server] = None
+        self.thread: Optional[threading.Thread] = None
+
+    @property
+    def address(self) -> Tuple[str, int]:
+        """Host and port the server is listening on."""
+        if self.server is None:
+            raise RuntimeError("Server is not running")
+        return self.server.server_address[:2]
+
+    def start(self) -> "FakeRedisServer":
+        """Start serving in a background thread."""
+        if self.server is not None:
+            return self
+
+        self.server = _Server((self.host, self.port), _RESPHandler)
+        self.server.store = _Store(self.password)  # type: ignore[attr-defined]
+        self.thread = threading.Thread(
+            target=self.server.serve_forever,
+            name="fake-redis",
+            daemon=True
+        )
+        self.thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop serving and close the listening socket."""
+        if self.server is None:
+            return
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+        self.server = None
+        self.thread = None
+
+    def __enter__(self) -> "FakeRedisServer":
+        return self.start()
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.stop()
@@ -3,7 +3,9 @@ Performance Optimization Utilities
 ===================================
 
 This module provides utilities for optimizing AI/ML inference performance:
-- Prediction caching with TTL
+- Prediction caching with TTL (optionally lock-striped across shards)
+- Optional persistent disk tier and shared remote (Redis) tier behind the
+  in-memory cache
 - Request batching for throughput optimization
 - Configuration management
 
@@ -24,14 +26,76 @@ Usage:
         results = process_batch(batch.get_requests())
 """
 
+import os
+import sys
 import json
 import time
 import hashlib
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Callable
-from collections import OrderedDict
-from threading import Lock, Timer
+from typing import (
+    Any, Awaitable, Callable, Dict, FrozenSet, Iterable, Iterator, List,
+    Optional, Sequence, Set, Tuple,
+)
+from threading import Event, Lock, Thread
 import asyncio
+import heapq
+import weakref
+
+from .async_cache import AsyncSingleFlight
+from .backends import CacheBackend
+from .batching import AdaptiveBatchController, RequestBatcher
+from .codec import (
+    COMPRESSION_CODECS,
+    CompressedValue,
+    compress_value,
+    decompress_value,
+)
+from .disk_cache import DiskCache
+from .policies import make_policy
+from .redis_backend import RedisBackend
+from .similarity import SimilarityCache
+from .stats import CacheStats
+
+
+# Size in bytes of cache key digests (32 hex characters)
+KEY_DIGEST_SIZE = 16
+
+
+def content_digest(text: str) -> str:
+    """
+    Compute a compact digest of a text for use as a composite key part.
+
+    Compute it once per document (or chunk) and reuse it in every key that
+    involves that text, rather than hashing the full text per key.
+
+    Args:
+        text: Text to digest
+
+    Returns:
+        Hex digest
+    """
+    return hashlib.blake2b(text.encode(), digest_size=KEY_DIGEST_SIZE).hexdigest()
+
+
+def _key_part_bytes(part: Any) -> bytes:
+    """Encode one part of a composite cache key."""
+    if isinstance(part, str):
+        return part.encode()
+    if isinstance(part, bytes):
+        return part
+    return repr(part).encode()
+
+
+def _deep_sizeof(value: Any) -> int:
+    """Approximate the memory footprint of a value, following containers."""
+    size = sys.getsizeof(value)
+    if isinstance(value, CompressedValue):
+        size += sys.getsizeof(value.data)
+    elif isinstance(value, dict):
+        size += sum(_deep_sizeof(k) + _deep_sizeof(v) for k, v in value.items())
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(_deep_sizeof(item) for item in value)
+    return size
 
 
 class PredictionCache:
@@ -39,30 +103,84 @@ class PredictionCache:
     LRU cache with TTL for storing prediction results.
 
     Features:
-    - Least Recently Used (LRU) eviction
-    - Time-to-live (TTL) for entries
+    - Least Recently Used (LRU) eviction by default, or a scan-resistant
+      W-TinyLFU policy (see performance.policies)
+    - Entry count and/or memory (byte) budgets
+    - Optional transparent zlib/lzma compression of large str/bytes values
+    - Time-to-live (TTL) for entries, measured on the monotonic clock, with
+      optional per-entry overrides
+    - Tags per entry and bulk invalidation by tag
     - Thread-safe operations
-    - Automatic cleanup of expired entries
+    - Incremental cleanup of expired entries via a deadline min-heap,
+      optionally driven by a background sweeper thread
     """
 
-    def __init__(self, max_entries: int = 10000, ttl_ms: int = 300000):
+    def __init__(
+        self,
+        max_entries: Optional[int] = 10000,
+        ttl_ms: int = 300000,
+        max_bytes: Optional[int] = None,
+        policy: str = "lru",
+        stats: Optional[CacheStats] = None,
+        compression: Optional[str] = None,
+        compression_threshold: int = 1024,
+        compression_level: Optional[int] = None
+    ):
         """
         Initialize the prediction cache.
 
         Args:
-            max_entries: Maximum number of entries to store
+            max_entries: Maximum number of entries to store (None for no limit)
             ttl_ms: Time-to-live in milliseconds
+            max_bytes: Maximum measured size of keys and values in bytes
+                (None for no limit)
+            policy: Eviction policy name ("lru" or "w-tinylfu")
+            stats: Optional statistics collector (None disables recording)
+            compression: Value codec ("zlib", "lzma", or None for raw storage)
+            compression_threshold: Values smaller than this many bytes are
+                stored raw
+            compression_level: Codec compression level (codec default if None)
         """
         self.max_entries = max_entries
         self.ttl_ms = ttl_ms
-        self.cache: OrderedDict = OrderedDict()
+        self.max_bytes = max_bytes
+        self.cache: Dict[str, tuple] = {}
+        self.tag_index: Dict[str, Set[str]] = {}
+        self.entry_tags: Dict[str, FrozenSet[str]] = {}
+        self.policy = make_policy(policy, max_entries or 10000)
+        self.expiry_heap: List[tuple] = []
+        self.current_bytes = 0
+        self.logical_bytes = 0
+        if compression is not None and compression not in COMPRESSION_CODECS:
+            raise ValueError(
+                f"Unknown compression codec '{compression}'. "
+                f"Available: {', '.join(COMPRESSION_CODECS)}"
+            )
+        self.compression = compression
+        self.compression_threshold = compression_threshold
+        self.compression_level = compression_level
         self.lock = Lock()
+        self.sweeper: Optional["CacheSweeper"] = None
+        self.stats = stats
 
     def _hash_key(self, key: Any) -> str:
-        """Generate a hash for the cache key."""
+        """
+        Generate a hash for the cache key.
+
+        Tuple keys are composite: each part is hashed separately with a
+        length prefix, so callers can pass pre-computed digests (see
+        content_digest()) instead of concatenating large texts into one key.
+        """
         if isinstance(key, str):
-            return hashlib.sha256(key.encode()).hexdigest()
-        return hashlib.sha256(str(key).encode()).hexdigest()
+            return hashlib.blake2b(key.encode(), digest_size=KEY_DIGEST_SIZE).hexdigest()
+        if isinstance(key, tuple):
+            hasher = hashlib.blake2b(digest_size=KEY_DIGEST_SIZE)
+            for part in key:
+                data = _key_part_bytes(part)
+                hasher.update(len(data).to_bytes(8, "little"))
+                hasher.update(data)
+            return hasher.hexdigest()
+        return hashlib.blake2b(str(key).encode(), digest_size=KEY_DIGEST_SIZE).hexdigest()
 
     def get(self, key: Any) -> Optional[Any]:
         """
@@ -74,164 +192,561 @@ class PredictionCache:
         Returns:
             Cached value or None if not found or expired
         """
-        with self.lock:
-            hashed_key = self._hash_key(key)
+        return self._get_hashed(self._hash_key(key))
 
+    def _get_hashed(self, hashed_key: str, count_stats: bool = True) -> Optional[Any]:
+        """Look up an already hashed key."""
+        stats = self.stats if count_stats else None
+        with self.lock:
             if hashed_key not in self.cache:
+                self.policy.record_miss(hashed_key)
+                if stats is not None:
+                    stats.increment("misses")
                 return None
 
-            value, timestamp = self.cache[hashed_key]
+            value, expires_at, entry_size, logical_size, _ = self.cache[hashed_key]
 
             # Check if expired
-            if (time.time() * 1000) - timestamp > self.ttl_ms:
+            if time.monotonic_ns() >= expires_at:
                 del self.cache[hashed_key]
+                self._untag(hashed_key)
+                self.current_bytes -= entry_size
+                self.logical_bytes -= logical_size
+                self.policy.record_remove(hashed_key)
+                self.policy.record_miss(hashed_key)
+                if self.stats is not None:
+                    self.stats.increment("expirations")
+                if stats is not None:
+                    stats.increment("misses")
+                return None
+
+            self.policy.record_access(hashed_key)
+            if stats is not None:
+                stats.increment("hits")
+
+        # Decompress outside the lock
+        return decompress_value(value)
+
+    def _expires_at(self, hashed_key: str) -> Optional[float]:
+        """Get an entry's expiry as epoch milliseconds, or None if absent."""
+        with self.lock:
+            entry = self.cache.get(hashed_key)
+            if entry is None:
                 return None
+            remaining_ns = entry[1] - time.monotonic_ns()
+        return time.time() * 1000 + remaining_ns / 1e6
+
+    def delete(self, key: Any) -> bool:
+        """
+        Remove a single entry.
 
-            # Move to end (most recently used)
-            self.cache.move_to_end(hashed_key)
-            return value
+        Args:
+            key: Cache key
+
+        Returns:
+            True if an entry was removed
+        """
+        return self._delete_hashed(self._hash_key(key))
 
-    def set(self, key: Any, value: Any) -> None:
+    def _delete_hashed(self, hashed_key: str) -> bool:
+        """Remove an entry by its already hashed key."""
+        with self.lock:
+            entry = self.cache.pop(hashed_key, None)
+            if entry is None:
+                return False
+            self._untag(hashed_key)
+            self.current_bytes -= entry[2]
+            self.logical_bytes -= entry[3]
+            self.policy.record_remove(hashed_key)
+            return True
+
+    def set(
+        self,
+        key: Any,
+        value: Any,
+        ttl_ms: Optional[float] = None,
+        tags: Optional[Iterable[str]] = None
+    ) -> None:
         """
         Set a value in the cache.
 
         Args:
             key: Cache key
             value: Value to cache
+            ttl_ms: Time-to-live for this entry (cache-wide TTL if None)
+            tags: Tags for bulk invalidation, e.g. "doc:<digest>" or
+                "model:<id>". Replaces the tags of any previous entry.
         """
+        self._set_hashed(self._hash_key(key), value, ttl_ms, tags)
+
+    def _set_hashed(
+        self,
+        hashed_key: str,
+        value: Any,
+        ttl_ms: Optional[float] = None,
+        tags: Optional[Iterable[str]] = None
+    ) -> None:
+        """
+        Store a value under an already hashed key (see set()).
+
+        ttl_ms is also used when promoting entries whose lifetime already
+        started in another tier.
+        """
+        if ttl_ms is None:
+            ttl_ms = self.ttl_ms
+        created_at = time.monotonic_ns()
+        expires_at = created_at + int(ttl_ms * 1_000_000)
+
+        # Compress and measure outside the lock; neither is free for large values
+        key_size = _deep_sizeof(hashed_key)
+        logical_size = key_size + _deep_sizeof(value)
+        stored = compress_value(
+            value, self.compression, self.compression_threshold, self.compression_level
+        )
+        entry_size = (
+            logical_size if stored is value else key_size + _deep_sizeof(stored)
+        )
+
         with self.lock:
-            hashed_key = self._hash_key(key)
+            previous = self.cache.pop(hashed_key, None)
+            if previous is not None:
+                self._untag(hashed_key)
+                self.current_bytes -= previous[2]
+                self.logical_bytes -= previous[3]
+
+            # A single value larger than the whole budget is never cached
+            if self.max_bytes is not None and entry_size > self.max_bytes:
+                if previous is not None:
+                    self.policy.record_remove(hashed_key)
+                return
+
+            # Add new entry with its deadline and index it for expiry
+            self.cache[hashed_key] = (
+                stored, expires_at, entry_size, logical_size, created_at
+            )
+            self.current_bytes += entry_size
+            self.logical_bytes += logical_size
+            heapq.heappush(self.expiry_heap, (expires_at, hashed_key))
+            if tags:
+                self._tag(hashed_key, tags)
+            if previous is not None:
+                self.policy.record_access(hashed_key)
+            else:
+                self.policy.record_insert(hashed_key)
+
+            # Evict the policy's victims while over either budget
+            while (
+                (self.max_entries is not None and len(self.cache) > self.max_entries)
+                or (self.max_bytes is not None and self.current_bytes > self.max_bytes)
+            ):
+                victim = self.policy.victim()
+                if victim is None or victim not in self.cache:
+                    # The policy is empty or out of sync with the entries;
+                    # drop the stale key and stay over budget until next time
+                    if victim is not None:
+                        self.policy.record_remove(victim)
+                    break
+                _, _, evicted_size, evicted_logical_size, _ = self.cache.pop(victim)
+                self._untag(victim)
+                self.current_bytes -= evicted_size
+                self.logical_bytes -= evicted_logical_size
+                self.policy.record_remove(victim)
+                if self.stats is not None:
+                    self.stats.increment("evictions")
+
+            # Overwritten and evicted entries leave stale heap items behind;
+            # rebuild once they dominate so the heap stays O(n)
+            if len(self.expiry_heap) > 2 * len(self.cache) + 64:
+                self.expiry_heap = [
+                    (entry_expires_at, key)
+                    for key, (_, entry_expires_at, _, _, _) in self.cache.items()
+                ]
+                heapq.heapify(self.expiry_heap)
+
+    def _tag(self, hashed_key: str, tags: Iterable[str]) -> None:
+        """Index an entry under its tags; the caller holds the lock."""
+        entry_tags = frozenset(tags)
+        self.entry_tags[hashed_key] = entry_tags
+        for tag in entry_tags:
+            self.tag_index.setdefault(tag, set()).add(hashed_key)
+
+    def _untag(self, hashed_key: str) -> None:
+        """Drop a removed entry from the tag index; the caller holds the lock."""
+        entry_tags = self.entry_tags.pop(hashed_key, None)
+        if not entry_tags:
+            return
+        for tag in entry_tags:
+            keys = self.tag_index.get(tag)
+            if keys is not None:
+                keys.discard(hashed_key)
+                if not keys:
+                    del self.tag_index[tag]
+
+    def invalidate_tag(self, tag: str) -> int:
+        """
+        Remove every entry carrying a tag.
 
-            # Add new entry with timestamp
-            self.cache[hashed_key] = (value, time.time() * 1000)
-            self.cache.move_to_end(hashed_key)
+        Cost is proportional to the number of tagged entries, not the
+        size of the cache.
 
-            # Evict oldest if over limit
-            if len(self.cache) > self.max_entries:
-                self.cache.popitem(last=False)
+        Args:
+            tag: Tag to invalidate
+
+        Returns:
+            Number of entries removed
+        """
+        with self.lock:
+            keys = self.tag_index.pop(tag, ())
+            for key in keys:
+                _, _, entry_size, logical_size, _ = self.cache.pop(key)
+                self._untag(key)
+                self.current_bytes -= entry_size
+                self.logical_bytes -= logical_size
+                self.policy.record_remove(key)
+            return len(keys)
 
     def clear(self) -> None:
         """Clear all cache entries."""
         with self.lock:
             self.cache.clear()
+            self.tag_index.clear()
+            self.entry_tags.clear()
+            self.expiry_heap.clear()
+            self.policy.clear()
+            self.current_bytes = 0
+            self.logical_bytes = 0
 
     def size(self) -> int:
         """Get current cache size."""
         with self.lock:
             return len(self.cache)
 
-    def cleanup_expired(self) -> int:
+    def bytes_used(self) -> int:
+        """Get measured size of all cached keys and values in bytes."""
+        with self.lock:
+            return self.current_bytes
+
+    def logical_bytes_used(self) -> int:
+        """Get size of all cached keys and values before compression."""
+        with self.lock:
+            return self.logical_bytes
+
+    def export_entries(
+        self,
+        created_after_ns: Optional[int] = None
+    ) -> Iterator[Tuple[str, Any, int, int, FrozenSet[str]]]:
         """
-        Remove all expired entries.
+        Iterate over live entries, e.g. to write a snapshot.
+
+        The entry table is copied by reference under the lock; values are
+        decompressed lazily as the iterator is consumed, so exporting never
+        holds the lock while serializing.
+
+        Args:
+            created_after_ns: Only yield entries written after this
+                time.monotonic_ns() value (None yields every entry)
+
+        Yields:
+            Tuples of (hashed_key, value, expires_at_ns, created_at_ns, tags)
+            with times on the monotonic clock
+        """
+        no_tags: FrozenSet[str] = frozenset()
+        with self.lock:
+            entries = [
+                (key, stored, expires_at, created_at, self.entry_tags.get(key, no_tags))
+                for key, (stored, expires_at, _, _, created_at) in self.cache.items()
+                if created_after_ns is None or created_at > created_after_ns
+            ]
+
+        now = time.monotonic_ns()
+        for key, stored, expires_at, created_at, tags in entries:
+            if expires_at > now:
+                yield key, decompress_value(stored), expires_at, created_at, tags
+
+    def cleanup_expired(self, limit: Optional[int] = None) -> int:
+        """
+        Remove expired entries using the expiry index.
+
+        Only entries that are actually due are touched, so the cost is
+        O(expired * log n) rather than a scan of the whole cache.
+
+        Args:
+            limit: Maximum number of entries to remove in this call
+                (None removes everything that has expired)
 
         Returns:
             Number of entries removed
         """
+        removed = 0
         with self.lock:
-            current_time = time.time() * 1000
-            expired_keys = [
-                key for key, (_, timestamp) in self.cache.items()
-                if current_time - timestamp > self.ttl_ms
-            ]
+            now = time.monotonic_ns()
+            heap = self.expiry_heap
+            while heap and heap[0][0] <= now:
+                if limit is not None and removed >= limit:
+                    break
+
+                expires_at, key = heapq.heappop(heap)
+                entry = self.cache.get(key)
+                # Skip stale index items for overwritten or evicted keys
+                if entry is None or entry[1] != expires_at:
+                    continue
 
-            for key in expired_keys:
                 del self.cache[key]
+                self._untag(key)
+                self.current_bytes -= entry[2]
+                self.logical_bytes -= entry[3]
+                self.policy.record_remove(key)
+                removed += 1
+
+            if removed and self.stats is not None:
+                self.stats.increment("expirations", removed)
 
-            return len(expired_keys)
+        return removed
 
+    def start_sweeper(self, interval_ms: int) -> "CacheSweeper":
+        """
+        Start a daemon thread that periodically removes expired entries.
+
+        Args:
+            interval_ms: Delay between sweeps in milliseconds
 
-class RequestBatcher:
+        Returns:
+            The running sweeper (stopped by stop_sweeper())
+        """
+        self.stop_sweeper()
+        self.sweeper = CacheSweeper(self, interval_ms)
+        self.sweeper.start()
+        return self.sweeper
+
+    def stop_sweeper(self) -> None:
+        """Stop the background sweeper, if running."""
+        sweeper = getattr(self, "sweeper", None)
+        if sweeper is not None:
+            sweeper.stop()
+            self.sweeper = None
+
+
+class CacheSweeper(Thread):
     """
-    Batches requests together to improve throughput.
+    Daemon thread that calls cleanup_expired() on a cache at a fixed interval.
 
-    Features:
-    - Automatic flushing based on size or time
-    - Thread-safe batch management
-    - Async and sync support
+    Only a weak reference to the cache is held, so an abandoned cache is
+    garbage collected and its sweeper exits on the next tick.
+    """
+
+    def __init__(self, cache: PredictionCache, interval_ms: int):
+        """
+        Initialize the sweeper.
+
+        Args:
+            cache: Cache to sweep
+            interval_ms: Delay between sweeps in milliseconds
+        """
+        super().__init__(name="prediction-cache-sweeper", daemon=True)
+        self.cache_ref = weakref.ref(cache)
+        self.interval_ms = interval_ms
+        self.stopped = Event()
+
+    def run(self) -> None:
+        """Sweep until stopped or the cache is garbage collected."""
+        while not self.stopped.wait(self.interval_ms / 1000.0):
+            cache = self.cache_ref()
+            if cache is None:
+                return
+            cache.cleanup_expired()
+            del cache
+
+    def stop(self) -> None:
+        """Signal the sweeper to exit."""
+        self.stopped.set()
+
+
+class ShardedPredictionCache(PredictionCache):
+    """
+    Lock-striped variant of PredictionCache for multi-threaded callers.
+
+    Entries are spread over N independent PredictionCache shards, each with
+    its own entries, eviction policy and lock, selected by the hashed key. Keys are hashed
+    once, before any lock is taken, and the shard is picked with a bit mask
+    (N is rounded up to a power of two), so threads working on different
+    shards never take the same lock. On GIL builds this has shown no
+    measured throughput benefit over a single PredictionCache (see the
+    cache_contention benchmark), so the default configuration uses one.
+    Eviction order and the entry/byte limits are maintained per shard; since
+    keys never spread perfectly evenly, size max_entries with some headroom
+    over the working set.
     """
 
     def __init__(
         self,
-        max_batch_size: int = 100,
-        max_wait_time_ms: int = 50,
-        callback: Optional[Callable] = None
+        max_entries: Optional[int] = 10000,
+        ttl_ms: int = 300000,
+        num_shards: int = 16,
+        max_bytes: Optional[int] = None,
+        policy: str = "lru",
+        stats: Optional[CacheStats] = None,
+        compression: Optional[str] = None,
+        compression_threshold: int = 1024,
+        compression_level: Optional[int] = None
     ):
         """
-        Initialize the request batcher.
+        Initialize the sharded prediction cache.
 
         Args:
-            max_batch_size: Maximum requests per batch
-            max_wait_time_ms: Maximum wait time before processing batch
-            callback: Optional callback function to call when batch is ready
-        """
-        self.max_batch_size = max_batch_size
-        self.max_wait_time_ms = max_wait_time_ms
-        self.callback = callback
-        self.current_batch: List[Any] = []
-        self.lock = Lock()
-        self.timer: Optional[Timer] = None
+            max_entries: Maximum number of entries to store (split across shards)
+            ttl_ms: Time-to-live in milliseconds
+            num_shards: Number of independent shards (rounded up to a power
+                of two)
+            max_bytes: Maximum measured size in bytes (split across shards)
+            policy: Eviction policy name used by every shard
+            stats: Optional statistics collector shared by every shard
+            compression: Value codec ("zlib", "lzma", or None for raw storage)
+            compression_threshold: Values smaller than this many bytes are
+                stored raw
+            compression_level: Codec compression level (codec default if None)
+        """
+        if num_shards < 1:
+            raise ValueError("num_shards must be at least 1")
+
+        self.max_entries = max_entries
+        self.ttl_ms = ttl_ms
+        self.max_bytes = max_bytes
+        num_shards = 1 << (num_shards - 1).bit_length()
+        self.num_shards = num_shards
+        self.shard_mask = num_shards - 1
+        per_shard_entries = (
+            max(1, -(-max_entries // num_shards)) if max_entries is not None else None
+        )
+        per_shard_bytes = max_bytes // num_shards if max_bytes is not None else None
+        self.shards = [
+            PredictionCache(
+                max_entries=per_shard_entries,
+                ttl_ms=ttl_ms,
+                max_bytes=per_shard_bytes,
+                policy=policy,
+                stats=stats,
+                compression=compression,
+                compression_threshold=compression_threshold,
+                compression_level=compression_level
+            )
+            for _ in range(num_shards)
+        ]
+        self.sweeper: Optional[CacheSweeper] = None
+        self.stats = stats
+        self.compression = compression
 
-    def add(self, request: Any) -> Optional[List[Any]]:
+    # The shard of a hashed key is shards[hash(hashed_key) & shard_mask]:
+    # str hashes are cached and the key is already uniformly distributed,
+    # and the expression is inlined below to keep the hot paths short
+
+    def get(self, key: Any) -> Optional[Any]:
         """
-        Add a request to the current batch.
+        Get a value from the cache.
 
         Args:
-            request: Request to add to batch
+            key: Cache key
 
         Returns:
-            Full batch if ready to process, None otherwise
+            Cached value or None if not found or expired
         """
-        with self.lock:
-            self.current_batch.append(request)
-
-            # Cancel existing timer
-            if self.timer:
-                self.timer.cancel()
-
-            # Check if batch is full
-            if len(self.current_batch) >= self.max_batch_size:
-                batch = self.current_batch
-                self.current_batch = []
-                if self.callback:
-                    self.callback(batch)
-                return batch
-
-            # Start new timer
-            self.timer = Timer(
-                self.max_wait_time_ms / 1000.0,
-                self._flush_on_timeout
-            )
-            self.timer.start()
+        hashed_key = self._hash_key(key)
+        return self.shards[hash(hashed_key) & self.shard_mask]._get_hashed(hashed_key)
 
-            return None
+    def set(
+        self,
+        key: Any,
+        value: Any,
+        ttl_ms: Optional[float] = None,
+        tags: Optional[Iterable[str]] = None
+    ) -> None:
+        """Set a value in the cache (see PredictionCache.set())."""
+        hashed_key = self._hash_key(key)
+        self.shards[hash(hashed_key) & self.shard_mask]._set_hashed(
+            hashed_key, value, ttl_ms, tags
+        )
 
-    def _flush_on_timeout(self) -> None:
-        """Flush batch when timeout is reached."""
-        with self.lock:
-            if self.current_batch:
-                batch = self.current_batch
-                self.current_batch = []
-                if self.callback:
-                    self.callback(batch)
+    def _get_hashed(self, hashed_key: str, count_stats: bool = True) -> Optional[Any]:
+        """Look up an already hashed key in its shard."""
+        return self.shards[hash(hashed_key) & self.shard_mask]._get_hashed(
+            hashed_key, count_stats
+        )
+
+    def _set_hashed(
+        self,
+        hashed_key: str,
+        value: Any,
+        ttl_ms: Optional[float] = None,
+        tags: Optional[Iterable[str]] = None
+    ) -> None:
+        """Store a value under an already hashed key in its shard."""
+        self.shards[hash(hashed_key) & self.shard_mask]._set_hashed(
+            hashed_key, value, ttl_ms, tags
+        )
+
+    def _expires_at(self, hashed_key: str) -> Optional[float]:
+        return self.shards[hash(hashed_key) & self.shard_mask]._expires_at(hashed_key)
+
+    def _delete_hashed(self, hashed_key: str) -> bool:
+        return self.shards[hash(hashed_key) & self.shard_mask]._delete_hashed(hashed_key)
+
+    def invalidate_tag(self, tag: str) -> int:
+        """Remove every entry carrying a tag from all shards."""
+        return sum(shard.invalidate_tag(tag) for shard in self.shards)
+
+    def clear(self) -> None:
+        """Clear all cache entries."""
+        for shard in self.shards:
+            shard.clear()
 
-    def flush(self) -> List[Any]:
+    def size(self) -> int:
+        """Get current cache size across all shards."""
+        return sum(shard.size() for shard in self.shards)
+
+    def bytes_used(self) -> int:
+        """Get measured size of all cached keys and values across shards."""
+        return sum(shard.bytes_used() for shard in self.shards)
+
+    def logical_bytes_used(self) -> int:
+        """Get size of all cached keys and values before compression."""
+        return sum(shard.logical_bytes_used() for shard in self.shards)
+
+    def export_entries(
+        self,
+        created_after_ns: Optional[int] = None
+    ) -> Iterator[Tuple[str, Any, int, int, FrozenSet[str]]]:
+        """Iterate over live entries of every shard (see PredictionCache)."""
+        for shard in self.shards:
+            yield from shard.export_entries(created_after_ns)
+
+    def cleanup_expired(self, limit: Optional[int] = None) -> int:
         """
-        Manually flush the current batch.
+        Remove expired entries from every shard.
+
+        Args:
+            limit: Maximum number of entries to remove in this call
+                (None removes everything that has expired)
 
         Returns:
-            Current batch
+            Number of entries removed
         """
-        with self.lock:
-            if self.timer:
-                self.timer.cancel()
-            batch = self.current_batch
-            self.current_batch = []
-            return batch
+        removed = 0
+        for shard in self.shards:
+            remaining = None if limit is None else limit - removed
+            if remaining is not None and remaining <= 0:
+                break
+            removed += shard.cleanup_expired(remaining)
+        return removed
 
-    def size(self) -> int:
-        """Get current batch size."""
-        with self.lock:
-            return len(self.current_batch)
+
+class _InFlightCall:
+    """A computation in progress that concurrent callers can wait on."""
+
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
 
 
 class PerformanceOptimizer:
@@ -251,74 +766,514 @@ class PerformanceOptimizer:
         optimizer.add_to_batch(request_data)
     """
 
-    def __init__(self, config_path: Optional[str] = None):
+    def __init__(
+        self,
+        config_path: Optional[str] = None,
+        cache: Optional[PredictionCache] = None
+    ):
         """
         Initialize the performance optimizer.
 
         Args:
             config_path: Path to performance.json config file
+            cache: Cache to use instead of building one from the config
+                (e.g. a SharedMemoryCache shared by a process pool). It is
+                used even if predictionCache.enabled is false.
         """
         # Load configuration
         if config_path is None:
             # Default to config/performance.json relative to project root
-            config_path = Path(__file__).parent.parent.parent / "config" / "performance.json"
+            config_path = Path(__file__).resolve().parent.parent.parent / "config" / "performance.json"
 
         with open(config_path) as f:
             self.config = json.load(f)
 
         # Initialize cache
         cache_config = self.config.get("predictionCache", {})
-        self.cache_enabled = cache_config.get("enabled", True)
-        if self.cache_enabled:
-            self.cache = PredictionCache(
+        self.cache_enabled = cache is not None or cache_config.get("enabled", True)
+        self.stats = (
+            CacheStats() if self.cache_enabled and cache_config.get("stats", True) else None
+        )
+        if cache is not None:
+            # The supplied cache records into its own collector, if it has one
+            self.cache = cache
+            if cache.stats is not None:
+                self.stats = cache.stats
+        elif self.cache_enabled:
+            compression_config = cache_config.get("compression", {})
+            codec = compression_config.get("codec")
+            cache_options = dict(
                 max_entries=cache_config.get("maxEntries", 10000),
-                ttl_ms=cache_config.get("ttl", 300000)
+                ttl_ms=cache_config.get("ttl", 300000),
+                max_bytes=cache_config.get("maxBytes"),
+                policy=cache_config.get("policy", "lru"),
+                stats=self.stats,
+                compression=None if codec in (None, "none") else codec,
+                compression_threshold=compression_config.get("threshold", 1024),
+                compression_level=compression_config.get("level")
             )
+
+            num_shards = cache_config.get("shards", 1)
+            if num_shards > 1:
+                self.cache = ShardedPredictionCache(num_shards=num_shards, **cache_options)
+            else:
+                self.cache = PredictionCache(**cache_options)
+
+            sweep_interval = cache_config.get("sweepInterval", 0)
+            if sweep_interval > 0:
+                self.cache.start_sweeper(sweep_interval)
         else:
             self.cache = None
 
+        # Initialize persistent second tier
+        disk_config = cache_config.get("diskTier", {})
+        if self.cache_enabled and disk_config.get("enabled", False):
+            self.l2_cache = DiskCache(
+                path=disk_config.get("path", "/tmp/prediction-cache.sqlite3"),
+                ttl_ms=disk_config.get("ttl", cache_config.get("ttl", 300000)),
+                max_bytes=disk_config.get("maxBytes", 256 * 1024 * 1024)
+            )
+        else:
+            self.l2_cache = None
+
+        # Initialize shared remote tier, consulted after the disk tier
+        remote_config = cache_config.get("remoteTier", {})
+        if self.cache_enabled and remote_config.get("enabled", False):
+            self.remote_cache = RedisBackend(
+                host=remote_config.get("host", "localhost"),
+                port=remote_config.get("port", 6379),
+                ttl_ms=remote_config.get("ttl", cache_config.get("ttl", 300000)),
+                prefix=remote_config.get("prefix", "prediction-cache:"),
+                db=remote_config.get("db", 0),
+                password=os.environ.get("PREDICTION_CACHE_REDIS_PASSWORD"),
+                max_connections=remote_config.get("maxConnections", 16),
+                timeout_ms=remote_config.get("timeout", 1000),
+                circuit_open_ms=remote_config.get("circuitOpen", 5000)
+            )
+        else:
+            self.remote_cache = None
+
+        # Lower tiers in lookup order, nearest first
+        self.l2_tiers: List[CacheBackend] = [
+            tier for tier in (self.l2_cache, self.remote_cache) if tier is not None
+        ]
+
+        # Initialize opt-in near-duplicate cache
+        similarity_config = cache_config.get("similarity", {})
+        if self.cache_enabled and similarity_config.get("enabled", False):
+            self.similarity_cache = SimilarityCache(
+                max_entries=similarity_config.get("maxEntries", 10000),
+                ttl_ms=similarity_config.get("ttl", cache_config.get("ttl", 300000)),
+                threshold=similarity_config.get("threshold", 0.95),
+                max_features=similarity_config.get("maxFeatures", 1024)
+            )
+        else:
+            self.similarity_cache = None
+
+        # Single-flight tracking for concurrent misses on the same key
+        coalesce_timeout = cache_config.get("coalesceTimeout", 60000)
+        self.coalesce_timeout_s = (
+            coalesce_timeout / 1000.0 if coalesce_timeout is not None else None
+        )
+        self.inflight: Dict[str, _InFlightCall] = {}
+        self.inflight_lock = Lock()
+        self.async_inflight = AsyncSingleFlight()
+        self.coalesced_calls = 0
+        self.coalesce_timeouts = 0
+
         # Initialize batcher
+        self.batching_enabled = self.config.get("batching", {}).get("enabled", True)
+        self.batcher = self.create_batcher() if self.batching_enabled else None
+
+    def create_batcher(
+        self,
+        processor: Optional[Callable[[List[Any]], Sequence[Any]]] = None
+    ) -> RequestBatcher:
+        """
+        Create a RequestBatcher from the batching section of the config.
+
+        Components that batch their own work (e.g. OptimizedInferenceAdapter)
+        use a batcher of their own, so their processor never receives
+        requests added to the optimizer's batcher.
+
+        Args:
+            processor: Batch processor for submit() (see RequestBatcher)
+
+        Returns:
+            New batcher with its own queue, dispatchers and, if adaptive
+            batching is enabled, controller
+        """
         batch_config = self.config.get("batching", {})
-        self.batching_enabled = batch_config.get("enabled", True)
-        if self.batching_enabled:
-            self.batcher = RequestBatcher(
+        adaptive_config = batch_config.get("adaptive", {})
+        if adaptive_config.get("enabled", False):
+            controller = AdaptiveBatchController(
+                min_batch_size=adaptive_config.get("minBatchSize", 1),
                 max_batch_size=batch_config.get("maxBatchSize", 100),
-                max_wait_time_ms=batch_config.get("maxWaitTime", 50)
+                min_wait_ms=adaptive_config.get("minWaitTime", 1),
+                max_wait_ms=batch_config.get("maxWaitTime", 50),
+                target_latency_ms=adaptive_config.get("targetLatency", 500)
             )
         else:
-            self.batcher = None
+            controller = None
+        return RequestBatcher(
+            max_batch_size=batch_config.get("maxBatchSize", 100),
+            max_wait_time_ms=batch_config.get("maxWaitTime", 50),
+            processor=processor,
+            controller=controller,
+            lanes=batch_config.get("lanes", ["default"]),
+            max_pending=batch_config.get("maxPending"),
+            overflow=batch_config.get("overflow", "block"),
+            block_timeout_ms=batch_config.get("blockTimeout"),
+            workers=batch_config.get("workers", 1)
+        )
 
     def get_cached_or_compute(
         self,
         key: Any,
         compute_fn: Callable,
-        force_refresh: bool = False
+        force_refresh: bool = False,
+        ttl_ms: Optional[float] = None,
+        tags: Optional[Iterable[str]] = None
     ) -> Any:
         """
         Get result from cache or compute if not found.
 
+        The in-memory cache is checked first, then the disk and remote tiers
+        (if configured). Hits in a lower tier are promoted into every tier
+        above it without extending their remaining lifetime.
+
+        Concurrent misses on the same key are coalesced: one caller runs
+        compute_fn while the others wait for its result (or re-raise its
+        exception). A waiter that exceeds the coalesce timeout computes the
+        value itself.
+
         Args:
             key: Cache key
             compute_fn: Function to call if cache miss
             force_refresh: Force recomputation even if cached
+            ttl_ms: Time-to-live for a computed entry (cache-wide TTL if None)
+            tags: Tags for a computed entry, for use with invalidate_tag()
 
         Returns:
             Cached or computed result
         """
-        if not force_refresh and self.cache_enabled and self.cache:
-            cached = self.cache.get(key)
+        if not (self.cache_enabled and self.cache):
+            return compute_fn()
+
+        hashed_key = self.cache._hash_key(key)
+
+        if not force_refresh:
+            if self.stats is not None:
+                started = time.perf_counter_ns()
+                cached = self._lookup(hashed_key)
+                self.stats.lookup_latency.record(time.perf_counter_ns() - started)
+            else:
+                cached = self._lookup(hashed_key)
             if cached is not None:
                 return cached
 
-        # Compute result
-        result = compute_fn()
+        with self.inflight_lock:
+            call = self.inflight.get(hashed_key)
+            is_leader = call is None
+            if is_leader:
+                call = self.inflight[hashed_key] = _InFlightCall()
+            else:
+                self.coalesced_calls += 1
+                if self.stats is not None:
+                    self.stats.increment("coalesced_calls")
+
+        if not is_leader:
+            if call.done.wait(self.coalesce_timeout_s):
+                if call.error is not None:
+                    raise call.error
+                return call.result
+
+            with self.inflight_lock:
+                self.coalesce_timeouts += 1
+            if self.stats is not None:
+                self.stats.increment("coalesce_timeouts")
+            return self._compute_and_store(hashed_key, compute_fn, ttl_ms, tags)
+
+        try:
+            # Another leader may have finished between our lookup and
+            # registering this call
+            result = (
+                None if force_refresh
+                else self.cache._get_hashed(hashed_key, count_stats=False)
+            )
+            if result is None:
+                result = self._compute_and_store(hashed_key, compute_fn, ttl_ms, tags)
+            call.result = result
+            return result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self.inflight_lock:
+                del self.inflight[hashed_key]
+            call.done.set()
+
+    async def aget_cached_or_compute(
+        self,
+        key: Any,
+        compute_fn: Callable[[], Awaitable[Any]],
+        force_refresh: bool = False,
+        ttl_ms: Optional[float] = None,
+        tags: Optional[Iterable[str]] = None
+    ) -> Any:
+        """
+        asyncio counterpart of get_cached_or_compute().
+
+        The in-memory lookup runs inline (it never waits on I/O); disk tier
+        reads and writes run in a worker thread. Concurrent misses on the
+        same key within an event loop await one compute_fn() call. A caller
+        that is cancelled stops waiting without affecting the others, and
+        the computation is cancelled once no caller awaits it any more.
 
-        # Cache result
-        if self.cache_enabled and self.cache:
-            self.cache.set(key, result)
+        Args:
+            key: Cache key
+            compute_fn: Coroutine function to await on a cache miss
+            force_refresh: Force recomputation even if cached
+            ttl_ms: Time-to-live for a computed entry (cache-wide TTL if None)
+            tags: Tags for a computed entry, for use with invalidate_tag()
+
+        Returns:
+            Cached or computed result
+        """
+        if not (self.cache_enabled and self.cache):
+            return await compute_fn()
+
+        hashed_key = self.cache._hash_key(key)
+
+        if not force_refresh:
+            started = time.perf_counter_ns()
+            cached = self.cache._get_hashed(hashed_key)
+            if cached is None and self.l2_tiers:
+                cached = await asyncio.to_thread(self._lookup_l2, hashed_key)
+            if self.stats is not None:
+                self.stats.lookup_latency.record(time.perf_counter_ns() - started)
+            if cached is not None:
+                return cached
+
+        return await self.async_inflight.run(
+            hashed_key,
+            lambda: self._acompute_and_store(hashed_key, compute_fn, ttl_ms, tags),
+            self._record_coalesced
+        )
+
+    def _record_coalesced(self) -> None:
+        with self.inflight_lock:
+            self.coalesced_calls += 1
+        if self.stats is not None:
+            self.stats.increment("coalesced_calls")
+
+    async def _acompute_and_store(
+        self,
+        hashed_key: str,
+        compute_fn: Callable[[], Awaitable[Any]],
+        ttl_ms: Optional[float] = None,
+        tags: Optional[Iterable[str]] = None
+    ) -> Any:
+        """Await compute_fn and write its result to every cache tier."""
+        if self.stats is not None:
+            started = time.perf_counter_ns()
+            try:
+                result = await compute_fn()
+            finally:
+                self.stats.compute_latency.record(time.perf_counter_ns() - started)
+                self.stats.increment("computes")
+        else:
+            result = await compute_fn()
+
+        # A None result (e.g. a failed model call) is returned uncached
+        if result is not None:
+            self.cache._set_hashed(hashed_key, result, ttl_ms, tags)
+            if self.l2_tiers:
+                await asyncio.to_thread(self._store_l2, hashed_key, result, ttl_ms, tags)
 
         return result
 
+    def _lookup(self, hashed_key: str) -> Optional[Any]:
+        """Look up a hashed key in memory, then in the lower tiers."""
+        cached = self.cache._get_hashed(hashed_key)
+        if cached is not None:
+            return cached
+
+        if self.l2_tiers:
+            return self._lookup_l2(hashed_key)
+
+        return None
+
+    def _lookup_l2(self, hashed_key: str) -> Optional[Any]:
+        """Look up a hashed key in the lower tiers, promoting hits upward."""
+        for depth, tier in enumerate(self.l2_tiers):
+            entry = tier.get_entry(hashed_key)
+            if entry is not None:
+                self._promote(hashed_key, entry, self.l2_tiers[:depth])
+                if self.stats is not None:
+                    self.stats.increment("l2_hits")
+                return entry[0]
+        return None
+
+    def _promote(
+        self,
+        hashed_key: str,
+        entry: Tuple[Any, Optional[float]],
+        tiers: List[CacheBackend]
+    ) -> None:
+        """Copy a lower-tier hit into memory and into the given tiers."""
+        value, expires_at = entry
+        # Promoted copies must not outlive the original
+        remaining_ms = (
+            expires_at - time.time() * 1000 if expires_at is not None else None
+        )
+        self.cache._set_hashed(
+            hashed_key,
+            value,
+            min(self.cache.ttl_ms, remaining_ms) if remaining_ms is not None else None
+        )
+        for tier in tiers:
+            tier.set(
+                hashed_key,
+                value,
+                min(tier.ttl_ms, remaining_ms) if remaining_ms is not None else None
+            )
+
+    def _store_l2(
+        self,
+        hashed_key: str,
+        value: Any,
+        ttl_ms: Optional[float] = None,
+        tags: Optional[Iterable[str]] = None
+    ) -> None:
+        """Write a computed value to every lower tier."""
+        for tier in self.l2_tiers:
+            tier.set(hashed_key, value, ttl_ms, tags)
+
+    def prefetch(self, keys: Iterable[Any]) -> int:
+        """
+        Warm the in-memory cache with entries already in the lower tiers.
+
+        Keys missing from memory are fetched from each lower tier with one
+        get_many() call per tier (a single pipelined round trip for the
+        remote tier), instead of one lookup per key later on.
+
+        Args:
+            keys: Cache keys that are about to be requested
+
+        Returns:
+            Number of entries promoted into memory
+        """
+        if not (self.cache_enabled and self.cache and self.l2_tiers):
+            return 0
+
+        missing = [
+            hashed_key for hashed_key in dict.fromkeys(
+                self.cache._hash_key(key) for key in keys
+            )
+            if self.cache._get_hashed(hashed_key, count_stats=False) is None
+        ]
+
+        promoted = 0
+        for depth, tier in enumerate(self.l2_tiers):
+            if not missing:
+                break
+            entries = tier.get_many(missing)
+            for hashed_key, entry in entries.items():
+                self._promote(hashed_key, entry, self.l2_tiers[:depth])
+            promoted += len(entries)
+            missing = [hashed_key for hashed_key in missing if hashed_key not in entries]
+        return promoted
+
+    def _compute_and_store(
+        self,
+        hashed_key: str,
+        compute_fn: Callable,
+        ttl_ms: Optional[float] = None,
+        tags: Optional[Iterable[str]] = None
+    ) -> Any:
+        """Run compute_fn and write its result to every cache tier."""
+        if self.stats is not None:
+            started = time.perf_counter_ns()
+            try:
+                result = compute_fn()
+            finally:
+                self.stats.compute_latency.record(time.perf_counter_ns() - started)
+                self.stats.increment("computes")
+        else:
+            result = compute_fn()
+
+        # A None result (e.g. a failed model call) is returned uncached
+        if result is not None:
+            self.cache._set_hashed(hashed_key, result, ttl_ms, tags)
+            if self.l2_tiers:
+                self._store_l2(hashed_key, result, ttl_ms, tags)
+
+        return result
+
+    def invalidate_tag(self, tag: str) -> int:
+        """
+        Remove every entry carrying a tag from all cache tiers.
+
+        Args:
+            tag: Tag to invalidate, e.g. "doc:<digest>" or "model:<id>"
+
+        Returns:
+            Number of entries removed across tiers
+        """
+        if not (self.cache_enabled and self.cache):
+            return 0
+
+        removed = self.cache.invalidate_tag(tag)
+        for tier in self.l2_tiers:
+            removed += tier.invalidate_tag(tag)
+        if self.similarity_cache:
+            removed += self.similarity_cache.invalidate_tag(tag)
+        return removed
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get cache and request coalescing statistics.
+
+        Returns:
+            Dictionary with coalescing counts, cache gauges and, when stats
+            are enabled, hit/miss/eviction counters and latency summaries
+        """
+        gauges = self._gauges()
+        if self.stats is not None:
+            return self.stats.snapshot(gauges)
+        return gauges
+
+    def get_prometheus_metrics(self, prefix: str = "prediction_cache") -> str:
+        """
+        Get cache statistics in Prometheus text exposition format.
+
+        Args:
+            prefix: Metric name prefix
+
+        Returns:
+            Exposition text (empty if stats are disabled)
+        """
+        if self.stats is None:
+            return ""
+        return self.stats.to_prometheus(prefix, self._gauges())
+
+    def _gauges(self) -> Dict[str, Any]:
+        """Collect point-in-time values for the stats surfaces."""
+        with self.inflight_lock:
+            gauges = {"in_flight": len(self.inflight) + self.async_inflight.size()}
+            if self.stats is None:
+                gauges["coalesced_calls"] = self.coalesced_calls
+                gauges["coalesce_timeouts"] = self.coalesce_timeouts
+        if self.cache_enabled and self.cache:
+            gauges["entries"] = self.cache.size()
+            gauges["bytes"] = self.cache.bytes_used()
+            gauges["logical_bytes"] = self.cache.logical_bytes_used()
+        if self.batcher is not None:
+            for name, value in self.batcher.get_stats().items():
+                gauges[f"batcher_{name}"] = value
+        return gauges
+
     def add_to_batch(self, request: Any) -> Optional[List[Any]]:
         """
         Add request to batch.
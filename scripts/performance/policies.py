@@ -0,0 +1,262 @@
+"""
+Eviction and Admission Policies
+===============================
+
+Pluggable policies that decide which entry PredictionCache evicts when it
+is over budget. The cache owns the entries; a policy only tracks keys and
+is always called with the cache lock held, so policies need no locking of
+their own.
+
+Policies:
+- LRUPolicy: evict the least recently used entry (the historical behavior)
+- WTinyLFUPolicy: W-TinyLFU, a small LRU admission window in front of a
+  segmented LRU main area, with a count-min sketch frequency filter deciding
+  whether a window entry may displace a main-area entry. One-off scans
+  churn through the window without flushing the frequently used hot set.
+"""
+
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, Optional, Type
+
+
+class EvictionPolicy:
+    """
+    Base class for cache eviction policies.
+
+    The cache reports every lookup, insert and removal; victim() is asked
+    for the next key to evict while the cache is over budget.
+    """
+
+    def __init__(self, capacity: int):
+        """
+        Initialize the policy.
+
+        Args:
+            capacity: Expected number of entries the cache holds when full
+        """
+        self.capacity = capacity
+
+    def record_access(self, key: Any) -> None:
+        """Record a hit on, or an overwrite of, a cached key."""
+        raise NotImplementedError
+
+    def record_miss(self, key: Any) -> None:
+        """Record a lookup of a key that is not cached."""
+
+    def record_insert(self, key: Any) -> None:
+        """Record a newly cached key."""
+        raise NotImplementedError
+
+    def record_remove(self, key: Any) -> None:
+        """Record a key leaving the cache (eviction, expiry or invalidation)."""
+        raise NotImplementedError
+
+    def victim(self) -> Optional[Any]:
+        """Return the key that should be evicted next, or None if empty."""
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        """Forget all tracked keys."""
+        raise NotImplementedError
+
+
+class LRUPolicy(EvictionPolicy):
+    """Least Recently Used eviction."""
+
+    def __init__(self, capacity: int):
+        super().__init__(capacity)
+        self.order: OrderedDict = OrderedDict()
+
+    def record_access(self, key: Any) -> None:
+        self.order.move_to_end(key)
+
+    def record_insert(self, key: Any) -> None:
+        self.order[key] = None
+
+    def record_remove(self, key: Any) -> None:
+        self.order.pop(key, None)
+
+    def victim(self) -> Optional[Any]:
+        return next(iter(self.order), None)
+
+    def clear(self) -> None:
+        self.order.clear()
+
+
+class CountMinSketch:
+    """
+    Approximate frequency counter with periodic aging.
+
+    Counters saturate at 15 (as 4-bit counters would) and are halved once
+    the number of recorded increments reaches the sample size, so the
+    sketch tracks recent popularity rather than all-time counts.
+    """
+
+    DEPTH = 4
+    MAX_COUNT = 15
+    # Odd multipliers used to derive one index per row from a single hash
+    _SEEDS = (0x9E3779B1, 0x85EBCA77, 0xC2B2AE3D, 0x27D4EB2F)
+
+    def __init__(self, capacity: int, sample_factor: int = 10):
+        """
+        Initialize the sketch.
+
+        Args:
+            capacity: Expected number of cached entries
+            sample_factor: Increments, as a multiple of capacity, between agings
+        """
+        width = 1
+        while width < max(16, capacity):
+            width <<= 1
+        self.mask = width - 1
+        self.rows = [[0] * width for _ in range(self.DEPTH)]
+        self.sample_size = max(16, capacity) * sample_factor
+        self.additions = 0
+
+    def _indexes(self, key: Any):
+        h = hash(key)
+        for seed in self._SEEDS:
+            h = (h * seed + seed) & 0xFFFFFFFFFFFFFFFF
+            yield (h >> 32) & self.mask
+
+    def increment(self, key: Any) -> None:
+        """Record one occurrence of key."""
+        for row, index in zip(self.rows, self._indexes(key)):
+            if row[index] < self.MAX_COUNT:
+                row[index] += 1
+
+        self.additions += 1
+        if self.additions >= self.sample_size:
+            self._age()
+
+    def frequency(self, key: Any) -> int:
+        """Estimate how often key occurred recently."""
+        return min(row[index] for row, index in zip(self.rows, self._indexes(key)))
+
+    def _age(self) -> None:
+        """Halve every counter."""
+        for row in self.rows:
+            for index, count in enumerate(row):
+                row[index] = count >> 1
+        self.additions //= 2
+
+
+class WTinyLFUPolicy(EvictionPolicy):
+    """
+    Window TinyLFU eviction with a segmented LRU main area.
+
+    New keys enter a small LRU window. Keys overflowing the window move to
+    the probation segment as admission candidates; when the cache must
+    evict, a candidate only displaces the probation segment's LRU entry if
+    the sketch has seen it more often. Hits in probation promote keys to
+    the protected segment.
+    """
+
+    def __init__(
+        self,
+        capacity: int,
+        window_ratio: float = 0.01,
+        protected_ratio: float = 0.8
+    ):
+        """
+        Initialize the policy.
+
+        Args:
+            capacity: Expected number of entries the cache holds when full
+            window_ratio: Fraction of capacity used by the admission window
+            protected_ratio: Fraction of the main area used by the protected segment
+        """
+        super().__init__(capacity)
+        self.window_capacity = max(1, int(capacity * window_ratio))
+        main_capacity = max(1, capacity - self.window_capacity)
+        self.protected_capacity = max(1, int(main_capacity * protected_ratio))
+
+        self.window: OrderedDict = OrderedDict()
+        self.probation: OrderedDict = OrderedDict()
+        self.protected: OrderedDict = OrderedDict()
+        self.candidates: Deque[Any] = deque(maxlen=max(16, self.window_capacity))
+        self.sketch = CountMinSketch(capacity)
+
+    def record_access(self, key: Any) -> None:
+        self.sketch.increment(key)
+        if key in self.window:
+            self.window.move_to_end(key)
+        elif key in self.probation:
+            del self.probation[key]
+            self.protected[key] = None
+            if len(self.protected) > self.protected_capacity:
+                demoted, _ = self.protected.popitem(last=False)
+                self.probation[demoted] = None
+        elif key in self.protected:
+            self.protected.move_to_end(key)
+
+    def record_miss(self, key: Any) -> None:
+        self.sketch.increment(key)
+
+    def record_insert(self, key: Any) -> None:
+        self.sketch.increment(key)
+        self.window[key] = None
+        while len(self.window) > self.window_capacity:
+            candidate, _ = self.window.popitem(last=False)
+            self.probation[candidate] = None
+            self.candidates.append(candidate)
+
+    def record_remove(self, key: Any) -> None:
+        for segment in (self.window, self.probation, self.protected):
+            if key in segment:
+                del segment[key]
+                return
+
+    def victim(self) -> Optional[Any]:
+        # Admission: the newest candidate still on probation competes with
+        # the probation segment's least recently used entry
+        while self.candidates:
+            candidate = self.candidates.pop()
+            if candidate not in self.probation:
+                continue
+            incumbent = next(iter(self.probation))
+            if incumbent == candidate:
+                return candidate
+            if self.sketch.frequency(candidate) > self.sketch.frequency(incumbent):
+                return incumbent
+            return candidate
+
+        for segment in (self.probation, self.protected, self.window):
+            if segment:
+                return next(iter(segment))
+        return None
+
+    def clear(self) -> None:
+        self.window.clear()
+        self.probation.clear()
+        self.protected.clear()
+        self.candidates.clear()
+
+
+POLICIES: Dict[str, Type[EvictionPolicy]] = {
+    "lru": LRUPolicy,
+    "w-tinylfu": WTinyLFUPolicy,
+}
+
+
+def make_policy(name: str, capacity: int) -> EvictionPolicy:
+    """
+    Create an eviction policy by name.
+
+    Args:
+        name: Policy name ("lru" or "w-tinylfu")
+        capacity: Expected number of entries the cache holds when full
+
+    Returns:
+        New policy instance
+
+    Raises:
+        ValueError: If the policy name is unknown
+    """
+    try:
+        policy_class = POLICIES[name.lower()]
+    except KeyError:
+        raise ValueError(
+            f"Unknown cache policy '{name}'. Available: {', '.join(POLICIES)}"
+        ) from None
+    return policy_class(capacity)
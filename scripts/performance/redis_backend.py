@@ -0,0 +1,457 @@
+"""
+Redis Cache Backend
+===================
+
+Networked cache tier shared by every Lambda container and batch worker,
+so a chunk generated anywhere in the fleet is a hit everywhere else.
+
+Speaks the Redis wire protocol (RESP2) directly over pooled sockets, so it
+works with Redis, Valkey, ElastiCache or MemoryDB without a client library.
+Lookups of several keys are pipelined into one round trip.
+
+Keys are namespaced by a prefix. Tags are stored as Redis sets of keys,
+named "<prefix>tag:<tag>".
+
+Usage:
+    from performance.redis_backend import RedisBackend
+
+    remote = RedisBackend(host="my-cache.example.com", ttl_ms=86400000)
+    remote.set("hashed_key", "generated context", tags=["doc:abc"])
+    entries = remote.get_many(["hashed_key", "other_key"])
+"""
+
+import socket
+import time
+from contextlib import contextmanager
+from threading import BoundedSemaphore, Lock
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from .backends import CacheBackend
+from .codec import encode_value, decode_value
+
+
+class RedisError(Exception):
+    """Error reply returned by the server."""
+
+
+class CircuitOpenError(ConnectionError):
+    """The server was unreachable moments ago; the call was not attempted."""
+
+
+class RedisConnection:
+    """A single RESP2 connection."""
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        timeout: float,
+        db: int = 0,
+        password: Optional[str] = None
+    ):
+        """
+        Open a connection.
+
+        Args:
+            host: Server host name
+            port: Server port
+            timeout: Socket connect/read timeout in seconds
+            db: Database index to select
+            password: Password for AUTH (None to skip)
+        """
+        self.sock = socket.create_connection((host, port), timeout=timeout)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.reader = self.sock.makefile('rb')
+        if password:
+            self.execute('AUTH', password)
+        if db:
+            self.execute('SELECT', db)
+
+    @staticmethod
+    def _encode(args: Sequence[Any]) -> bytes:
+        parts = [b'*%d\r\n' % len(args)]
+        for arg in args:
+            if isinstance(arg, str):
+                arg = arg.encode('utf-8')
+            elif not isinstance(arg, (bytes, bytearray)):
+                arg = str(arg).encode('utf-8')
+            parts.append(b'$%d\r\n' % len(arg))
+            parts.append(bytes(arg))
+            parts.append(b'\r\n')
+        return b''.join(parts)
+
+    def _read(self) -> Any:
+        line = self.reader.readline()
+        if not line.endswith(b'\r\n'):
+            raise ConnectionError("Connection closed by server")
+        try:
+            return self._parse(line[:1], line[1:-2])
+        except ValueError as e:
+            # A bad length or integer means the reply stream is out of step
+            raise ConnectionError(f"Malformed reply {line[:64]!r}") from e
+
+    def _parse(self, prefix: bytes, body: bytes) -> Any:
+        if prefix == b'+':
+            return body.decode('utf-8')
+        if prefix == b'-':
+            return RedisError(body.decode('utf-8'))
+        if prefix == b':':
+            return int(body)
+        if prefix == b'$':
+            length = int(body)
+            if length < 0:
+                return None
+            data = self.reader.read(length + 2)
+            if len(data) != length + 2:
+                raise ConnectionError("Connection closed by server")
+            return data[:-2]
+        if prefix == b'*':
+            length = int(body)
+            if length < 0:
+                return None
+            return [self._read() for _ in range(length)]
+        raise ConnectionError(f"Unexpected reply prefix {prefix!r}")
+
+    def pipeline(self, commands: Sequence[Sequence[Any]]) -> List[Any]:
+        """
+        Send several commands in one write and read all replies.
+
+        Args:
+            commands: Commands, each a sequence of arguments
+
+        Returns:
+            One reply per command
+
+        Raises:
+            RedisError: If any command returned an error (after all replies
+                were read, so the connection stays usable)
+        """
+        self.sock.sendall(b''.join(self._encode(command) for command in commands))
+        replies = [self._read() for _ in commands]
+        for reply in replies:
+            if isinstance(reply, RedisError):
+                raise reply
+        return replies
+
+    def execute(self, *args: Any) -> Any:
+        """Send one command and return its reply."""
+        return self.pipeline([args])[0]
+
+    def close(self) -> None:
+        """Close the socket."""
+        try:
+            self.reader.close()
+        finally:
+            self.sock.close()
+
+
+class RedisConnectionPool:
+    """
+    Thread-safe pool of RESP connections.
+
+    Idle connections are reused most-recently-returned first; at most
+    max_connections are open at a time, and callers wait up to timeout for
+    one to become free. A connection that fails mid-command is discarded.
+
+    After a failed connect the circuit opens: for circuit_open_s calls fail
+    at once with CircuitOpenError instead of each waiting out the connect
+    timeout. The first call after the window probes the server again, while
+    the others keep failing fast until it succeeds.
+    """
+
+    def __init__(
+        self,
+        host: str = "localhost",
+        port: int = 6379,
+        db: int = 0,
+        password: Optional[str] = None,
+        max_connections: int = 16,
+        timeout: float = 1.0,
+        circuit_open_s: float = 5.0
+    ):
+        """
+        Initialize the pool.
+
+        Args:
+            host: Server host name
+            port: Server port
+            db: Database index
+            password: Password for AUTH (None to skip)
+            max_connections: Maximum number of open connections
+            timeout: Socket and pool wait timeout in seconds
+            circuit_open_s: Seconds to fail fast after a failed connect
+        """
+        self.host = host
+        self.port = port
+        self.db = db
+        self.password = password
+        self.timeout = timeout
+        self.circuit_open_s = circuit_open_s
+        self.open_until: Optional[float] = None
+        self.slots = BoundedSemaphore(max_connections)
+        self.idle: List[RedisConnection] = []
+        self.lock = Lock()
+
+    def _connect(self) -> RedisConnection:
+        """Open a new connection, or fail fast while the circuit is open."""
+        with self.lock:
+            if self.open_until is not None:
+                now = time.monotonic()
+                if now < self.open_until:
+                    raise CircuitOpenError(
+                        f"Redis at {self.host}:{self.port} unreachable; "
+                        f"retrying in {self.open_until - now:.1f}s"
+                    )
+                # This caller probes the server; the others keep failing fast
+                self.open_until = now + self.circuit_open_s
+        try:
+            conn = RedisConnection(
+                self.host, self.port, self.timeout, self.db, self.password
+            )
+        except OSError:
+            with self.lock:
+                self.open_until = time.monotonic() + self.circuit_open_s
+            raise
+        with self.lock:
+            self.open_until = None
+        return conn
+
+    @contextmanager
+    def connection(self) -> Iterator[RedisConnection]:
+        """
+        Borrow a connection for the duration of a with block.
+
+        Raises:
+            TimeoutError: If no connection became free within the timeout
+            CircuitOpenError: If a recent connect failed (see the class
+                docstring)
+        """
+        if not self.slots.acquire(timeout=self.timeout):
+            raise TimeoutError("Timed out waiting for a Redis connection")
+
+        conn = None
+        try:
+            with self.lock:
+                conn = self.idle.pop() if self.idle else None
+            if conn is None:
+                conn = self._connect()
+            yield conn
+        except RedisError:
+            raise
+        except BaseException:
+            # The reply stream may be out of step; never reuse the socket
+            if conn is not None:
+                conn.close()
+                conn = None
+            raise
+        finally:
+            if conn is not None:
+                with self.lock:
+                    self.idle.append(conn)
+            self.slots.release()
+
+    def close(self) -> None:
+        """Close all idle connections."""
+        with self.lock:
+            idle, self.idle = self.idle, []
+        for conn in idle:
+            conn.close()
+
+
+class RedisBackend(CacheBackend):
+    """
+    Cache tier stored in a Redis-compatible server.
+
+    Features:
+    - Shared by every process that points at the same server and prefix
+    - Server-side TTL expiry, with per-entry overrides
+    - Pipelined multi-key lookups (MGET plus PTTL in one round trip)
+    - Tags per entry and bulk invalidation by tag
+    - Connection pooling; network errors and undecodable values are
+      logged and treated as misses
+    - Fails fast for circuit_open_ms after a failed connect, so an
+      unreachable server costs one connect timeout per window rather than
+      one per call
+    """
+
+    name = "redis"
+
+    def __init__(
+        self,
+        host: str = "localhost",
+        port: int = 6379,
+        ttl_ms: int = 86400000,
+        prefix: str = "prediction-cache:",
+        db: int = 0,
+        password: Optional[str] = None,
+        max_connections: int = 16,
+        timeout_ms: int = 1000,
+        circuit_open_ms: int = 5000
+    ):
+        """
+        Initialize the Redis backend.
+
+        Args:
+            host: Server host name
+            port: Server port
+            ttl_ms: Time-to-live in milliseconds
+            prefix: Namespace prepended to every key
+            db: Database index
+            password: Password for AUTH (None to skip)
+            max_connections: Maximum number of pooled connections
+            timeout_ms: Socket and pool wait timeout in milliseconds
+            circuit_open_ms: How long calls are skipped (as misses) after
+                a failed connect, in milliseconds
+        """
+        self.host = host
+        self.port = port
+        self.ttl_ms = ttl_ms
+        self.prefix = prefix
+        self.pool = RedisConnectionPool(
+            host, port, db, password, max_connections, timeout_ms / 1000.0,
+            circuit_open_ms / 1000.0
+        )
+        self.errors = 0
+        self.skipped = 0
+        self.decode_errors = 0
+        self.stats_lock = Lock()
+
+    def _key(self, key: str) -> str:
+        return self.prefix + key
+
+    def _tag_key(self, tag: str) -> str:
+        return f"{self.prefix}tag:{tag}"
+
+    def _pipeline(self, commands: Sequence[Sequence[Any]]) -> Optional[List[Any]]:
+        """Run commands on a pooled connection; None if the server failed."""
+        try:
+            with self.pool.connection() as conn:
+                return conn.pipeline(commands)
+        except CircuitOpenError:
+            # Already reported when the connect failed
+            with self.stats_lock:
+                self.skipped += 1
+            return None
+        except (OSError, RedisError) as e:
+            # TimeoutError and ConnectionError are OSErrors
+            with self.stats_lock:
+                self.errors += 1
+            print(f"Error talking to Redis at {self.host}:{self.port}: {e}")
+            return None
+
+    def _entry(self, data: Optional[bytes], pttl: int, now: float) -> Optional[Tuple[Any, Optional[float]]]:
+        # PTTL is -1 for keys without expiry and -2 if the key expired
+        # between the GET and the PTTL
+        if data is None or pttl == -2:
+            return None
+        try:
+            value = decode_value(data)
+        except ValueError as e:
+            # Written by something else under our prefix, or corrupted
+            with self.stats_lock:
+                self.decode_errors += 1
+            print(f"Error decoding cached value from Redis: {e}")
+            return None
+        return value, (now + pttl if pttl >= 0 else None)
+
+    def get_entry(self, key: str) -> Optional[Tuple[Any, Optional[float]]]:
+        now = time.time() * 1000
+        replies = self._pipeline([('GET', self._key(key)), ('PTTL', self._key(key))])
+        if replies is None:
+            return None
+        return self._entry(replies[0], replies[1], now)
+
+    def get_many(
+        self,
+        keys: Sequence[str]
+    ) -> Dict[str, Tuple[Any, Optional[float]]]:
+        """Fetch several entries in a single pipelined round trip."""
+        if not keys:
+            return {}
+
+        now = time.time() * 1000
+        redis_keys = [self._key(key) for key in keys]
+        replies = self._pipeline(
+            [('MGET', *redis_keys)] + [('PTTL', redis_key) for redis_key in redis_keys]
+        )
+        if replies is None:
+            return {}
+
+        entries = {}
+        for key, data, pttl in zip(keys, replies[0], replies[1:]):
+            entry = self._entry(data, pttl, now)
+            if entry is not None:
+                entries[key] = entry
+        return entries
+
+    def set(
+        self,
+        key: str,
+        value: Any,
+        ttl_ms: Optional[float] = None,
+        tags: Optional[Iterable[str]] = None
+    ) -> None:
+        ttl = int(ttl_ms if ttl_ms is not None else self.ttl_ms)
+        if ttl <= 0:
+            return
+
+        redis_key = self._key(key)
+        commands: List[Tuple[Any, ...]] = [('SET', redis_key, encode_value(value), 'PX', ttl)]
+        for tag in set(tags or ()):
+            # Tag sets live at least as long as the backend TTL; stale
+            # members are harmless since invalidation just deletes them
+            tag_key = self._tag_key(tag)
+            commands.append(('SADD', tag_key, redis_key))
+            commands.append(('PEXPIRE', tag_key, max(ttl, self.ttl_ms)))
+        self._pipeline(commands)
+
+    def delete(self, key: str) -> bool:
+        replies = self._pipeline([('DEL', self._key(key))])
+        return bool(replies and replies[0])
+
+    def invalidate_tag(self, tag: str) -> int:
+        tag_key = self._tag_key(tag)
+        replies = self._pipeline([('SMEMBERS', tag_key)])
+        if not replies or not replies[0]:
+            return 0
+
+        members = list(replies[0])
+        replies = self._pipeline([('DEL', *members), ('DEL', tag_key)])
+        return replies[0] if replies else 0
+
+    def _scan(self) -> Iterator[List[bytes]]:
+        """Yield batches of keys under the prefix."""
+        cursor = b'0'
+        while True:
+            replies = self._pipeline([('SCAN', cursor, 'MATCH', self.prefix + '*', 'COUNT', 1000)])
+            if replies is None:
+                return
+            cursor, keys = replies[0]
+            if keys:
+                yield keys
+            if cursor in (b'0', '0', 0):
+                return
+
+    def clear(self) -> None:
+        for keys in self._scan():
+            self._pipeline([('DEL', *keys)])
+
+    def size(self) -> int:
+        tag_prefix = self._tag_key('').encode('utf-8')
+        return sum(
+            1 for keys in self._scan() for key in keys
+            if not key.startswith(tag_prefix)
+        )
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "host": f"{self.host}:{self.port}",
+            "prefix": self.prefix,
+            "ttl_ms": self.ttl_ms,
+            "errors": self.errors,
+            "skipped": self.skipped,
+            "decode_errors": self.decode_errors,
+        }
+
+    def close(self) -> None:
+        self.pool.close()
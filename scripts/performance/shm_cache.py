@@ -0,0 +1,479 @@
+"""
+Shared-Memory Prediction Cache
+==============================
+
+A PredictionCache variant whose entries live in a
+multiprocessing.shared_memory block, so every worker of a process pool
+reads and fills one cache instead of keeping a private copy each.
+
+The block is a fixed arena of equally sized slots grouped into small
+buckets (set-associative open addressing): a key hashes to one bucket and
+may occupy any free slot in it. Writers take one of a set of striped
+process-shared locks chosen by bucket. Readers take no lock: each slot
+carries a sequence counter that writers make odd while they modify the
+slot, and a reader retries whenever the counter was odd or changed while
+it copied the slot (a seqlock).
+
+Entry tags are stored in the slot ahead of the value, so invalidate_tag()
+from any process removes matching entries written by every process; it
+scans the arena, one bucket lock at a time.
+
+Entry times are wall-clock, since monotonic clocks are not guaranteed to
+agree between processes on every platform.
+
+Usage:
+    from concurrent.futures import ProcessPoolExecutor
+    from performance import PerformanceOptimizer
+    from performance.shm_cache import SharedMemoryCache
+
+    cache = SharedMemoryCache(num_slots=65536, slot_bytes=4096)
+
+    def init_worker(shared_cache):
+        global optimizer
+        optimizer = PerformanceOptimizer(cache=shared_cache)
+
+    with ProcessPoolExecutor(initializer=init_worker, initargs=(cache,)) as pool:
+        ...
+    cache.close()
+    cache.unlink()
+"""
+
+import json
+import multiprocessing
+import struct
+import time
+import zlib
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, FrozenSet, Iterable, Iterator, List, Optional, Tuple
+
+from .codec import encode_value, decode_value
+from .optimizer import PredictionCache
+from .stats import CacheStats
+
+# Slot header: sequence counter, key digest, created_at and expires_at (epoch
+# ms), stored length, logical (uncompressed) length, flags, tags length. The
+# encoded tags precede the stored value in the slot's data area.
+_SLOT_HEADER = struct.Struct("<I16sddIIBH")
+_SEQ = struct.Struct("<I")
+_SEQ_MASK = 0xFFFFFFFF
+
+_FLAG_USED = 0x01
+_FLAG_ZLIB = 0x02
+
+# Optimistic read attempts before a reader falls back to the bucket lock
+_READ_RETRIES = 64
+
+
+class SharedMemoryCache(PredictionCache):
+    """
+    Cross-process cache with TTL backed by a shared memory slot arena.
+
+    Features:
+    - One cache shared by all processes that attach to it
+    - Fixed memory footprint: num_slots * (slot_bytes + header)
+    - Lock-free seqlock reads; striped process-shared locks for writes
+    - Optional zlib compression of values
+    - Oldest-entry eviction within a bucket when it is full
+
+    The creating process owns the block and must unlink() it when done.
+    Instances are picklable for process start-up (e.g. as a pool initializer
+    argument); unpickling attaches to the existing block. Values must be
+    str, bytes or JSON serializable, and values whose encoded size plus
+    encoded tags exceeds slot_bytes are not cached. Per-entry TTLs and tags
+    are supported; invalidate_tag() scans the whole arena.
+    """
+
+    def __init__(
+        self,
+        num_slots: int = 16384,
+        slot_bytes: int = 4096,
+        ttl_ms: int = 300000,
+        ways: int = 8,
+        num_locks: int = 64,
+        compression: Optional[str] = None,
+        stats: Optional[CacheStats] = None,
+        name: Optional[str] = None,
+        mp_context: Optional[Any] = None
+    ):
+        """
+        Create a shared memory cache.
+
+        Args:
+            num_slots: Number of entry slots (rounded up to a multiple of ways)
+            slot_bytes: Maximum encoded size of one value in bytes
+            ttl_ms: Time-to-live in milliseconds
+            ways: Slots per bucket a key may occupy
+            num_locks: Number of striped write locks
+            compression: "zlib" or None for raw storage
+            stats: Optional statistics collector (recorded per process)
+            name: Shared memory block name (generated if None)
+            mp_context: multiprocessing context used to create the locks
+                (default context if None)
+        """
+        if compression not in (None, "zlib"):
+            raise ValueError(
+                f"Unknown compression codec '{compression}'. Available: zlib"
+            )
+
+        self.num_buckets = max(1, -(-num_slots // ways))
+        self.ways = ways
+        self.slot_bytes = slot_bytes
+        self.slot_size = _SLOT_HEADER.size + slot_bytes
+        self.max_entries = self.num_buckets * ways
+        self.max_bytes = self.max_entries * slot_bytes
+        self.ttl_ms = ttl_ms
+        self.compression = compression
+        self.stats = stats
+        self.sweeper = None
+
+        ctx = mp_context or multiprocessing.get_context()
+        self.locks = [ctx.Lock() for _ in range(num_locks)]
+
+        self.shm = SharedMemory(
+            name=name, create=True, size=self.max_entries * self.slot_size
+        )
+        self.owner = True
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["shm"] = self.shm.name
+        state["sweeper"] = None
+        # Statistics are per process; the attached copy starts its own
+        state["stats"] = self.stats is not None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.shm = SharedMemory(name=state["shm"])
+        self.stats = CacheStats() if state["stats"] else None
+        self.owner = False
+
+    def _bucket(self, hashed_key: str) -> Tuple[int, bytes]:
+        key_bytes = bytes.fromhex(hashed_key)
+        return int.from_bytes(key_bytes[:8], "little") % self.num_buckets, key_bytes
+
+    def _lock_for(self, bucket: int):
+        return self.locks[bucket % len(self.locks)]
+
+    def _read_slot(self, offset: int) -> Optional[tuple]:
+        """
+        Copy one slot without locking.
+
+        Returns:
+            (key, created_at, expires_at, logical_length, flags, tags, data)
+            with tags still encoded, or None if a writer kept the slot busy
+            for every retry
+        """
+        buf = self.shm.buf
+        for _ in range(_READ_RETRIES):
+            seq_before = _SEQ.unpack_from(buf, offset)[0]
+            if seq_before & 1:
+                continue
+
+            _, key, created_at, expires_at, length, logical, flags, tags_length = (
+                _SLOT_HEADER.unpack_from(buf, offset)
+            )
+            tags = data = None
+            if flags & _FLAG_USED and tags_length + length <= self.slot_bytes:
+                start = offset + _SLOT_HEADER.size
+                tags = bytes(buf[start:start + tags_length])
+                data = bytes(buf[start + tags_length:start + tags_length + length])
+
+            if _SEQ.unpack_from(buf, offset)[0] == seq_before:
+                return key, created_at, expires_at, logical, flags, tags, data
+        return None
+
+    def _write_slot(
+        self,
+        offset: int,
+        key: bytes,
+        created_at: float,
+        expires_at: float,
+        logical: int,
+        flags: int,
+        tags: bytes,
+        data: bytes
+    ) -> None:
+        """Overwrite one slot; the caller holds the bucket's lock."""
+        buf = self.shm.buf
+        seq = _SEQ.unpack_from(buf, offset)[0]
+        _SEQ.pack_into(buf, offset, (seq + 1) & _SEQ_MASK)
+        start = offset + _SLOT_HEADER.size
+        buf[start:start + len(tags)] = tags
+        buf[start + len(tags):start + len(tags) + len(data)] = data
+        _SLOT_HEADER.pack_into(
+            buf, offset, (seq + 1) & _SEQ_MASK, key, created_at, expires_at,
+            len(data), logical, flags, len(tags)
+        )
+        _SEQ.pack_into(buf, offset, (seq + 2) & _SEQ_MASK)
+
+    def _clear_slot(self, offset: int) -> None:
+        """Free one slot; the caller holds the bucket's lock."""
+        self._write_slot(offset, bytes(16), 0.0, 0.0, 0, 0, b"", b"")
+
+    @staticmethod
+    def _encode_tags(tags: Optional[Iterable[str]]) -> bytes:
+        if not tags:
+            return b""
+        return json.dumps(sorted(set(tags)), separators=(",", ":")).encode()
+
+    @staticmethod
+    def _decode_tags(tags: bytes) -> FrozenSet[str]:
+        return frozenset(json.loads(tags)) if tags else frozenset()
+
+    def _decode(self, flags: int, data: bytes) -> Any:
+        if flags & _FLAG_ZLIB:
+            data = zlib.decompress(data)
+        return decode_value(data)
+
+    def _get_hashed(self, hashed_key: str, count_stats: bool = True) -> Optional[Any]:
+        """Look up an already hashed key without taking a lock."""
+        stats = self.stats if count_stats else None
+        bucket, key_bytes = self._bucket(hashed_key)
+        now = time.time() * 1000
+
+        for way in range(self.ways):
+            offset = (bucket * self.ways + way) * self.slot_size
+            slot = self._read_slot(offset)
+            if slot is None:
+                # Persistent writer activity: read under the lock instead
+                with self._lock_for(bucket):
+                    slot = self._read_slot(offset)
+            if slot is None:
+                # Still odd under the lock: its writer died mid-write, so
+                # the slot cannot be trusted and counts as not holding the key
+                continue
+            key, _, expires_at, _, flags, _, data = slot
+            if flags & _FLAG_USED and key == key_bytes:
+                if expires_at <= now:
+                    break
+                if stats is not None:
+                    stats.increment("hits")
+                return self._decode(flags, data)
+
+        if stats is not None:
+            stats.increment("misses")
+        return None
+
+    def _set_hashed(
+        self,
+        hashed_key: str,
+        value: Any,
+        ttl_ms: Optional[float] = None,
+        tags: Optional[Iterable[str]] = None
+    ) -> None:
+        """Store a value under an already hashed key."""
+        if ttl_ms is None:
+            ttl_ms = self.ttl_ms
+
+        data = encode_value(value)
+        logical = len(data)
+        flags = _FLAG_USED
+        if self.compression == "zlib" and logical >= 1024:
+            compressed = zlib.compress(data)
+            if len(compressed) < logical:
+                data = compressed
+                flags |= _FLAG_ZLIB
+        encoded_tags = self._encode_tags(tags)
+        if len(encoded_tags) + len(data) > self.slot_bytes:
+            return
+
+        bucket, key_bytes = self._bucket(hashed_key)
+        buf = self.shm.buf
+        created_at = time.time() * 1000
+        expires_at = created_at + ttl_ms
+
+        with self._lock_for(bucket):
+            existing, free, oldest, oldest_expires = None, None, None, None
+            for way in range(self.ways):
+                offset = (bucket * self.ways + way) * self.slot_size
+                _, key, _, slot_expires, _, _, slot_flags, _ = (
+                    _SLOT_HEADER.unpack_from(buf, offset)
+                )
+                if not slot_flags & _FLAG_USED or slot_expires <= created_at:
+                    if free is None:
+                        free = offset
+                elif key == key_bytes:
+                    existing = offset
+                    break
+                elif oldest is None or slot_expires < oldest_expires:
+                    oldest, oldest_expires = offset, slot_expires
+
+            # Overwrite the key's slot, else take a free or expired slot,
+            # else evict the entry closest to expiry
+            if existing is not None:
+                target = existing
+            elif free is not None:
+                target = free
+            else:
+                target = oldest
+            self._write_slot(
+                target, key_bytes, created_at, expires_at, logical, flags,
+                encoded_tags, data
+            )
+
+        if existing is None and free is None and self.stats is not None:
+            self.stats.increment("evictions")
+
+    def export_entries(
+        self,
+        created_after_ns: Optional[int] = None
+    ) -> Iterator[Tuple[str, Any, int, int, FrozenSet[str]]]:
+        """
+        Iterate over live entries, e.g. to write a snapshot.
+
+        Times are converted to this process's monotonic clock to match
+        PredictionCache.export_entries().
+        """
+        now_ms = time.time() * 1000
+        now_ns = time.monotonic_ns()
+        for offset in range(0, self.max_entries * self.slot_size, self.slot_size):
+            slot = self._read_slot(offset)
+            if slot is None:
+                continue
+            key, created_at, expires_at, _, flags, tags, data = slot
+            if not flags & _FLAG_USED or expires_at <= now_ms:
+                continue
+            created_ns = now_ns + int((created_at - now_ms) * 1_000_000)
+            if created_after_ns is not None and created_ns <= created_after_ns:
+                continue
+            expires_ns = now_ns + int((expires_at - now_ms) * 1_000_000)
+            yield (
+                key.hex(), self._decode(flags, data), expires_ns, created_ns,
+                self._decode_tags(tags)
+            )
+
+    def invalidate_tag(self, tag: str) -> int:
+        """
+        Remove every entry carrying a tag, whichever process stored it.
+
+        Scans the arena, taking one bucket lock at a time.
+
+        Args:
+            tag: Tag to invalidate
+
+        Returns:
+            Number of entries removed
+        """
+        # Cheap substring test before decoding a slot's tags
+        needle = json.dumps(tag).encode()
+        buf = self.shm.buf
+        removed = 0
+        for bucket in range(self.num_buckets):
+            with self._lock_for(bucket):
+                for way in range(self.ways):
+                    offset = (bucket * self.ways + way) * self.slot_size
+                    _, _, _, _, _, _, flags, tags_length = _SLOT_HEADER.unpack_from(buf, offset)
+                    if not flags & _FLAG_USED or not tags_length:
+                        continue
+                    start = offset + _SLOT_HEADER.size
+                    tags = bytes(buf[start:start + tags_length])
+                    if needle in tags and tag in self._decode_tags(tags):
+                        self._clear_slot(offset)
+                        removed += 1
+        return removed
+
+    def _used_slots(self) -> List[Tuple[int, int]]:
+        """Stored and logical lengths of all live slots (approximate)."""
+        buf = self.shm.buf
+        now = time.time() * 1000
+        used = []
+        for offset in range(0, self.max_entries * self.slot_size, self.slot_size):
+            _, _, _, expires_at, length, logical, flags, _ = (
+                _SLOT_HEADER.unpack_from(buf, offset)
+            )
+            if flags & _FLAG_USED and expires_at > now:
+                used.append((length, logical))
+        return used
+
+    def clear(self) -> None:
+        """Clear all cache entries."""
+        for bucket in range(self.num_buckets):
+            with self._lock_for(bucket):
+                for way in range(self.ways):
+                    offset = (bucket * self.ways + way) * self.slot_size
+                    self._clear_slot(offset)
+
+    def size(self) -> int:
+        """Get current number of live entries (scans the arena)."""
+        return len(self._used_slots())
+
+    def bytes_used(self) -> int:
+        """Get total stored size of live values in bytes (scans the arena)."""
+        return sum(length for length, _ in self._used_slots())
+
+    def logical_bytes_used(self) -> int:
+        """Get total size of live values before compression (scans the arena)."""
+        return sum(logical for _, logical in self._used_slots())
+
+    def _find_slot(self, hashed_key: str) -> Tuple[int, bytes, Optional[int]]:
+        """Locate a key's slot; returns (bucket, key bytes, offset or None)."""
+        bucket, key_bytes = self._bucket(hashed_key)
+        buf = self.shm.buf
+        for way in range(self.ways):
+            offset = (bucket * self.ways + way) * self.slot_size
+            _, key, _, _, _, _, flags, _ = _SLOT_HEADER.unpack_from(buf, offset)
+            if flags & _FLAG_USED and key == key_bytes:
+                return bucket, key_bytes, offset
+        return bucket, key_bytes, None
+
+    def _expires_at(self, hashed_key: str) -> Optional[float]:
+        """Get an entry's expiry as epoch milliseconds, or None if absent."""
+        _, _, offset = self._find_slot(hashed_key)
+        if offset is None:
+            return None
+        slot = self._read_slot(offset)
+        return slot[2] if slot is not None else None
+
+    def _delete_hashed(self, hashed_key: str) -> bool:
+        """Free the slot holding an already hashed key."""
+        bucket, key_bytes, _ = self._find_slot(hashed_key)
+        with self._lock_for(bucket):
+            # Re-locate under the lock; the slot may have changed meanwhile
+            _, _, offset = self._find_slot(hashed_key)
+            if offset is None:
+                return False
+            self._clear_slot(offset)
+            return True
+
+    def cleanup_expired(self, limit: Optional[int] = None) -> int:
+        """
+        Free slots holding expired entries.
+
+        Expired slots are also reused by writers, so this only matters for
+        keeping size() and bytes_used() accurate.
+
+        Args:
+            limit: Maximum number of entries to remove in this call
+                (None removes everything that has expired)
+
+        Returns:
+            Number of entries removed
+        """
+        buf = self.shm.buf
+        removed = 0
+        for bucket in range(self.num_buckets):
+            if limit is not None and removed >= limit:
+                break
+            with self._lock_for(bucket):
+                now = time.time() * 1000
+                for way in range(self.ways):
+                    offset = (bucket * self.ways + way) * self.slot_size
+                    _, _, _, expires_at, _, _, flags, _ = _SLOT_HEADER.unpack_from(buf, offset)
+                    if flags & _FLAG_USED and expires_at <= now:
+                        self._clear_slot(offset)
+                        removed += 1
+
+        if removed and self.stats is not None:
+            self.stats.increment("expirations", removed)
+        return removed
+
+    def close(self) -> None:
+        """Detach this process from the shared memory block."""
+        self.stop_sweeper()
+        self.shm.close()
+
+    def unlink(self) -> None:
+        """Destroy the shared memory block (owner only, after close())."""
+        if self.owner:
+            self.shm.unlink()
@@ -0,0 +1,358 @@
+"""
+Near-Duplicate Prompt Cache
+===========================
+
+An opt-in cache that serves results for prompts that are *almost* the same
+as one seen before - e.g. a re-uploaded document whose chunks differ only
+by whitespace, page numbers or OCR noise - which exact-match hashing in
+PredictionCache always misses.
+
+Each text is normalized, reduced to a 64-bit SimHash signature, and indexed
+by splitting the signature into bands (locality-sensitive hashing). Two
+signatures within the Hamming distance allowed by the similarity threshold
+always share at least one identical band, so candidate lookup is a handful
+of dict probes instead of a scan. Bands are at least 4 bits wide, which
+caps them at 16 and so the guarantee at 15 differing bits: thresholds below
+MIN_THRESHOLD (about 0.77) are rejected.
+
+Usage:
+    from performance.similarity import SimilarityCache
+
+    cache = SimilarityCache(threshold=0.95)
+    signature = cache.signature(chunk_text)
+    cache.set([signature], "model|params", context)
+    context = cache.get([cache.signature(noisy_chunk_text)], "model|params")
+"""
+
+import re
+import heapq
+import time
+from collections import OrderedDict
+from itertools import count
+from threading import Lock
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Sequence, Set, Tuple
+
+SIGNATURE_BITS = 64
+_SIGNATURE_MASK = (1 << SIGNATURE_BITS) - 1
+
+# Narrower bands would match almost everything, making lookups scans
+MAX_BANDS = SIGNATURE_BITS // 4
+
+# Lowest threshold at which MAX_BANDS bands still guarantee recall
+MIN_THRESHOLD = 1.0 - (MAX_BANDS - 1) / SIGNATURE_BITS
+
+_PAGE_MARKER = re.compile(
+    r"(?im)^\W*(?:page\s+)?\d{1,4}(?:\s+of\s+\d{1,4})?\W*$|\bpage\s+\d{1,4}(?:\s+of\s+\d{1,4})?\b"
+)
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """
+    Normalize text before computing its signature.
+
+    Case-folds, removes page-number markers ("Page 3", "3 of 10", lines that
+    hold only a number) and collapses all whitespace.
+
+    Args:
+        text: Raw text
+
+    Returns:
+        Normalized text
+    """
+    text = _PAGE_MARKER.sub(" ", text.casefold())
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+def simhash(text: str, shingle_size: int = 3, max_features: int = 1024) -> int:
+    """
+    Compute a 64-bit SimHash of normalized text.
+
+    Features are overlapping word shingles. For long texts only the
+    max_features smallest feature hashes are used (a consistent sample, so
+    near-duplicate texts keep sampling the same features), which bounds the
+    cost of the bit-weighting step.
+
+    Args:
+        text: Text to sign (normalized by the caller)
+        shingle_size: Words per shingle
+        max_features: Maximum number of features to weigh
+
+    Returns:
+        64-bit signature
+    """
+    words = text.split()
+    if len(words) < shingle_size:
+        shingles = [" ".join(words)]
+    else:
+        shingles = [
+            " ".join(words[i:i + shingle_size])
+            for i in range(len(words) - shingle_size + 1)
+        ]
+
+    features = {hash(shingle) & _SIGNATURE_MASK for shingle in shingles}
+    if len(features) > max_features:
+        features = heapq.nsmallest(max_features, features)
+
+    weights = [0] * SIGNATURE_BITS
+    for feature in features:
+        for bit in range(SIGNATURE_BITS):
+            if feature >> bit & 1:
+                weights[bit] += 1
+            else:
+                weights[bit] -= 1
+
+    signature = 0
+    for bit, weight in enumerate(weights):
+        if weight > 0:
+            signature |= 1 << bit
+    return signature
+
+
+class SimilarityCache:
+    """
+    LRU cache with TTL keyed by SimHash signatures instead of exact keys.
+
+    An entry is identified by one or more signatures (e.g. the chunk and its
+    document) plus an exact namespace (model and generation parameters). A
+    lookup hits when every signature is within the similarity threshold of
+    the stored one. The first signature drives the LSH band index.
+
+    Features:
+    - Configurable similarity threshold (1 - hamming_distance / 64)
+    - LSH band index with guaranteed recall at the threshold (which must
+      be at least MIN_THRESHOLD)
+    - One entry per signatures and namespace; storing again replaces it
+    - Least Recently Used (LRU) eviction and TTL expiry, with per-entry
+      TTL overrides
+    - Tags per entry and bulk invalidation by tag
+    - Thread-safe operations and near-hit statistics
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 10000,
+        ttl_ms: int = 300000,
+        threshold: float = 0.95,
+        max_features: int = 1024
+    ):
+        """
+        Initialize the similarity cache.
+
+        Args:
+            max_entries: Maximum number of entries to store
+            ttl_ms: Time-to-live in milliseconds
+            threshold: Minimum similarity (MIN_THRESHOLD-1.0) for a near hit
+            max_features: Maximum shingles weighed per signature
+
+        Raises:
+            ValueError: If threshold is outside [MIN_THRESHOLD, 1]
+        """
+        if not MIN_THRESHOLD <= threshold <= 1.0:
+            raise ValueError(
+                f"threshold must be in [{MIN_THRESHOLD:.4f}, 1]: lower thresholds "
+                f"allow more differing bits than {MAX_BANDS} bands can guarantee "
+                f"to find"
+            )
+
+        self.max_entries = max_entries
+        self.ttl_ms = ttl_ms
+        self.threshold = threshold
+        self.max_features = max_features
+        self.max_distance = int((1.0 - threshold) * SIGNATURE_BITS + 1e-9)
+
+        # max_distance + 1 bands guarantee that signatures within
+        # max_distance bits agree exactly on at least one band
+        self.num_bands = self.max_distance + 1
+        self.band_bits = SIGNATURE_BITS // self.num_bands
+        self.band_mask = (1 << self.band_bits) - 1
+
+        self.entries: OrderedDict = OrderedDict()
+        self.entry_ids: Dict[Tuple[str, Tuple[int, ...]], int] = {}
+        self.band_index: Dict[Tuple[str, int, int], Set[int]] = {}
+        self.tag_index: Dict[str, Set[int]] = {}
+        self.entry_tags: Dict[int, FrozenSet[str]] = {}
+        self.ids = count()
+        self.lock = Lock()
+        self.lookups = 0
+        self.near_hits = 0
+
+    def signature(self, text: str) -> int:
+        """
+        Normalize text and compute its signature.
+
+        Args:
+            text: Raw text
+
+        Returns:
+            64-bit SimHash signature
+        """
+        return simhash(normalize_text(text), max_features=self.max_features)
+
+    def _bands(self, namespace: str, signature: int) -> List[Tuple[str, int, int]]:
+        return [
+            (namespace, band, (signature >> (band * self.band_bits)) & self.band_mask)
+            for band in range(self.num_bands)
+        ]
+
+    def get(self, signatures: Sequence[int], namespace: str = "") -> Optional[Any]:
+        """
+        Find a cached value for near-duplicate signatures.
+
+        Args:
+            signatures: Signatures identifying the request
+            namespace: Exact-match scope (e.g. model and parameters)
+
+        Returns:
+            Value of the most similar live entry, or None
+        """
+        now = time.monotonic_ns()
+        with self.lock:
+            self.lookups += 1
+
+            candidates: Set[int] = set()
+            for band_key in self._bands(namespace, signatures[0]):
+                candidates.update(self.band_index.get(band_key, ()))
+
+            best_id, best_distance = None, None
+            for entry_id in candidates:
+                stored, _, _, expires_at = self.entries[entry_id]
+                if expires_at <= now or len(stored) != len(signatures):
+                    continue
+                distances = [bin(a ^ b).count("1") for a, b in zip(stored, signatures)]
+                distance = max(distances)
+                if distance <= self.max_distance and (
+                    best_distance is None or distance < best_distance
+                ):
+                    best_id, best_distance = entry_id, distance
+
+            if best_id is None:
+                return None
+
+            self.entries.move_to_end(best_id)
+            self.near_hits += 1
+            return self.entries[best_id][2]
+
+    def set(
+        self,
+        signatures: Sequence[int],
+        namespace: str,
+        value: Any,
+        ttl_ms: Optional[float] = None,
+        tags: Optional[Iterable[str]] = None
+    ) -> None:
+        """
+        Store a value under near-duplicate signatures.
+
+        Replaces the entry previously stored under the same signatures
+        and namespace, if any.
+
+        Args:
+            signatures: Signatures identifying the request
+            namespace: Exact-match scope (e.g. model and parameters)
+            value: Value to cache
+            ttl_ms: Time-to-live for this entry (cache-wide TTL if None)
+            tags: Tags for bulk invalidation
+        """
+        if ttl_ms is None:
+            ttl_ms = self.ttl_ms
+        expires_at = time.monotonic_ns() + int(ttl_ms * 1_000_000)
+        signatures = tuple(signatures)
+        with self.lock:
+            previous_id = self.entry_ids.get((namespace, signatures))
+            if previous_id is not None:
+                self._remove(previous_id)
+            entry_id = next(self.ids)
+            self.entries[entry_id] = (signatures, namespace, value, expires_at)
+            self.entry_ids[(namespace, signatures)] = entry_id
+            for band_key in self._bands(namespace, signatures[0]):
+                self.band_index.setdefault(band_key, set()).add(entry_id)
+            if tags:
+                entry_tags = frozenset(tags)
+                self.entry_tags[entry_id] = entry_tags
+                for tag in entry_tags:
+                    self.tag_index.setdefault(tag, set()).add(entry_id)
+
+            while len(self.entries) > self.max_entries:
+                oldest_id = next(iter(self.entries))
+                self._remove(oldest_id)
+
+    def _remove(self, entry_id: int) -> None:
+        stored, namespace, _, _ = self.entries.pop(entry_id)
+        del self.entry_ids[(namespace, stored)]
+        for band_key in self._bands(namespace, stored[0]):
+            bucket = self.band_index.get(band_key)
+            if bucket is not None:
+                bucket.discard(entry_id)
+                if not bucket:
+                    del self.band_index[band_key]
+
+        for tag in self.entry_tags.pop(entry_id, ()):
+            tagged = self.tag_index.get(tag)
+            if tagged is not None:
+                tagged.discard(entry_id)
+                if not tagged:
+                    del self.tag_index[tag]
+
+    def invalidate_tag(self, tag: str) -> int:
+        """
+        Remove every entry carrying a tag.
+
+        Args:
+            tag: Tag to invalidate
+
+        Returns:
+            Number of entries removed
+        """
+        with self.lock:
+            entry_ids = list(self.tag_index.get(tag, ()))
+            for entry_id in entry_ids:
+                self._remove(entry_id)
+            return len(entry_ids)
+
+    def cleanup_expired(self) -> int:
+        """
+        Remove all expired entries.
+
+        Returns:
+            Number of entries removed
+        """
+        now = time.monotonic_ns()
+        with self.lock:
+            expired = [
+                entry_id for entry_id, (_, _, _, expires_at) in self.entries.items()
+                if expires_at <= now
+            ]
+            for entry_id in expired:
+                self._remove(entry_id)
+            return len(expired)
+
+    def clear(self) -> None:
+        """Clear all cache entries."""
+        with self.lock:
+            self.entries.clear()
+            self.entry_ids.clear()
+            self.band_index.clear()
+            self.tag_index.clear()
+            self.entry_tags.clear()
+
+    def size(self) -> int:
+        """Get current cache size."""
+        with self.lock:
+            return len(self.entries)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get near-hit statistics.
+
+        Returns:
+            Dictionary with size, threshold, lookups, near hits and near-hit rate
+        """
+        with self.lock:
+            return {
+                "size": len(self.entries),
+                "threshold": self.threshold,
+                "lookups": self.lookups,
+                "near_hits": self.near_hits,
+                "near_hit_rate": self.near_hits / self.lookups if self.lookups else 0.0
+            }
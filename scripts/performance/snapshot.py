@@ -0,0 +1,425 @@
+"""
+Cache Snapshots
+===============
+
+Export and import of PredictionCache contents so that a fresh process (e.g.
+a cold Lambda container) can start warm from the last published snapshot.
+
+Snapshots use a compact binary format that is written and read as a stream,
+one entry at a time, so neither side materializes the whole cache as an
+intermediate structure:
+
+    header:  b"PCSNAP" | version (1 byte) | flags (1 byte) | written_at (f64)
+    entry:   0x01 | key (16 bytes) | created_at (f64) | expires_at (f64)
+             | value length (u32) | value (codec.encode_value)
+             | tag count (u16) | per tag: length (u16) | UTF-8 tag
+    trailer: 0x00 | entry count (u64)
+
+Version 1 snapshots (entries without tags) are still readable.
+
+Times are wall-clock epoch milliseconds, so snapshots stay meaningful across
+processes. With the compressed flag set, everything after the header is a
+single zlib stream. Values go through the cache value codec, so loading a
+snapshot can never execute code.
+
+Usage:
+    from performance.snapshot import CacheSnapshotter
+
+    snapshotter = CacheSnapshotter(optimizer.cache, s3_adapter, "my-bucket")
+    snapshotter.load()            # at container init
+    ...
+    snapshotter.maybe_save()      # at the end of each invocation
+"""
+
+import io
+import struct
+import time
+import uuid
+import zlib
+from typing import Any, BinaryIO, FrozenSet, Iterator, List, Optional, Tuple
+
+from .codec import encode_value, decode_value
+
+MAGIC = b"PCSNAP"
+VERSION = 2
+FLAG_COMPRESSED = 0x01
+
+_HEADER = struct.Struct("<6sBBd")
+_ENTRY = struct.Struct("<16sddI")
+_COUNT = struct.Struct("<Q")
+_TAG_LENGTH = struct.Struct("<H")
+_TAG_END = 0
+_TAG_ENTRY = 1
+
+# Size of the pieces read from (and flushed to) the underlying stream
+_CHUNK_SIZE = 64 * 1024
+
+
+class SnapshotFormatError(ValueError):
+    """Raised when a snapshot stream is malformed or truncated."""
+
+
+class _ZlibReader:
+    """Minimal file-like reader that inflates a zlib stream on demand."""
+
+    def __init__(self, raw: BinaryIO):
+        self.raw = raw
+        self.inflater = zlib.decompressobj()
+        self.buffer = bytearray()
+
+    def read(self, size: int) -> bytes:
+        while len(self.buffer) < size and not self.inflater.eof:
+            chunk = self.raw.read(_CHUNK_SIZE)
+            if not chunk:
+                self.buffer += self.inflater.flush()
+                break
+            self.buffer += self.inflater.decompress(chunk)
+        data = bytes(self.buffer[:size])
+        del self.buffer[:size]
+        return data
+
+
+class _ZlibWriter:
+    """Minimal file-like writer that deflates into another stream."""
+
+    def __init__(self, raw: BinaryIO, level: int):
+        self.raw = raw
+        self.deflater = zlib.compressobj(level)
+
+    def write(self, data: bytes) -> None:
+        compressed = self.deflater.compress(data)
+        if compressed:
+            self.raw.write(compressed)
+
+    def close(self) -> None:
+        self.raw.write(self.deflater.flush())
+
+
+def _read_exact(stream, size: int) -> bytes:
+    data = stream.read(size)
+    if len(data) != size:
+        raise SnapshotFormatError("Snapshot is truncated")
+    return data
+
+
+def write_snapshot(
+    cache: Any,
+    fileobj: BinaryIO,
+    created_after_ns: Optional[int] = None,
+    compress: bool = True,
+    level: int = 1
+) -> int:
+    """
+    Stream the live entries of a cache into a binary snapshot.
+
+    Entries whose values cannot be encoded by the cache value codec (i.e.
+    not str, bytes or JSON serializable) are skipped.
+
+    Args:
+        cache: PredictionCache or ShardedPredictionCache
+        fileobj: Binary stream to write to
+        created_after_ns: Only include entries written after this
+            time.monotonic_ns() value, producing a delta snapshot
+        compress: Deflate the entry stream with zlib
+        level: zlib compression level
+
+    Returns:
+        Number of entries written
+    """
+    now_ms = time.time() * 1000
+    now_ns = time.monotonic_ns()
+    fileobj.write(_HEADER.pack(
+        MAGIC, VERSION, FLAG_COMPRESSED if compress else 0, now_ms
+    ))
+
+    out = _ZlibWriter(fileobj, level) if compress else fileobj
+    count = 0
+    for key, value, expires_at, created_at, tags in cache.export_entries(created_after_ns):
+        try:
+            data = encode_value(value)
+        except (TypeError, ValueError):
+            continue
+
+        out.write(bytes((_TAG_ENTRY,)))
+        out.write(_ENTRY.pack(
+            bytes.fromhex(key),
+            now_ms + (created_at - now_ns) / 1e6,
+            now_ms + (expires_at - now_ns) / 1e6,
+            len(data)
+        ))
+        out.write(data)
+        out.write(_TAG_LENGTH.pack(len(tags)))
+        for tag in tags:
+            encoded = tag.encode('utf-8')
+            out.write(_TAG_LENGTH.pack(len(encoded)) + encoded)
+        count += 1
+
+    out.write(bytes((_TAG_END,)) + _COUNT.pack(count))
+    if compress:
+        out.close()
+    return count
+
+
+def read_snapshot(
+    fileobj: BinaryIO
+) -> Iterator[Tuple[str, Any, float, float, FrozenSet[str]]]:
+    """
+    Stream the entries of a binary snapshot.
+
+    Args:
+        fileobj: Binary stream positioned at the start of a snapshot
+
+    Yields:
+        Tuples of (hashed_key, value, expires_at, created_at, tags) with
+        times in epoch milliseconds
+
+    Raises:
+        SnapshotFormatError: If the stream is not a valid snapshot
+    """
+    magic, version, flags, _ = _HEADER.unpack(_read_exact(fileobj, _HEADER.size))
+    if magic != MAGIC:
+        raise SnapshotFormatError("Not a cache snapshot")
+    if version not in (1, VERSION):
+        raise SnapshotFormatError(f"Unsupported snapshot version {version}")
+
+    stream = _ZlibReader(fileobj) if flags & FLAG_COMPRESSED else fileobj
+    count = 0
+    while True:
+        tag = _read_exact(stream, 1)[0]
+        if tag == _TAG_END:
+            (expected,) = _COUNT.unpack(_read_exact(stream, _COUNT.size))
+            if expected != count:
+                raise SnapshotFormatError(
+                    f"Snapshot holds {count} entries, trailer says {expected}"
+                )
+            return
+        if tag != _TAG_ENTRY:
+            raise SnapshotFormatError(f"Unknown snapshot record tag {tag}")
+
+        key, created_at, expires_at, length = _ENTRY.unpack(
+            _read_exact(stream, _ENTRY.size)
+        )
+        value = decode_value(_read_exact(stream, length))
+        tags: FrozenSet[str] = frozenset()
+        if version >= 2:
+            (num_tags,) = _TAG_LENGTH.unpack(_read_exact(stream, _TAG_LENGTH.size))
+            tags = frozenset(
+                _read_exact(
+                    stream, _TAG_LENGTH.unpack(_read_exact(stream, _TAG_LENGTH.size))[0]
+                ).decode('utf-8')
+                for _ in range(num_tags)
+            )
+        count += 1
+        yield key.hex(), value, expires_at, created_at, tags
+
+
+def load_snapshot(cache: Any, fileobj: BinaryIO) -> int:
+    """
+    Insert the unexpired entries of a snapshot into a cache.
+
+    Entries keep their tags and remaining lifetime and replace any value already cached under the same key.
+
+    Args:
+        cache: PredictionCache or ShardedPredictionCache
+        fileobj: Binary stream positioned at the start of a snapshot
+
+    Returns:
+        Number of entries loaded
+
+    Raises:
+        SnapshotFormatError: If the stream is not a valid snapshot
+    """
+    loaded = 0
+    now_ms = time.time() * 1000
+    for key, value, expires_at, _, tags in read_snapshot(fileobj):
+        remaining_ms = expires_at - now_ms
+        if remaining_ms <= 0:
+            continue
+        cache._set_hashed(key, value, remaining_ms, tags or None)
+        loaded += 1
+    return loaded
+
+
+class CacheSnapshotter:
+    """
+    Publishes cache snapshots to S3 and warms caches from them.
+
+    A snapshot set under a prefix consists of one full snapshot plus delta
+    snapshots holding only entries written since the previous save. Deltas
+    are named by time and a per-process id, so several containers can
+    publish concurrently; every full_every deltas a process compacts by
+    writing a new full snapshot and deleting the deltas it has seen.
+
+    The store is any object with the S3Adapter byte and listing methods
+    (read_bytes_from_s3, write_bytes_to_s3, list_objects, delete_object);
+    list_objects() must return every key when max_keys is None.
+    S3Adapter.write_bytes_to_s3 takes bytes, so snapshots are streamed into
+    one buffer per upload rather than into the request body.
+    """
+
+    def __init__(
+        self,
+        cache: Any,
+        store: Any,
+        bucket: str,
+        prefix: str = "prediction-cache",
+        interval_ms: int = 60000,
+        full_every: int = 10
+    ):
+        """
+        Initialize the snapshotter.
+
+        Args:
+            cache: PredictionCache or ShardedPredictionCache to load and save
+            store: S3Adapter (or compatible) used for all object access
+            bucket: S3 bucket holding the snapshots
+            prefix: Key prefix of this snapshot set
+            interval_ms: Minimum time between saves in maybe_save()
+            full_every: Number of deltas written before compacting
+        """
+        self.cache = cache
+        self.store = store
+        self.bucket = bucket
+        self.prefix = prefix.rstrip("/")
+        self.interval_ms = interval_ms
+        self.full_every = full_every
+        self.process_id = uuid.uuid4().hex[:12]
+
+        # Monotonic time of the last load or save; deltas hold entries
+        # written after it
+        self.last_save_ns: Optional[int] = None
+        self.seen_deltas: List[str] = []
+        self.deltas_written = 0
+        # Until a full snapshot has been loaded or written, deltas would be
+        # missing everything cached before them
+        self.needs_full = True
+
+    @property
+    def full_key(self) -> str:
+        return f"{self.prefix}/full.snap"
+
+    def _delta_prefix(self) -> str:
+        return f"{self.prefix}/delta-"
+
+    def load(self) -> int:
+        """
+        Warm the cache from the full snapshot and all published deltas.
+
+        A missing or unreadable snapshot is logged and skipped, so a broken
+        snapshot never prevents the process from starting cold.
+
+        Returns:
+            Number of entries loaded
+        """
+        start_ns = time.monotonic_ns()
+        loaded = 0
+        keys = [self.full_key]
+        try:
+            deltas = sorted(
+                self.store.list_objects(
+                    self.bucket, prefix=self._delta_prefix(), max_keys=None
+                )
+            )
+            keys.extend(deltas)
+        except Exception as e:
+            print(f"Error listing cache snapshot deltas: {e}")
+            deltas = []
+
+        for key in keys:
+            try:
+                data = self.store.read_bytes_from_s3(self.bucket, key)
+                loaded += load_snapshot(self.cache, io.BytesIO(data))
+                if key == self.full_key:
+                    self.needs_full = False
+            except Exception as e:
+                print(f"Error loading cache snapshot {key}: {e}")
+
+        self.seen_deltas = deltas
+        # Loaded entries are already published; only newer writes go in deltas
+        self.last_save_ns = time.monotonic_ns()
+        print(
+            f"Loaded {loaded} cache entries from {len(keys)} snapshot(s) "
+            f"in {(self.last_save_ns - start_ns) / 1e6:.1f}ms"
+        )
+        return loaded
+
+    def _write(
+        self,
+        key: str,
+        created_after_ns: Optional[int],
+        skip_empty: bool = False
+    ) -> int:
+        buffer = io.BytesIO()
+        count = write_snapshot(self.cache, buffer, created_after_ns)
+        if count or not skip_empty:
+            self.store.write_bytes_to_s3(
+                self.bucket, key, buffer.getvalue(), 'application/octet-stream'
+            )
+        return count
+
+    def save_full(self) -> int:
+        """
+        Publish a full snapshot and delete the deltas it supersedes.
+
+        Returns:
+            Number of entries written
+        """
+        save_ns = time.monotonic_ns()
+        count = self._write(self.full_key, None)
+        for key in self.seen_deltas:
+            try:
+                self.store.delete_object(self.bucket, key)
+            except Exception as e:
+                print(f"Error deleting cache snapshot delta {key}: {e}")
+        self.seen_deltas = []
+        self.deltas_written = 0
+        self.needs_full = False
+        self.last_save_ns = save_ns
+        return count
+
+    def save_delta(self) -> int:
+        """
+        Publish a delta snapshot of entries written since the last save.
+
+        Falls back to a full snapshot if none has been loaded or written.
+
+        Returns:
+            Number of entries written (nothing is uploaded when 0)
+        """
+        if self.needs_full or self.last_save_ns is None:
+            return self.save_full()
+
+        save_ns = time.monotonic_ns()
+        key = f"{self._delta_prefix()}{int(time.time() * 1000):015d}-{self.process_id}.snap"
+        count = self._write(key, self.last_save_ns, skip_empty=True)
+        if count:
+            self.seen_deltas.append(key)
+            self.deltas_written += 1
+        self.last_save_ns = save_ns
+        return count
+
+    def maybe_save(self) -> int:
+        """
+        Save if interval_ms has passed since the last load or save.
+
+        Writes a delta, or a full snapshot if none has been loaded yet or
+        full_every deltas have been written. Errors are logged rather than
+        raised so publishing never fails the caller's request.
+
+        Returns:
+            Number of entries written
+        """
+        now_ns = time.monotonic_ns()
+        if (
+            self.last_save_ns is not None
+            and now_ns - self.last_save_ns < self.interval_ms * 1_000_000
+        ):
+            return 0
+
+        try:
+            if self.needs_full or self.deltas_written >= self.full_every:
+                return self.save_full()
+            return self.save_delta()
+        except Exception as e:
+            print(f"Error saving cache snapshot: {e}")
+            return 0
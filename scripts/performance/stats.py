@@ -0,0 +1,304 @@
+"""
+Cache Statistics and Latency Histograms
+=======================================
+
+Low-overhead instrumentation for PredictionCache and PerformanceOptimizer.
+
+Every recording thread gets its own counter and histogram arrays, so the
+hot path is a plain list increment with no lock; arrays are only summed
+when a snapshot is read. When a thread exits, its arrays are folded into a
+retired total, so short-lived threads do not accumulate. Latencies go into
+HDR-style log-linear buckets (8 sub-buckets per power of two, i.e. ~12%
+relative precision) covering nanoseconds to hours.
+
+Usage:
+    stats = CacheStats()
+    cache = PredictionCache(stats=stats)
+    ...
+    print(stats.snapshot())
+    print(stats.to_prometheus())
+"""
+
+import threading
+import weakref
+from typing import Any, Dict, List, Optional
+
+# Log-linear bucket layout: values below SUB_BUCKETS get exact buckets,
+# larger values keep their top SUB_BUCKET_BITS + 1 significant bits
+SUB_BUCKET_BITS = 3
+SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+NUM_BUCKETS = 64 * SUB_BUCKETS
+
+# Bucket bounds (seconds) used for the Prometheus exposition
+PROMETHEUS_BOUNDS_S = (
+    0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005,
+    0.01, 0.05, 0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0,
+)
+
+
+def _bucket_index(value_ns: int) -> int:
+    """Map a latency in nanoseconds onto its bucket."""
+    if value_ns < SUB_BUCKETS:
+        return max(0, value_ns)
+    shift = value_ns.bit_length() - SUB_BUCKET_BITS - 1
+    return (shift + 1) * SUB_BUCKETS + ((value_ns >> shift) - SUB_BUCKETS)
+
+
+def _bucket_upper_bound(index: int) -> int:
+    """Largest latency in nanoseconds that falls into a bucket."""
+    if index < SUB_BUCKETS:
+        return index
+    shift = index // SUB_BUCKETS - 1
+    mantissa = index % SUB_BUCKETS + SUB_BUCKETS
+    return ((mantissa + 1) << shift) - 1
+
+
+class _ArrayHolder:
+    """Thread-local owner of a thread's array; its finalizer retires the array."""
+
+    __slots__ = ("array", "__weakref__")
+
+    def __init__(self, array: List[int]):
+        self.array = array
+
+
+class _PerThreadArrays:
+    """
+    Integer arrays, one per recording thread, summed on read.
+
+    Each array is owned by a holder in the thread's thread-local storage.
+    When the thread exits, the holder is released and its finalizer adds the
+    array to a retired total and forgets it.
+    """
+
+    def __init__(self, width: int):
+        self.width = width
+        self.local = threading.local()
+        self.arrays: Dict[int, List[int]] = {}
+        self.retired = [0] * width
+        # Reentrant: a finalizer may run in a thread that holds the lock
+        self.registry_lock = threading.RLock()
+
+    def _array(self) -> List[int]:
+        try:
+            return self.local.array
+        except AttributeError:
+            holder = _ArrayHolder([0] * self.width)
+            with self.registry_lock:
+                self.arrays[id(holder)] = holder.array
+            weakref.finalize(holder, self._retire, id(holder))
+            self.local.holder = holder
+            self.local.array = holder.array
+            return holder.array
+
+    def _retire(self, key: int) -> None:
+        """Fold an exited thread's array into the retired total."""
+        with self.registry_lock:
+            array = self.arrays.pop(key, None)
+            if array is None:
+                return
+            for i, value in enumerate(array):
+                if value:
+                    self.retired[i] += value
+
+    def _sum(self) -> List[int]:
+        """Sum the retired total and every live thread's array."""
+        with self.registry_lock:
+            arrays = list(self.arrays.values())
+            totals = list(self.retired)
+        for array in arrays:
+            for i, value in enumerate(array):
+                if value:
+                    totals[i] += value
+        return totals
+
+
+class ThreadLocalCounters(_PerThreadArrays):
+    """
+    Named counters with a private array per recording thread.
+
+    increment() touches only the calling thread's array, so it never takes
+    a lock; read() sums the arrays of every thread that has recorded.
+    """
+
+    def __init__(self, names: List[str]):
+        """
+        Initialize the counters.
+
+        Args:
+            names: Counter names
+        """
+        super().__init__(len(names))
+        self.names = list(names)
+        self.index = {name: i for i, name in enumerate(self.names)}
+
+    def increment(self, name: str, amount: int = 1) -> None:
+        """Add amount to a counter."""
+        self._array()[self.index[name]] += amount
+
+    def read(self) -> Dict[str, int]:
+        """Sum every thread's counters."""
+        return dict(zip(self.names, self._sum()))
+
+
+class LatencyHistogram(_PerThreadArrays):
+    """
+    Log-bucketed latency histogram with lock-free per-thread recording.
+    """
+
+    def __init__(self):
+        # Buckets followed by the running sum of recorded values
+        super().__init__(NUM_BUCKETS + 1)
+
+    def record(self, value_ns: int) -> None:
+        """Record one latency in nanoseconds."""
+        array = self._array()
+        array[_bucket_index(value_ns)] += 1
+        array[NUM_BUCKETS] += value_ns
+
+    def merged(self) -> List[int]:
+        """Sum every thread's buckets; the last element is the value sum."""
+        return self._sum()
+
+    @staticmethod
+    def _percentile(buckets: List[int], count: int, fraction: float) -> int:
+        rank = max(1, int(count * fraction + 0.5))
+        seen = 0
+        for index, bucket_count in enumerate(buckets):
+            seen += bucket_count
+            if seen >= rank:
+                return _bucket_upper_bound(index)
+        return 0
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Summarize the histogram.
+
+        Returns:
+            Dictionary with count, sum and mean/p50/p90/p99/max in milliseconds
+        """
+        merged = self.merged()
+        buckets, total_ns = merged[:NUM_BUCKETS], merged[NUM_BUCKETS]
+        count = sum(buckets)
+        if count == 0:
+            return {"count": 0}
+
+        highest = max(i for i, bucket_count in enumerate(buckets) if bucket_count)
+        return {
+            "count": count,
+            "sum_ms": total_ns / 1e6,
+            "mean_ms": total_ns / count / 1e6,
+            "p50_ms": self._percentile(buckets, count, 0.50) / 1e6,
+            "p90_ms": self._percentile(buckets, count, 0.90) / 1e6,
+            "p99_ms": self._percentile(buckets, count, 0.99) / 1e6,
+            "max_ms": _bucket_upper_bound(highest) / 1e6,
+        }
+
+    def prometheus_lines(self, name: str, help_text: str) -> List[str]:
+        """Render the histogram in Prometheus text exposition format."""
+        merged = self.merged()
+        buckets, total_ns = merged[:NUM_BUCKETS], merged[NUM_BUCKETS]
+
+        lines = [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+        cumulative = 0
+        index = 0
+        for bound_s in PROMETHEUS_BOUNDS_S:
+            bound_ns = int(bound_s * 1e9)
+            while index < NUM_BUCKETS and _bucket_upper_bound(index) <= bound_ns:
+                cumulative += buckets[index]
+                index += 1
+            lines.append(f'{name}_bucket{{le="{bound_s:g}"}} {cumulative}')
+        count = sum(buckets)
+        lines.append(f'{name}_bucket{{le="+Inf"}} {count}')
+        lines.append(f"{name}_sum {total_ns / 1e9:.9f}")
+        lines.append(f"{name}_count {count}")
+        return lines
+
+
+class CacheStats:
+    """
+    Counters and latency histograms for a prediction cache.
+
+    Counters:
+    - hits, misses: lookups served / not served by the in-memory cache
+    - l2_hits: misses served by a lower cache tier
+    - expirations: entries dropped because their TTL passed
+    - evictions: entries dropped to stay within entry/byte budgets
+    - computes: calls to compute_fn on a miss
+    - coalesced_calls: misses that waited on an identical in-flight compute
+    - coalesce_timeouts: waiters that gave up and computed the value themselves
+
+    Histograms:
+    - lookup: time to resolve a lookup across all cache tiers
+    - compute: time spent in compute_fn
+    """
+
+    COUNTERS = [
+        "hits", "misses", "l2_hits", "expirations", "evictions", "computes",
+        "coalesced_calls", "coalesce_timeouts",
+    ]
+
+    def __init__(self):
+        self.counters = ThreadLocalCounters(self.COUNTERS)
+        self.lookup_latency = LatencyHistogram()
+        self.compute_latency = LatencyHistogram()
+
+    def increment(self, name: str, amount: int = 1) -> None:
+        """Add amount to a counter."""
+        self.counters.increment(name, amount)
+
+    def snapshot(self, gauges: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Build a point-in-time view of all statistics.
+
+        Args:
+            gauges: Extra point-in-time values (e.g. size, bytes) to include
+
+        Returns:
+            Dictionary of counters, hit ratio, gauges and latency summaries
+        """
+        snapshot: Dict[str, Any] = self.counters.read()
+        lookups = snapshot["hits"] + snapshot["misses"]
+        snapshot["hit_ratio"] = (
+            (snapshot["hits"] + snapshot["l2_hits"]) / lookups if lookups else 0.0
+        )
+        if gauges:
+            snapshot.update(gauges)
+        snapshot["lookup_latency"] = self.lookup_latency.snapshot()
+        snapshot["compute_latency"] = self.compute_latency.snapshot()
+        return snapshot
+
+    def to_prometheus(
+        self,
+        prefix: str = "prediction_cache",
+        gauges: Optional[Dict[str, Any]] = None
+    ) -> str:
+        """
+        Render all statistics in Prometheus text exposition format.
+
+        Args:
+            prefix: Metric name prefix
+            gauges: Extra numeric point-in-time values to export as gauges
+
+        Returns:
+            Exposition text, one sample per line
+        """
+        lines = []
+        for name, value in self.counters.read().items():
+            metric = f"{prefix}_{name}_total"
+            lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{metric} {value}")
+
+        for name, value in (gauges or {}).items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                metric = f"{prefix}_{name}"
+                lines.append(f"# TYPE {metric} gauge")
+                lines.append(f"{metric} {value}")
+
+        lines.extend(self.lookup_latency.prometheus_lines(
+            f"{prefix}_lookup_seconds", "Time to resolve a cache lookup across all tiers"
+        ))
+        lines.extend(self.compute_latency.prometheus_lines(
+            f"{prefix}_compute_seconds", "Time spent computing values on a cache miss"
+        ))
+        return "\n".join(lines) + "\n"